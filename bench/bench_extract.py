@@ -0,0 +1,132 @@
+# bench/bench_extract.py — orevideo ページのリンク抽出のマイクロベンチ
+#
+# 旧実装（TWIMG_RE / GOFILE_RE で 2 回走査 ＋ _unique_preserve 2 回、str にデコードしてから）と
+# goxplorer2.scan_links（1 回走査・重複除去しながら・bytes のまま）を、保存したページで比べる。
+#
+# 使い方:
+#   python bench/bench_extract.py PAGES_DIR                 # PAGES_DIR/*.html で計測
+#   python bench/bench_extract.py PAGES_DIR --fetch 20      # 先に newest 1..20 を取得して保存
+#   python bench/bench_extract.py PAGES_DIR --synthetic 20  # ネットに出られないとき用のダミーページ
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import goxplorer2 as gx  # noqa: E402
+
+# 旧 extract_links_from_html そのまま（[debug] print だけ外してある）
+_LEGACY_TWIMG_RE = re.compile(r"https?://video\.twimg\.com/[^\s\"']+?\.mp4\?tag=\d+", re.I)
+_LEGACY_GOFILE_RE = re.compile(r"https?://gofile\.io/d/[A-Za-z0-9]+", re.I)
+
+
+def legacy_extract(html: str) -> Tuple[List[str], List[str]]:
+    if not html:
+        return [], []
+    tw = _LEGACY_TWIMG_RE.findall(html)
+    gf = _LEGACY_GOFILE_RE.findall(html)
+    return gx._unique_preserve(tw), gx._unique_preserve(gf)
+
+
+def fetch_pages(out_dir: str, n: int) -> None:
+    for p in range(1, n + 1):
+        url = gx._orevideo_newest_url(p)
+        r = gx.http_get(url, headers=gx.HEADERS, timeout=20)
+        if r.status_code != 200:
+            print(f"[warn] status {r.status_code}: {url}")
+            continue
+        with open(os.path.join(out_dir, f"newest_{p:03d}.html"), "wb") as f:
+            f.write(r.content)
+        print(f"[info] saved page {p} ({len(r.content)} bytes)")
+
+
+def synthetic_pages(out_dir: str, n: int, seed: int = 1) -> None:
+    """orevideo っぽいダミーページ（カード 50 枚 ＋ 長いテキスト / スクリプト）"""
+    rnd = random.Random(seed)
+    filler = "<p>" + "あいうえお lorem ipsum https://example.com/x?y=1 " * 40 + "</p>\n"
+    for p in range(1, n + 1):
+        parts = ["<html><head><script>" + "var x='a';" * 400 + "</script></head><body>\n"]
+        for i in range(50):
+            mid = rnd.randrange(10**18, 10**19)
+            tw = f"https://video.twimg.com/ext_tw_video/{mid}/pu/vid/avc1/1280x720/{mid:x}.mp4?tag=12"
+            gf = f"https://gofile.io/d/{mid:x}"[:28]
+            parts.append(
+                f'<div class="card"><video src="{tw}"></video><a href="{tw}">dl</a>'
+                f'<a href="{gf}">gofile</a><img src="https://pbs.twimg.com/media/{mid}.jpg?name=small"></div>\n'
+            )
+            if i % 5 == 0:
+                parts.append(filler)
+        parts.append("</body></html>\n")
+        with open(os.path.join(out_dir, f"synthetic_{p:03d}.html"), "w", encoding="utf-8") as f:
+            f.write("".join(parts))
+
+
+def _best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="orevideo link extractor micro-benchmark")
+    ap.add_argument("pages_dir")
+    ap.add_argument("--fetch", type=int, default=0, help="newest 1..N を取得して保存してから計測")
+    ap.add_argument("--synthetic", type=int, default=0, help="ダミーページを N 枚作ってから計測")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    os.makedirs(args.pages_dir, exist_ok=True)
+    if args.fetch:
+        fetch_pages(args.pages_dir, args.fetch)
+    if args.synthetic:
+        synthetic_pages(args.pages_dir, args.synthetic)
+
+    names = sorted(n for n in os.listdir(args.pages_dir) if n.endswith(".html"))
+    if not names:
+        print(f"[warn] no *.html in {args.pages_dir} (use --fetch N or --synthetic N)")
+        return 1
+    bodies = []
+    for n in names:
+        with open(os.path.join(args.pages_dir, n), "rb") as f:
+            bodies.append(f.read())
+    total_bytes = sum(len(b) for b in bodies)
+
+    # 結果が同じか（順番も含めて）
+    mismatches = 0
+    for n, b in zip(names, bodies):
+        old = legacy_extract(b.decode("utf-8", "replace"))
+        new = gx.extract_links_from_html(b)
+        if old != new:
+            mismatches += 1
+            print(f"[warn] result differs: {n} legacy={tuple(map(len, old))} new={tuple(map(len, new))}")
+
+    texts = [b.decode("utf-8", "replace") for b in bodies]
+    cases = [
+        ("legacy (decode + 2 scans)", lambda: [legacy_extract(b.decode("utf-8", "replace")) for b in bodies]),
+        ("legacy (str only)", lambda: [legacy_extract(t) for t in texts]),
+        ("scan_links (bytes)", lambda: [gx.scan_links(b) for b in bodies]),
+        ("scan_links (str)", lambda: [gx.scan_links(t) for t in texts]),
+    ]
+
+    print(f"pages={len(bodies)} bytes={total_bytes} repeat={args.repeat} mismatches={mismatches}")
+    base = None
+    for label, fn in cases:
+        sec = _best_of(args.repeat, fn)
+        base = base or sec
+        print(
+            f"{label:28s} {sec * 1000:8.2f} ms  "
+            f"{total_bytes / sec / 1e6:7.1f} MB/s  x{base / sec:.2f}"
+        )
+    return 0 if mismatches == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,430 @@
+# bench/bench_selection.py — collect_fresh_gofile_urls（URL 選別）全体のベンチ
+#
+# 外には出ずに、同じプロセス内のダミーサーバーで
+#   - orevideo 一覧（newest / popular）
+#   - gofile の JSON API と HTML（alive / dead / 429 / slow を混ぜる）
+#   - twimg の HEAD（同じ混ぜ方。dead は 403。1 動画につき 2 解像度）
+#   - スプシー（get / batch_update だけのダミーワークシート）
+# を用意して、collect_fresh_gofile_urls を NUM_PAGES / MAX_GOFILE_CHECK / 履歴件数 / 失敗の混ざり方
+# の組み合わせで回す。1 ケース = 1 子プロセス（モジュールのキャッシュや peak RSS が混ざらないように）。
+#
+# 出力:
+#   - 標準出力に表（wall 秒 / リクエスト数 / peak RSS / 選べた URL 数 / URL per sec）
+#   - --out に JSONL（1 行 1 ケース。git のコミット・実行日時つき）… バージョン間の比較用
+#
+# 使い方:
+#   python bench/bench_selection.py                          # quick グリッド
+#   python bench/bench_selection.py --full --out bench.jsonl
+#   python bench/bench_selection.py --pages 5,50 --checks 15 --history 5000,500000 --mix flaky
+#   OREVIDEO_MIN_INTERVAL_SEC=0 python bench/bench_selection.py   # 本体の env はそのまま効く
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# 失敗の混ざり方: (alive, dead, 429, slow) の割合[%] と slow の遅さ(秒)
+MIXES = {
+    "clean": ((70, 30, 0, 0), 0.0),
+    "flaky": ((50, 30, 10, 10), 2.0),
+    "hostile": ((30, 30, 25, 15), 3.0),
+}
+
+QUICK_GRID = {"pages": [5, 20], "checks": [15], "history": [5000, 500000], "mix": ["clean", "flaky"]}
+FULL_GRID = {
+    "pages": [5, 20, 50],
+    "checks": [5, 15, 30],
+    "history": [5000, 50000, 500000],
+    "mix": ["clean", "flaky", "hostile"],
+}
+
+
+def _pick(key: str, percents) -> int:
+    """key から決まる 0..len-1（同じ key なら毎回同じ）"""
+    r = zlib.crc32(key.encode()) % 100
+    acc = 0
+    for i, pct in enumerate(percents):
+        acc += pct
+        if r < acc:
+            return i
+    return len(percents) - 1
+
+
+# =========================
+#   ダミーサーバー（子プロセス内）
+# =========================
+
+class _Server:
+    def __init__(self, case: dict):
+        self.case = case
+        self.counts = {"listing": 0, "api": 0, "html": 0, "api_429": 0, "html_429": 0, "twimg": 0, "twimg_429": 0}
+        self._lock = threading.Lock()
+        percents, self.slow_sec = MIXES[case["mix"]]
+        self.percents = percents
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *a):
+                pass
+
+            def _send(self, code: int, body: bytes, ctype: str = "text/html", extra=None):
+                self.send_response(code)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (extra or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                self._send(200, b'{"status":"ok","data":{"token":"bench"}}', "application/json")
+
+            def do_HEAD(self):
+                path = urlsplit(self.path).path
+                if path.startswith("/ext_tw_video/"):
+                    return server._twimg(self, path.split("/")[2])
+                self._send(405, b"")
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path.startswith("/contents/"):
+                    return server._api(self, parts.path.rsplit("/", 1)[1])
+                if parts.path.startswith("/d/"):
+                    return server._html(self, parts.path.rsplit("/", 1)[1])
+                return server._listing(self, parse_qs(parts.query))
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def variant(self, cid: str) -> str:
+        return ("alive", "dead", "429", "slow")[_pick("v" + cid, self.percents)]
+
+    def _listing(self, h, q) -> None:
+        self._count("listing")
+        time.sleep(self.case["listing_latency"])
+        page = int(q.get("page", ["1"])[0])
+        popular = q.get("sort", [""])[0] == "popular"
+        cards = []
+        for i in range(self.case["per_page"]):
+            tw = listing_twimg(0 if popular else page, i)
+            card = f'<div class="card"><video src="{tw}"></video><a href="{tw.replace("1280x720", "480x270")}">dl</a>'
+            if not popular:
+                card += f'<a href="{listing_gofile(page, i)}">gofile</a>'
+            cards.append(card + "</div>\n")
+        h._send(200, ("<html><body>\n" + "".join(cards) + "</body></html>").encode())
+
+    def _api(self, h, cid: str) -> None:
+        self._count("api")
+        v = self.variant(cid)
+        if v == "429":
+            self._count("api_429")
+            return h._send(429, b'{"status":"error-rateLimit"}', "application/json", {"Retry-After": "1"})
+        if v == "slow":
+            time.sleep(self.slow_sec)
+        if v == "dead":
+            body = b'{"status":"error-notFound","data":{}}'
+        else:
+            body = b'{"status":"ok","data":{"type":"folder","children":{"a":{}},"childrenCount":1}}'
+        h._send(200, body, "application/json")
+
+    def _html(self, h, cid: str) -> None:
+        self._count("html")
+        v = self.variant(cid)
+        if v == "429":
+            self._count("html_429")
+            return h._send(429, b"rate limited", extra={"Retry-After": "1"})
+        if v == "slow":
+            time.sleep(self.slow_sec)
+        body = b"<html><body>This content does not exist</body></html>" if v == "dead" else b"<html>ok</html>"
+        h._send(200, body)
+
+
+    def _twimg(self, h, mid: str) -> None:
+        self._count("twimg")
+        v = self.variant("t" + mid)
+        if v == "429":
+            self._count("twimg_429")
+            return h._send(429, b"", extra={"Retry-After": "1"})
+        if v == "slow":
+            time.sleep(self.slow_sec)
+        h._send(403 if v == "dead" else 200, b"", "video/mp4")
+
+
+def listing_gofile(page: int, i: int) -> str:
+    return f"https://gofile.io/d/B{page:03d}x{i:02d}"
+
+
+def listing_twimg(page: int, i: int) -> str:
+    mid = 1_000_000 + page * 1000 + i
+    return f"https://video.twimg.com/ext_tw_video/{mid}/pu/vid/avc1/1280x720/v{mid}.mp4?tag=12"
+
+
+class _FakeWorksheet:
+    """スプシーの代わり（B〜E 列だけ。get / batch_update に遅延をつける）"""
+
+    def __init__(self, rows: int, fresh_pct: int, latency: float):
+        self.latency = latency
+        self.gets = 0
+        self.updates = 0
+        self.data = []
+        for r in range(rows):
+            url = f"https://gofile.io/d/S{r:05d}"
+            # fresh_pct% だけ未使用（生存確認の対象）、残りは投稿済み / リンク切れ
+            used = 100 - fresh_pct
+            mark = ("", "post成功", "リンク切れ")[_pick("s" + url, (fresh_pct, used - used // 4, used // 4))]
+            self.data.append([url, "", mark if mark == "リンク切れ" else "", mark if mark == "post成功" else ""])
+
+    def get(self, rng: str):
+        self.gets += 1
+        time.sleep(self.latency)
+        a, _, b = rng.partition(":")
+        first = int(a[1:])
+        last = int(b[1:]) if b[1:] else len(self.data) + 1
+        out = [list(r) for r in self.data[first - 2:last - 1]]
+        while out and not any(out[-1]):
+            out.pop()
+        return out
+
+    def batch_update(self, data, **kwargs):
+        self.updates += 1
+        time.sleep(self.latency)
+        return {}
+
+
+class _LocalBrowserPool:
+    """厳しめ判定のブラウザの代わり（ダミーサーバーの HTML をそのまま返す）"""
+
+    def __init__(self, http_get, tabs: int):
+        self._get = http_get
+        self._ex = ThreadPoolExecutor(max_workers=tabs, thread_name_prefix="bench-browser")
+
+    def render(self, url: str, timeout: int = 15, deadline_ts=None) -> "Future":
+        def _run():
+            try:
+                r = self._get(url, timeout=timeout, deadline_ts=deadline_ts)
+                return r.text if r.status_code == 200 else None
+            except Exception:
+                return None
+        return self._ex.submit(_run)
+
+    def close(self) -> None:
+        self._ex.shutdown(wait=False, cancel_futures=True)
+
+
+# =========================
+#   1 ケース（子プロセス）
+# =========================
+
+def run_case(case: dict) -> dict:
+    server = _Server(case)
+    tmp = tempfile.mkdtemp(prefix="bench_sel_")
+
+    # 本体は import 時に env を読むので、先に env を決めておく
+    os.environ.update({
+        "OREVIDEO_BASE": server.base,
+        "GOFILE_API_BASE": server.base,
+        "MAX_GOFILE_CHECK": str(case["checks"]),
+        "RAW_LIMIT": str(case["raw_limit"]),
+        "GOFILE_TARGET": str(case.get("gofile_target") or case["want"]),
+        "MIN_POST": "1",
+        "GOFILE_LIVENESS_CACHE_FILE": "",
+        "TWIMG_LIVENESS_CACHE_FILE": "",
+        "OREVIDEO_PAGE_CACHE_FILE": "",
+        "CRAWL_STATS_FILE": "",
+        "SHEET_INDEX_FILE": "",
+        "REPLAY_MODE": "",
+    })
+    sys.path.insert(0, ROOT)
+    import goxplorer2 as gx
+    import http_session
+    import run_report
+    from posted_history import PostedHistory, SeenSet
+    from requests.adapters import HTTPAdapter
+
+    # gofile.io / video.twimg.com への通信はダミーサーバーへ向ける（共有セッションに同じ設定のアダプタを足す）
+    class _LocalAdapter(HTTPAdapter):
+        def send(self, request, **kw):
+            parts = urlsplit(request.url)
+            request.url = server.base + parts.path + (f"?{parts.query}" if parts.query else "")
+            return super().send(request, **kw)
+
+    sess = http_session.get_session()
+    adapter = _LocalAdapter(
+        pool_connections=http_session.HTTP_POOL_MAXSIZE,
+        pool_maxsize=http_session.HTTP_POOL_MAXSIZE,
+        max_retries=http_session._make_retry(),
+    )
+    sess.mount("https://gofile.io/", adapter)
+    sess.mount("http://gofile.io/", adapter)
+    sess.mount("https://video.twimg.com/", adapter)
+
+    # 投稿履歴: 一覧に出るリンクの seen_frac ＋ 残りはダミーで history 件数まで
+    t0 = time.monotonic()
+    history = PostedHistory(os.path.join(tmp, "posted_urls.log"), key_func=gx.canonical_url_key)
+    listed = [listing_gofile(p, i) for p in range(1, case["pages"] + 1) for i in range(case["per_page"])]
+    listed += [listing_twimg(p, i) for p in range(0, case["pages"] + 1) for i in range(case["per_page"])]
+    seen_listed = [u for u in listed if _pick("h" + u, (case["seen_pct"], 100 - case["seen_pct"])) == 0]
+    history.extend(seen_listed[: case["history"]])
+    filler = max(0, case["history"] - len(seen_listed))
+    history.extend(f"https://gofile.io/d/H{n:07d}" for n in range(filler))
+    history.flush()
+    already_seen = SeenSet(history, [], key_func=gx.canonical_url_key)
+    setup_sec = time.monotonic() - t0
+
+    ws = _FakeWorksheet(case["sheet_rows"], case["sheet_fresh_pct"], case["sheet_latency"])
+    gx.reset_sheet_session()
+    gx._SHEET_SESSION = gx._SheetSession(ws, "bench")
+    gx._SHEET_SESSION_OPENED = True
+    gx._BROWSER_POOL = _LocalBrowserPool(http_session.http_get, gx.GOFILE_BROWSER_TABS)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.monotonic()
+    out = sys.stdout if case["verbose"] else open(os.devnull, "w")
+    with contextlib.redirect_stdout(out):
+        urls = gx.collect_fresh_gofile_urls(
+            already_seen,
+            want=case["want"],
+            num_pages=case["pages"],
+            deadline_sec=case["deadline"],
+        )
+    wall = time.monotonic() - t0
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {
+        "wall_sec": round(wall, 3),
+        "setup_sec": round(setup_sec, 3),
+        "selected": len(urls),
+        "selected_gofile": sum(1 for u in urls if "gofile.io" in u),
+        "selected_twimg": sum(1 for u in urls if "video.twimg.com" in u),
+        "urls_per_sec": round(len(urls) / wall, 3) if wall > 0 else None,
+        "requests": dict(server.counts, sheet_get=ws.gets, sheet_update=ws.updates),
+        "requests_total": sum(server.counts[k] for k in ("listing", "api", "html", "twimg")) + ws.gets,
+        "peak_rss_kb": rss_peak,
+        "rss_before_collect_kb": rss_before,
+        # 本体の計測（区間ごとの所要時間・カウンタ）
+        "report": {k: v for k, v in run_report.summary().items() if k in ("spans", "counters")},
+    }
+
+
+# =========================
+#   グリッド（親プロセス）
+# =========================
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def _ints(s: str):
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="collect_fresh_gofile_urls benchmark")
+    ap.add_argument("--case", help=argparse.SUPPRESS)
+    ap.add_argument("--full", action="store_true", help="大きいグリッドで回す")
+    ap.add_argument("--pages", type=_ints, help="NUM_PAGES（カンマ区切り）")
+    ap.add_argument("--checks", type=_ints, help="MAX_GOFILE_CHECK（カンマ区切り）")
+    ap.add_argument("--history", type=_ints, help="already_seen の件数（カンマ区切り）")
+    ap.add_argument("--mix", help=f"失敗の混ざり方（{','.join(MIXES)} からカンマ区切り）")
+    ap.add_argument("--want", type=int, default=5)
+    ap.add_argument("--gofile-target", type=int, default=0, help="GOFILE_TARGET（0 なら want と同じ。小さくすると twimg で埋める）")
+    ap.add_argument("--per-page", type=int, default=20, help="1 ページのカード数")
+    ap.add_argument("--seen-pct", type=int, default=80, help="一覧のリンクのうち投稿済みの割合[%%]")
+    ap.add_argument("--sheet-rows", type=int, default=500)
+    ap.add_argument("--sheet-fresh-pct", type=int, default=1, help="スプシーの未使用行の割合[%%]")
+    ap.add_argument("--sheet-latency", type=float, default=0.25)
+    ap.add_argument("--listing-latency", type=float, default=0.1)
+    ap.add_argument("--raw-limit", type=int, default=100000)
+    ap.add_argument("--deadline", type=int, default=240)
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--out", help="結果を JSONL で追記するファイル")
+    ap.add_argument("--verbose", action="store_true", help="本体のログも出す")
+    args = ap.parse_args()
+
+    if args.case:
+        result = run_case(json.loads(args.case))
+        # 取り消しきれなかった確認のスレッドがまだ print していることがあるので、1 回の write で行ごと出す
+        sys.stdout.flush()
+        os.write(sys.stdout.fileno(), ("\nRESULT " + json.dumps(result) + "\n").encode())
+        return 0
+
+    grid = dict(FULL_GRID if args.full else QUICK_GRID)
+    for name in ("pages", "checks", "history"):
+        if getattr(args, name):
+            grid[name] = getattr(args, name)
+    if args.mix:
+        grid["mix"] = [m for m in args.mix.split(",") if m in MIXES]
+
+    meta = {
+        "bench": "selection",
+        "rev": _git_rev(),
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+    }
+    print(
+        f"{'pages':>5} {'checks':>6} {'history':>8} {'mix':>8} | {'wall':>7} {'reqs':>5} "
+        f"{'429':>4} {'rss MB':>7} {'sel':>4} {'url/s':>6}"
+    )
+    out_f = open(args.out, "a", encoding="utf-8") if args.out else None
+    failed = 0
+    for pages, checks, hist, mix in itertools.product(grid["pages"], grid["checks"], grid["history"], grid["mix"]):
+        case = {
+            "pages": pages, "checks": checks, "history": hist, "mix": mix,
+            "want": args.want, "gofile_target": args.gofile_target, "per_page": args.per_page, "seen_pct": args.seen_pct,
+            "sheet_rows": args.sheet_rows, "sheet_fresh_pct": args.sheet_fresh_pct,
+            "sheet_latency": args.sheet_latency,
+            "listing_latency": args.listing_latency, "raw_limit": args.raw_limit,
+            "deadline": args.deadline, "verbose": args.verbose,
+        }
+        for rep in range(args.repeat):
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--case", json.dumps(case)],
+                capture_output=not args.verbose, text=True,
+            )
+            lines = [ln for ln in (proc.stdout or "").splitlines() if ln.startswith("RESULT ")]
+            if proc.returncode != 0 or not lines:
+                failed += 1
+                print(f"[warn] case failed: {case} (rc={proc.returncode})\n{(proc.stderr or '')[-2000:]}")
+                continue
+            m = json.loads(lines[-1][len("RESULT "):])
+            r429 = m["requests"]["api_429"] + m["requests"]["html_429"] + m["requests"].get("twimg_429", 0)
+            print(
+                f"{pages:>5} {checks:>6} {hist:>8} {mix:>8} | {m['wall_sec']:>6.2f}s {m['requests_total']:>5} "
+                f"{r429:>4} {m['peak_rss_kb'] / 1024:>7.1f} {m['selected']:>4} {m['urls_per_sec'] or 0:>6.2f}"
+            )
+            if out_f:
+                out_f.write(json.dumps(dict(meta, case=case, repeat=rep, metrics=m)) + "\n")
+                out_f.flush()
+    if out_f:
+        out_f.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
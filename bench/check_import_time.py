@@ -0,0 +1,133 @@
+# bench/check_import_time.py — 起動の重さ（import 時間）の予算チェック
+#
+# 1) python -X importtime -c "import bot_orevideo" の結果を読んで
+#    - bot_orevideo の import 全体（累積）が IMPORT_BUDGET_MS 以内か
+#    - 重いライブラリ（tweepy / playwright / gspread / google-auth / requests ...）を読み込んでいないか
+# 2) 「Daily limit reached」で終わる run（一時ディレクトリの state.json で再現）を回して
+#    - import から main() が返るまでが EARLY_EXIT_BUDGET_MS 以内か
+#    - その間にも重いライブラリを読み込んでいないか
+# を確かめる。どれかを超えたら終了コード 1（CI のステップにそのまま使える）。
+#
+# 使い方:
+#   python bench/check_import_time.py
+#   python bench/check_import_time.py --import-budget-ms 80 --early-exit-budget-ms 120 --repeat 5
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# 早く終わる run では読み込まれてはいけないモジュール（パッケージ名の先頭一致）
+HEAVY_MODULES = (
+    "tweepy", "playwright", "gspread", "google.auth", "google.oauth2",
+    "requests", "urllib3", "requests_oauthlib", "dateutil",
+)
+
+_EARLY_EXIT_SNIPPET = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import bot_orevideo
+bot_orevideo.main()
+elapsed = (time.perf_counter() - t0) * 1000
+heavy = sorted(m for m in sys.modules if any(m == h or m.startswith(h + ".") for h in HEAVY))
+print("RESULT " + json.dumps({"elapsed_ms": round(elapsed, 1), "heavy": heavy}))
+"""
+
+
+def _is_heavy(name: str) -> bool:
+    return any(name == h or name.startswith(h + ".") for h in HEAVY_MODULES)
+
+
+def _env() -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    # 計測の書き出しやキャッシュファイルで一時ディレクトリを汚さないように
+    env.update(RUN_REPORT_FILE="", RUN_HISTORY_FILE="", RUN_REPORT_STEP_SUMMARY="0", REPLAY_MODE="")
+    env.pop("GITHUB_STEP_SUMMARY", None)
+    return env
+
+
+def measure_import(cwd: str):
+    """(bot_orevideo の累積 import 時間 ms, [(累積 ms, モジュール名)], 重いモジュール一覧)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import bot_orevideo"],
+        cwd=cwd, env=_env(), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = [x.strip() for x in line[len("import time:"):].split("|")]
+        if len(parts) != 3:
+            continue
+        rows.append((int(parts[1]) / 1000, parts[2]))
+    total = next((ms for ms, name in rows if name == "bot_orevideo"), None)
+    heavy = sorted({name for _, name in rows if _is_heavy(name)})
+    return total, rows, heavy
+
+
+def measure_early_exit(cwd: str):
+    """posts_today が上限の state.json を置いて main() を回す（Daily limit reached で終わる）"""
+    today = datetime.now(timezone(timedelta(hours=9))).date().isoformat()
+    with open(os.path.join(cwd, "state.json"), "w", encoding="utf-8") as f:
+        json.dump({"last_post_date": today, "posts_today": 10**6, "recent_urls_24h": [], "line_seq": 1}, f)
+    snippet = f"HEAVY = {HEAVY_MODULES!r}\n" + _EARLY_EXIT_SNIPPET
+    proc = subprocess.run([sys.executable, "-c", snippet], cwd=cwd, env=_env(), capture_output=True, text=True)
+    lines = [ln for ln in proc.stdout.splitlines() if ln.startswith("RESULT ")]
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"early-exit run failed:\n{proc.stdout[-1000:]}\n{proc.stderr[-2000:]}")
+    if "Daily limit reached" not in proc.stdout:
+        raise RuntimeError(f"early-exit run did not stop at the daily limit:\n{proc.stdout[-1000:]}")
+    return json.loads(lines[-1][len("RESULT "):])
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="import-time budget check for bot_orevideo")
+    ap.add_argument("--import-budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "100")))
+    ap.add_argument("--early-exit-budget-ms", type=float, default=float(os.getenv("EARLY_EXIT_BUDGET_MS", "150")))
+    ap.add_argument("--repeat", type=int, default=3, help="何回測って一番速い値を使うか")
+    ap.add_argument("--top", type=int, default=10, help="重い順に何件表示するか")
+    args = ap.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="import_check_") as cwd:
+        best = None
+        for _ in range(max(1, args.repeat)):
+            total, rows, heavy = measure_import(cwd)
+            if best is None or (total or 0) < (best[0] or 0):
+                best = (total, rows, heavy)
+        total, rows, heavy = best
+        print(f"import bot_orevideo: {total:.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+        for ms, name in sorted(rows, reverse=True)[: args.top]:
+            print(f"  {ms:8.1f} ms  {name}")
+        if total is None or total > args.import_budget_ms:
+            failures.append(f"import took {total} ms > {args.import_budget_ms} ms")
+        if heavy:
+            failures.append(f"heavy modules imported at module load: {', '.join(heavy)}")
+
+        runs = [measure_early_exit(cwd) for _ in range(max(1, args.repeat))]
+        early = min(runs, key=lambda r: r["elapsed_ms"])
+        print(
+            f"daily-limit run (import + main): {early['elapsed_ms']:.1f} ms "
+            f"(budget {args.early_exit_budget_ms:.0f} ms)"
+        )
+        if early["elapsed_ms"] > args.early_exit_budget_ms:
+            failures.append(f"daily-limit run took {early['elapsed_ms']} ms > {args.early_exit_budget_ms} ms")
+        if early["heavy"]:
+            failures.append(f"heavy modules imported on the daily-limit path: {', '.join(early['heavy'])}")
+
+    for msg in failures:
+        print(f"[FAIL] {msg}")
+    if not failures:
+        print("[OK] within budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,23 @@
 # bot_orevideo.py — orevideo 用（ロジックは元の bot.py と同じ、goxplorer2 を使うだけ）
+#
+# 起動を軽くするため、重いライブラリ（tweepy / playwright / requests_oauthlib、goxplorer2 側の
+# gspread / google-auth / requests）は使う処理の中で初めて import する。
+# 「Daily limit reached」などで早く終わる run はそれらを読み込まずに終わる
+# （bench/check_import_time.py で確認できる）。
 
-import json, os, re, time, random
+import json, os, re, sys, time, random, signal, threading, traceback
 from datetime import datetime, timezone, timedelta
-from dateutil import tz
-from typing import List
-import tweepy
-from playwright.sync_api import sync_playwright
+from typing import List, Optional, Set
 
-from goxplorer2 import collect_fresh_gofile_urls, mark_sheet_posted  # ← ここだけ増やした
+from goxplorer2 import (  # ← ここだけ増やした
+    collect_fresh_gofile_urls, mark_sheet_posted, canonical_url_key, RunBudget, take_ready_urls,
+    keep_browser_open, close_browser_pool, reset_sheet_session, set_dry_run, forget_sheet_rows,
+)
+from posted_history import PostedHistory, SeenSet
 
-import requests
-try:
-    from requests_oauthlib import OAuth1
-except ImportError:
-    OAuth1 = None
+from http_session import http_post, close_session
+import replay
+import run_report
 
 # =========================
 #   Amazon アフィリエイトリンク
@@ -34,8 +38,10 @@ _SERIF_SOURCE = """
 SERIF_LIST: List[str] = [s.strip() for s in _SERIF_SOURCE.split(",") if s.strip()]
 
 STATE_FILE = "state.json"
+# 投稿済み URL の履歴（state.json の posted_urls から移行。追記専用ログ＋索引）
+HISTORY_LOG_FILE = os.getenv("HISTORY_LOG_FILE", "posted_urls.log")
 DAILY_LIMIT = 16
-JST = tz.gettz("Asia/Tokyo")
+JST = timezone(timedelta(hours=9), "JST")  # 日本は夏時間なし（dateutil の tz.gettz と同じ結果）
 TWEET_LIMIT = 280
 TCO_URL_LEN = 23
 GOFILE_RE = re.compile(r"https?://gofile\.io/d/[A-Za-z0-9]+", re.I)
@@ -54,6 +60,9 @@ WANT_POST = _env_int("WANT_POST", 5)
 MIN_POST  = _env_int("MIN_POST", 3)
 HARD_LIMIT_SEC = _env_int("HARD_LIMIT_SEC", 600)
 USE_API_TIMELINE = _env_int("USE_API_TIMELINE", 0)
+# 1 なら URL 集めと本文作成までやって、投稿・state 更新はしない（REPLAY_MODE=replay は常にこれ）
+# スプシーへの書き込みと、キャッシュ類（生存確認 / sheet_index / ページ / crawl_stats / キュー）の保存もしない
+DRY_RUN = _env_int("DRY_RUN", 0) == 1 or replay.replaying()
 
 def _default_state():
     return {
@@ -64,22 +73,46 @@ def _default_state():
         "line_seq": 1,
     }
 
-def load_state():
-    if not os.path.exists(STATE_FILE):
-        return _default_state()
-    try:
-        with open(STATE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
-        data = _default_state()
+def _open_history(read_only=False):
+    # 履歴は URL そのものではなく canonical_url_key（gofile なら "gf:<id>"）で持つ
+    return PostedHistory(HISTORY_LOG_FILE, key_func=canonical_url_key, read_only=read_only)
+
+def load_state(read_only=None):
+    """
+    state.json を読む。state["posted_urls"] は PostedHistory（ファイル上の履歴）になる。
+    state.json に旧形式の posted_urls（リスト）が残っていれば、履歴ログへ 1 回だけ移す。
+    read_only（省略時は DRY_RUN）なら履歴のファイル（log / 索引 / Bloom filter）は一切書かず、移行もメモリ上だけ。
+    """
+    if read_only is None:
+        read_only = DRY_RUN
+    data = _default_state()
+    if os.path.exists(STATE_FILE):
+        try:
+            with open(STATE_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            data = _default_state()
     for k, v in _default_state().items():
         if k not in data:
             data[k] = v
+
+    history = _open_history(read_only=read_only)
+    legacy = data.get("posted_urls")
+    if isinstance(legacy, list) and legacy:
+        added = history.extend(legacy)
+        history.flush()
+        print(f"[info] migrated posted_urls to {HISTORY_LOG_FILE}: {added}/{len(legacy)} new")
+    data["posted_urls"] = history
     return data
 
 def save_state(state):
+    """履歴は追記分だけ log に書き、state.json には履歴以外（小さい部分）だけ書く"""
+    history = state.get("posted_urls")
+    if isinstance(history, PostedHistory):
+        history.flush()
+    data = {k: v for k, v in state.items() if k != "posted_urls"}
     with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False, indent=2)
+        json.dump(data, f, ensure_ascii=False, indent=2)
 
 def reset_if_new_day(state, now_jst):
     today = now_jst.date().isoformat()
@@ -107,12 +140,12 @@ def normalize_url(u):
     return u.rstrip("/")
 
 def build_seen_set_from_state(state):
-    seen = set()
-    for u in state.get("posted_urls", []):
-        seen.add(normalize_url(u))
-    for it in state.get("recent_urls_24h", []):
-        seen.add(normalize_url(it.get("url")))
-    return seen
+    """履歴（ファイル上の索引で引く）＋ 直近 24h 分。全件を set に展開はしない"""
+    recent = [it.get("url") for it in state.get("recent_urls_24h", [])]
+    history = state.get("posted_urls")
+    if not isinstance(history, PostedHistory):
+        history = {canonical_url_key(u) for u in (history or []) if u}
+    return SeenSet(history, recent, key_func=canonical_url_key)
 
 def estimate_tweet_len_tco(text: str) -> int:
     def repl(m): return "U" * TCO_URL_LEN
@@ -195,19 +228,29 @@ def compose_fixed5_text(
 
 # ▲▲ ここまで compose_fixed5_text ▲▲
 
+_CLIENT = None
+
 def get_client():
-    return tweepy.Client(
-        bearer_token=None,
-        consumer_key=os.environ["X_API_KEY"],
-        consumer_secret=os.environ["X_API_SECRET"],
-        access_token=os.environ["X_ACCESS_TOKEN"],
-        access_token_secret=os.environ["X_ACCESS_TOKEN_SECRET"],
-        wait_on_rate_limit=bool(_env_int("WAIT_ON_RATE_LIMIT", 0)),
-    )
+    # プロセス内で 1 つだけ作って使い回す（デーモンモードで run ごとに作り直さない）
+    global _CLIENT
+    if _CLIENT is None:
+        import tweepy
+
+        _CLIENT = tweepy.Client(
+            bearer_token=None,
+            consumer_key=os.environ["X_API_KEY"],
+            consumer_secret=os.environ["X_API_SECRET"],
+            access_token=os.environ["X_ACCESS_TOKEN"],
+            access_token_secret=os.environ["X_ACCESS_TOKEN_SECRET"],
+            wait_on_rate_limit=bool(_env_int("WAIT_ON_RATE_LIMIT", 0)),
+        )
+    return _CLIENT
 
 def fetch_recent_urls_via_web(username: str, scrolls: int = 1, wait_ms: int = 800) -> set:
     if not username:
         return set()
+    from playwright.sync_api import sync_playwright
+
     url = f"https://x.com/{username}"
     seen = set()
     with sync_playwright() as p:
@@ -238,7 +281,9 @@ def post_to_x_v2(client, text: str, quote_tweet_id: str | None = None):
     return client.create_tweet(text=text)
 
 def _oauth1_session():
-    if OAuth1 is None:
+    try:
+        from requests_oauthlib import OAuth1
+    except ImportError:
         raise RuntimeError("requests-oauthlib が必要です。requirements.txt に 'requests-oauthlib==1.3.1' を追加してください。")
     return OAuth1(
         os.environ["X_API_KEY"],
@@ -254,7 +299,9 @@ def post_to_community_via_undocumented_api(status_text: str, community_id: str):
     payload = {"text": status_text, "community_id": str(community_id)}
     sess = _oauth1_session()
     headers = {"Content-Type": "application/json"}
-    r = requests.post(url, headers=headers, data=json.dumps(payload), auth=sess, timeout=30)
+    # 投稿はやり直せない（サーバーが受け付けたあとに切ると次の run で二重投稿になる）ので、
+    # run の締切では縮めずに固定の timeout で待つ
+    r = http_post(url, headers=headers, data=json.dumps(payload), auth=sess, timeout=30)
     try:
         body = r.json()
     except Exception:
@@ -263,17 +310,33 @@ def post_to_community_via_undocumented_api(status_text: str, community_id: str):
         raise RuntimeError(f"community post failed {r.status_code}: {body}")
     return body
 
-def main():
+def main(state=None):
+    """
+    1 回分の run。state を渡せば、読み込み済みのもの（履歴ストアごと）をそのまま使う
+    （デーモンモードで run をまたいで使い回す。書き出すのは投稿したときだけ）。
+    """
+    if state is None:
+        # 記録 / 再生モードなら、状態ファイルを読む前に準備する
+        replay.setup()
+    set_dry_run(DRY_RUN)
+    # 前の run（デーモンモード）で読んだスプシーの行番号は使わない
+    forget_sheet_rows()
+
     start_ts = time.monotonic()
+    # HARD_LIMIT_SEC を sheet / crawl / strict / fill / post に配分（余った時間は後ろへ回る）
+    budget = RunBudget(HARD_LIMIT_SEC, start_ts=start_ts)
     now_utc = datetime.now(timezone.utc)
     now_jst = now_utc.astimezone(JST)
 
-    state = load_state()
+    if state is None:
+        with run_report.span("state.load"):
+            state = load_state()
     purge_recent_12h(state, now_utc)
     reset_if_new_day(state, now_jst)
 
     if state.get("posts_today", 0) >= DAILY_LIMIT:
         print("Daily limit reached; skip.")
+        run_report.note("outcome", "daily_limit")
         return
 
     already_seen = build_seen_set_from_state(state)
@@ -295,6 +358,7 @@ def main():
 
     if (time.monotonic() - start_ts) > HARD_LIMIT_SEC:
         print("[warn] time budget exceeded before collection; abort.")
+        run_report.note("outcome", "timeout_before_collect")
         return
 
     try:
@@ -303,55 +367,87 @@ def main():
     except Exception:
         deadline_sec = None
 
-    urls = collect_fresh_gofile_urls(
-        already_seen=already_seen,
-        want=WANT_POST,
-        num_pages=int(os.getenv("NUM_PAGES", "50")),
-        deadline_sec=deadline_sec,
-    )
+    # prefetch_orevideo.py が貯めた投稿待ちキューから取れれば、巡回・シート読み込みは省く
+    with run_report.span("ready_queue"):
+        # 確認し直しはシート読み込みの持ち時間で（そろわなければ残りの時間で collect する）
+        urls = take_ready_urls(already_seen, want=WANT_POST, deadline_ts=budget.deadline("sheet"))
+    if urls:
+        run_report.note("source", "ready_queue")
+        budget.finish("sheet", "crawl", "strict", "fill")
+    else:
+        run_report.note("source", "collect")
+        with run_report.span("collect"):
+            urls = collect_fresh_gofile_urls(
+                already_seen=already_seen,
+                want=WANT_POST,
+                num_pages=int(os.getenv("NUM_PAGES", "50")),
+                deadline_sec=deadline_sec,
+                budget=budget,
+            )
     print(f"[info] collected alive urls: {len(urls)}")
+    run_report.note("urls", len(urls))
     if len(urls) < MIN_POST:
         print("Not enough alive URLs; skip.")
+        run_report.note("outcome", "not_enough_urls")
         return
 
     start_seq = int(state.get("line_seq", 1))
     salt = (now_jst.hour + now_jst.minute) % len(INVISIBLES)
-    status_text, taken = compose_fixed5_text(
-        urls,
-        start_seq=start_seq,
-        salt_idx=salt,
-        add_sig=True,
-    )
+    with run_report.span("compose"):
+        status_text, taken = compose_fixed5_text(
+            urls,
+            start_seq=start_seq,
+            salt_idx=salt,
+            add_sig=True,
+        )
 
-    if estimate_tweet_len_tco(status_text) > TWEET_LIMIT:
-        status_text = status_text.replace(". https://", ".https://")
-    while estimate_tweet_len_tco(status_text) > TWEET_LIMIT:
-        status_text = status_text.rstrip(ZWSP + ZWNJ)
+        if estimate_tweet_len_tco(status_text) > TWEET_LIMIT:
+            status_text = status_text.replace(". https://", ".https://")
+        while estimate_tweet_len_tco(status_text) > TWEET_LIMIT:
+            status_text = status_text.rstrip(ZWSP + ZWNJ)
+
+    if DRY_RUN:
+        print(f"[info] dry run; not posting ({len(urls)} urls):", status_text)
+        run_report.note("outcome", "dry_run")
+        return
+
+    # 持ち時間は「投稿を始めるか」だけに使う（始めた投稿は締切で打ち切らない）
+    if (time.monotonic() - start_ts) > HARD_LIMIT_SEC:
+        print("[warn] time budget exceeded before posting; skip.")
+        run_report.note("outcome", "timeout_before_post")
+        return
 
     community_id = os.getenv("X_COMMUNITY_ID", "").strip()
     client = get_client()
 
     if community_id:
         # 1) コミュニティに投稿
-        resp_comm = post_to_community_via_undocumented_api(status_text, community_id)
+        with run_report.span("post.community"):
+            resp_comm = post_to_community_via_undocumented_api(status_text, community_id)
         comm_id = resp_comm.get("data", {}).get("id") if isinstance(resp_comm, dict) else None
         print(f"[info] community posted id={comm_id}")
 
         # 2) 自分のTLにも引用ポスト（IDが取れなかったら通常ポスト）
         if comm_id:
-            resp = post_to_x_v2(client, status_text, quote_tweet_id=comm_id)
+            with run_report.span("post"):
+                resp = post_to_x_v2(client, status_text, quote_tweet_id=comm_id)
             tweet_id = resp.data.get("id") if resp and resp.data else None
             print(f"[info] tweeted id={tweet_id} (quote community)")
         else:
-            resp = post_to_x_v2(client, status_text)
+            with run_report.span("post"):
+                resp = post_to_x_v2(client, status_text)
             tweet_id = resp.data.get("id") if resp and resp.data else None
             print(f"[info] tweeted id={tweet_id} (fallback normal)")
     else:
         # 通常ポストのみ
-        resp = post_to_x_v2(client, status_text)
+        with run_report.span("post"):
+            resp = post_to_x_v2(client, status_text)
         tweet_id = resp.data.get("id") if resp and resp.data else None
         print(f"[info] tweeted id={tweet_id}")
 
+    run_report.note("outcome", "posted")
+    run_report.note("tweet_id", tweet_id)
+
     # ---- ここから下は既存ロジックどおり ----
 
     for u in urls[:WANT_POST]:
@@ -366,7 +462,8 @@ def main():
     # （sheet に存在しない URL は無視される）
     try:
         if tweet_id:
-            mark_sheet_posted(urls[:WANT_POST])
+            with run_report.span("sheet.mark"):
+                mark_sheet_posted(urls[:WANT_POST])
     except Exception as e:
         print(f"[warn] mark_sheet_posted failed: {e}")
 
@@ -374,5 +471,142 @@ def main():
     used_aff  = max(0, used_urls - 1)
     print(f"Posted ({used_urls} urls + {used_aff} amazon):", status_text)
 
+# =========================
+#   デーモンモード（1 プロセスで schedule どおりに main() を回す）
+# =========================
+
+# hourly_orevideo.yml の cron と同じ時刻（UTC）。cron 式を ";" で区切って並べる
+DEFAULT_SCHEDULE = ";".join([
+    "0 21 * * *", "15 22 * * *", "30 23 * * *", "45 0 * * *",
+    "0 2 * * *", "15 3 * * *", "30 4 * * *", "45 5 * * *",
+    "0 7 * * *", "15 8 * * *", "30 9 * * *", "45 10 * * *",
+    "0 12 * * *", "15 13 * * *", "30 14 * * *", "45 16 * * *",
+])
+BOT_SCHEDULE = os.getenv("BOT_SCHEDULE", DEFAULT_SCHEDULE)
+# 0 より大きければ BOT_SCHEDULE ではなく、この秒数ごとに回す（起動直後に 1 回目）
+BOT_INTERVAL_SEC = _env_int("BOT_INTERVAL_SEC", 0)
+
+def _cron_field(spec: str, lo: int, hi: int) -> Set[int]:
+    """cron の 1 フィールド（* / 数字 / a-b / ,区切り / /n）を値の集合にする"""
+    out: Set[int] = set()
+    for part in spec.split(","):
+        rng, _, step = part.partition("/")
+        if rng == "*":
+            a, b = lo, hi
+        elif "-" in rng:
+            a, b = (int(x) for x in rng.split("-", 1))
+        else:
+            a = int(rng)
+            b = hi if step else a
+        out.update(range(a, b + 1, int(step) if step else 1))
+    return out
+
+def parse_schedule(expr: str) -> List[tuple]:
+    """"M H dom mon dow;M H dom mon dow;..." をパースする（時刻は UTC、dow は 0=日曜）"""
+    specs = []
+    for item in expr.split(";"):
+        fields = item.split()
+        if not fields:
+            continue
+        if len(fields) != 5:
+            raise ValueError(f"bad cron expression: {item!r}")
+        minute, hour, dom, mon, dow = fields
+        specs.append((
+            _cron_field(minute, 0, 59),
+            _cron_field(hour, 0, 23),
+            _cron_field(dom, 1, 31),
+            _cron_field(mon, 1, 12),
+            {d % 7 for d in _cron_field(dow, 0, 7)},
+            dom == "*",
+            dow == "*",
+        ))
+    if not specs:
+        raise ValueError("empty schedule")
+    return specs
+
+def next_fire(specs: List[tuple], after: datetime) -> datetime:
+    """after より後で schedule に合う最初の時刻（分単位）"""
+    t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    for _ in range(8 * 24 * 60):
+        cron_dow = (t.weekday() + 1) % 7
+        for minutes, hours, doms, months, dows, dom_any, dow_any in specs:
+            if t.minute not in minutes or t.hour not in hours or t.month not in months:
+                continue
+            # cron と同じく、日と曜日が両方指定されていればどちらかに合えばよい
+            dom_ok, dow_ok = t.day in doms, cron_dow in dows
+            if (dom_ok and dow_ok) if (dom_any or dow_any) else (dom_ok or dow_ok):
+                return t
+        t += timedelta(minutes=1)
+    raise ValueError("schedule never fires within 8 days")
+
+def run_daemon():
+    """
+    main() を schedule（BOT_SCHEDULE / BOT_INTERVAL_SEC）どおりに 1 プロセスで回し続ける。
+    run をまたいで使い回すもの:
+      - state（履歴ストア・直近 24h）… 起動時に 1 回だけ読み、投稿したときだけ書く
+      - HTTP セッション / スプシー接続 / X のクライアント / gofile のブラウザ
+      - 生存キャッシュ・orevideo のページキャッシュ（変わったときだけファイルに書く）
+    SIGTERM / SIGINT で、実行中の run が終わってから止まる。
+    """
+    replay.setup()
+    specs = None if BOT_INTERVAL_SEC > 0 else parse_schedule(BOT_SCHEDULE)
+    stop = threading.Event()
+
+    def _on_signal(signum, frame):
+        print(f"[info] daemon: signal {signum}; stop after the current run.")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, _on_signal)
+    signal.signal(signal.SIGINT, _on_signal)
+
+    keep_browser_open(True)
+    state = load_state()
+    print(
+        "[info] daemon: started "
+        + (f"(every {BOT_INTERVAL_SEC}s)" if specs is None else f"({len(specs)} cron entries, UTC)")
+    )
+
+    fire: Optional[datetime] = datetime.now(timezone.utc) if specs is None else None
+    try:
+        while not stop.is_set():
+            now = datetime.now(timezone.utc)
+            if specs is None:
+                # 前の run が長引いて間隔を過ぎていたら、遅れた分は飛ばしてすぐ回す
+                fire = max(fire, now)
+            else:
+                fire = next_fire(specs, now)
+                print(f"[info] daemon: next run at {fire.isoformat(timespec='minutes')}")
+            if stop.wait((fire - now).total_seconds()):
+                break
+
+            run_report.reset()
+            run_report.note("entry", "daemon")
+            # 前の run でスプシーにつながらなかったときだけ、つなぎ直す
+            reset_sheet_session(only_if_failed=True)
+            t0 = time.monotonic()
+            try:
+                main(state)
+            except Exception as e:
+                print(f"[warn] daemon: run failed: {e}")
+                traceback.print_exc()
+                run_report.note("outcome", "error")
+            finally:
+                run_report.write_report()
+            print(f"[info] daemon: run done in {time.monotonic() - t0:.1f}s")
+            if specs is None:
+                fire = fire + timedelta(seconds=BOT_INTERVAL_SEC)
+    finally:
+        keep_browser_open(False)
+        close_browser_pool()
+        close_session()
+        print("[info] daemon: stopped.")
+
 if __name__ == "__main__":
-    main()
+    if "--daemon" in sys.argv[1:] or _env_int("BOT_DAEMON", 0) == 1:
+        run_daemon()
+    else:
+        try:
+            main()
+        finally:
+            # 途中で落ちても、そこまでの計測は残す（run_report.jsonl / run_history.jsonl / Step Summary）
+            run_report.write_report()
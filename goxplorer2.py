@@ -16,25 +16,62 @@
 # ・gofile は必ず「生存確認」してから採用
 #   - シート側: HTTPだけの「ゆるめ判定」(JSなし) ＋ 最大 30 件までチェック
 #   - orevideo 側: HTTP + JS の「厳しめ判定」(MAX_GOFILE_CHECK 件まで)
+#   - HTML は chunk ごとに読み、「コンテンツ無し」の文言が見つかった時点か
+#     GOFILE_HTML_MAX_BYTES 読んだ時点で読むのをやめる（文言は 1 本の正規表現でまとめて探す）
+#   - 判定結果は gofile_liveness.json に TTL 付きで保存し、次の run でも使う
+#     （キャッシュで判定がついた URL はチェック件数に数えない）
+#
+# ・twimg も HEAD（だめなら Range: bytes=0-0）で生存確認してから採用（中身は落とさない）
+#   - 同じ動画の解像度違いは 1 本にまとめ、TWIMG_MAX_QUALITY 以下で一番大きいものから確認する
+#   - 判定は解像度ごとに twimg_liveness.json に TTL 付きで保存（TWIMG_MAX_CHECK 件まで・並列）
+#
+# ・orevideo の一覧ページは orevideo_pages.json にキャッシュ（ETag / Last-Modified / 本文ハッシュ）
+#   - 条件付き GET で 304 / 本文が前回と同じなら、リンク抽出せず前回の結果を使う
+#   - page N の先頭リンクが前回 run の page M の先頭と同じなら、N+1 以降は前回の M+1 以降を
+#     そのまま使う（それ以上は取りに行かない）
 #
 # ・state.json（already_seen）＋このrun内で重複除外
+#   - 重複判定は canonical_url_key（gofile は ID、twimg はメディア ID）で行う
+#     → ?tag= や解像度違いの twimg、http/https 違いの gofile も同じ URL 扱い
 # ・スプシー:
 #   - B列: gofile URL（http でも可）
 #   - D列: リンク切れなら「リンク切れ」 ※Bと同じ行
 #   - E列: ツイート成功したら「post成功」 ※Bと同じ行（※呼び出しはまだしてない）
 #   - D/E に何か書いてある行は再チェックしない
 #   - 同じ URL が複数行にあっても、「一番下の行」から優先して使う
+#
+# ・投稿待ちキュー（ready_queue.json）:
+#   - prefetch_orevideo.py が別の run で上の 1〜3 を前もって集め、生存確認した時刻つきで貯めておく
+#   - 投稿 run は take_ready_urls でそこから取り、確認から時間がたったものだけ確認し直す
+#     （want 本そろわなければ従来どおり collect_fresh_gofile_urls で集める）
+#
+# ・計測: 各ステージ・ページ取得・シート読み込み・生存確認の所要時間と、キャッシュヒット /
+#   リンク切れ / 締切スキップの回数を run_report に記録（書き出しは bot 側が run の最後に行う）
 
 import os
 import re
 import time
 import json
-from typing import List, Set, Optional, Tuple
-
-import requests
-import gspread
-from google.oauth2.service_account import Credentials
-from playwright.sync_api import sync_playwright
+import hashlib
+import random
+import queue
+import threading
+from collections import OrderedDict, deque
+from contextlib import closing
+from concurrent.futures import Future, ThreadPoolExecutor, wait as _wait_futures
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Set, Optional, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+# gspread / google-auth / playwright は使うときに import する（起動を軽くするため）
+if TYPE_CHECKING:
+    import gspread
+
+import replay
+import run_report
+from http_session import http_get, http_post, http_request
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 # =========================
 #   基本設定
@@ -69,10 +106,41 @@ MAX_GOFILE_CHECK = int(os.getenv("MAX_GOFILE_CHECK", "15"))
 # スプシー側で gofile 生存確認を行う最大件数（★ここを 30 件まで）
 MAX_SHEET_GOFILE_CHECK = int(os.getenv("MAX_SHEET_GOFILE_CHECK", "30"))
 
+# gofile 生存確認のバックエンド
+#   - "api"  … gofile の JSON API で判定（判定できなければ HTML / JS にフォールバック）
+#   - "html" … 従来どおり HTML（＋厳しめ判定は JS）だけで判定
+GOFILE_CHECK_BACKEND = os.getenv("GOFILE_CHECK_BACKEND", "api").strip().lower()
+GOFILE_API_BASE = os.getenv("GOFILE_API_BASE", "https://api.gofile.io").rstrip("/")
+# gofile の Web 版が API に付けている website token（変わったら env で上書き）
+GOFILE_WEBSITE_TOKEN = os.getenv("GOFILE_WEBSITE_TOKEN", "4fd6sg89d7s6")
+
+# 厳しめ判定(JS)で同時に開くタブ数（ブラウザ本体は 1 run で 1 つだけ）
+GOFILE_BROWSER_TABS = max(1, int(os.getenv("GOFILE_BROWSER_TABS", "3")))
+
+# orevideo 巡回の並列数（1 なら従来どおり 1 ページずつ取得）
+OREVIDEO_CONCURRENCY = max(1, int(os.getenv("OREVIDEO_CONCURRENCY", "4")))
+
+# 同一ホストへのリクエスト開始間隔（秒）。並列時もこれ以上の間隔をあける
+OREVIDEO_MIN_INTERVAL_SEC = float(os.getenv("OREVIDEO_MIN_INTERVAL_SEC", "0.3"))
+
 # twimg / gofile 抽出用
 TWIMG_RE  = re.compile(r"https?://video\.twimg\.com/[^\s\"']+?\.mp4\?tag=\d+", re.I)
 GOFILE_RE = re.compile(r"https?://gofile\.io/d/[A-Za-z0-9]+", re.I)
 
+# ページ HTML 用: twimg / gofile を 1 回の走査で拾う（group 1 = twimg, group 2 = gofile）
+#   twimg のパスは「? / 空白 / クォートまで」を一気に読む（最短一致で 1 文字ずつ伸ばさない）
+_LINK_PATTERN = (
+    r"https?://(?:"
+    r"(video\.twimg\.com/[^\s\"'?]+\.mp4\?tag=\d+)"
+    r"|(gofile\.io/d/[A-Za-z0-9]+)"
+    r")"
+)
+LINK_RE = re.compile(_LINK_PATTERN, re.I)
+LINK_RE_BYTES = re.compile(_LINK_PATTERN.encode("ascii"), re.I)
+
+# 1 なら 1 ページごとに抽出件数を [debug] で出す
+EXTRACT_DEBUG = os.getenv("EXTRACT_DEBUG", "0") == "1"
+
 # =========================
 #   スプレッドシート設定
 # =========================
@@ -85,9 +153,6 @@ SHEET_CREDENTIALS_JSON_ENV = os.getenv("GOOGLE_SHEETS_CREDENTIALS_JSON")
 SPREADSHEET_ID = os.getenv("GOOGLE_SHEETS_ID")
 SHEET_NAME = os.getenv("GOOGLE_SHEETS_NAME", "シート1")
 
-# URL -> 行番号 の対応（同一 run 内で共有）
-_SHEET_URL_ROW: dict[str, int] = {}
-
 
 def _now() -> float:
     return time.monotonic()
@@ -97,6 +162,13 @@ def _deadline_passed(deadline_ts: Optional[float]) -> bool:
     return deadline_ts is not None and _now() >= deadline_ts
 
 
+def _call_timeout(default: float, deadline_ts: Optional[float]) -> float:
+    """1 回の通信のタイムアウト: default と締切までの残りの短い方（最低 1 秒）"""
+    if deadline_ts is None:
+        return default
+    return max(1.0, min(default, deadline_ts - _now()))
+
+
 def _normalize_url(u: str) -> str:
     if not u:
         return u
@@ -105,6 +177,35 @@ def _normalize_url(u: str) -> str:
     return u.rstrip("/")
 
 
+_TWIMG_MEDIA_RE = re.compile(r"^https://video\.twimg\.com/([A-Za-z_]+)/(\d+)/", re.I)
+_TWIMG_PATH_RE = re.compile(r"^https://video\.twimg\.com/([^?#]+)", re.I)
+_RESOLUTION_SEG_RE = re.compile(r"/\d+x\d+(?=/)")
+
+
+def canonical_url_key(u: str) -> str:
+    """
+    重複判定用の短いキー。同じ動画なら URL の表記ゆれがあっても同じキーになる。
+      - gofile: https://gofile.io/d/AbC123                        → "gf:AbC123"
+      - twimg : https://video.twimg.com/ext_tw_video/<media id>/pu/vid/avc1/1280x720/x.mp4?tag=12
+                                                                  → "tw:ext_tw_video/<media id>"
+                （?tag= や解像度違いは同じ動画として扱う）
+      - その他: _normalize_url した URL そのもの
+    キーをもう一度渡しても同じキーが返る（冪等）。
+    """
+    norm = _normalize_url(u)
+    if not norm:
+        return norm
+    if GOFILE_RE.match(norm):
+        return "gf:" + _gofile_content_id(norm)
+    m = _TWIMG_MEDIA_RE.match(norm)
+    if m:
+        return f"tw:{m.group(1).lower()}/{m.group(2)}"
+    m = _TWIMG_PATH_RE.match(norm)
+    if m:
+        return "tw:" + _RESOLUTION_SEG_RE.sub("", m.group(1))
+    return norm
+
+
 def _unique_preserve(seq: List[str]) -> List[str]:
     seen = set()
     out: List[str] = []
@@ -119,31 +220,735 @@ def _unique_preserve(seq: List[str]) -> List[str]:
     return out
 
 
+# =========================
+#   run の持ち時間（ステージごとの配分）
+# =========================
+
+RUN_STAGES = ("sheet", "crawl", "strict", "fill", "post")
+# ステージごとの持ち時間の重み（残り時間をまだ終わっていないステージで按分する）
+RUN_STAGE_WEIGHTS = {
+    "sheet": float(os.getenv("BUDGET_SHEET", "15")),
+    "crawl": float(os.getenv("BUDGET_CRAWL", "30")),
+    "strict": float(os.getenv("BUDGET_STRICT", "35")),
+    "fill": float(os.getenv("BUDGET_FILL", "5")),
+    "post": float(os.getenv("BUDGET_POST", "15")),
+}
+
+
+class RunBudget:
+    """
+    run 全体の締切を、ステージ（sheet → crawl → strict → fill → post）の持ち時間に分ける。
+      - deadline(stage) … そのステージの締切。「今の残り時間」を、まだ終わっていない
+        ステージの重みで按分して決める → 早く終わったステージの余りは後ろに回る
+      - crawl と strict は並行して走るので、strict の締切は crawl の分も含めた位置になる
+      - total_sec が None なら締切なし（deadline() は cap をそのまま返す）
+    """
+
+    def __init__(
+        self,
+        total_sec: Optional[float],
+        start_ts: Optional[float] = None,
+        stages: Iterable[str] = RUN_STAGES,
+    ):
+        start = _now() if start_ts is None else start_ts
+        self.start_ts = start
+        self.end_ts = None if total_sec is None else start + total_sec
+        self.stages = [st for st in stages if st in RUN_STAGE_WEIGHTS]
+        self._done: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def deadline(self, stage: str, cap: Optional[float] = None) -> Optional[float]:
+        with self._lock:
+            if self.end_ts is None:
+                return cap
+            now = _now()
+            todo = [st for st in self.stages if st not in self._done]
+            if stage not in todo:
+                ts = now
+            else:
+                total_w = sum(RUN_STAGE_WEIGHTS[st] for st in todo)
+                upto_w = sum(RUN_STAGE_WEIGHTS[st] for st in todo[: todo.index(stage) + 1])
+                left = max(0.0, self.end_ts - now)
+                ts = now + (left * upto_w / total_w if total_w > 0 else left)
+        return ts if cap is None else min(ts, cap)
+
+    def finish(self, *stages: str) -> None:
+        with self._lock:
+            self._done.update(stages)
+            left = None if self.end_ts is None else max(0.0, self.end_ts - _now())
+        if left is not None:
+            print(
+                f"[info] budget: {'+'.join(stages)} done at {_now() - self.start_ts:.1f}s; "
+                f"{left:.1f}s left"
+            )
+
+
 # =========================
 #   Google スプレッドシート
 # =========================
 
-def _get_sheet() -> Optional[gspread.Worksheet]:
+class _SheetSession:
     """
-    環境変数:
-      - GOOGLE_SHEETS_CREDENTIALS_JSON: サービスアカウント JSON の中身
-      - GOOGLE_SHEETS_ID: スプレッドシート ID
-      - GOOGLE_SHEETS_NAME: シート名（タブ名, デフォルト「シート1」）
+    1 run の間使い回すスプシー接続と、そのワークシートにひもづく状態。
+      - 認証情報・gspread クライアント・ワークシートは最初の 1 回だけ作る
+        （OAuth token は期限まで使い回し、切れたら Credentials が自動で更新する）
+      - HTTP 接続は AuthorizedSession 1 本を共有する
+      - url_row: URL のキー(canonical_url_key) -> 行番号
+      - reader : 差分読み（_SheetRowReader）
+      - writes : D/E 列への書き込みバッファ
+      - saved_index : 最後に sheet_index.json に書いた中身（変わっていなければ書かない）
     """
+
+    def __init__(self, ws, sheet_key: str):
+        self.ws = ws
+        self.sheet_key = sheet_key
+        self.url_row: dict[str, int] = {}
+        self.reader: Optional["_SheetRowReader"] = None
+        self.writes = _SheetWriteBuffer()
+        self.saved_index: Optional[str] = None
+
+
+_SHEET_SESSION: Optional[_SheetSession] = None
+_SHEET_SESSION_OPENED = False
+_SHEET_SESSION_LOCK = threading.Lock()
+
+
+def _open_sheet_session() -> Optional[_SheetSession]:
+    if replay.replaying():
+        if not replay.has_sheet():
+            return None
+        return _SheetSession(replay.ReplayWorksheet(), replay.replay_sheet_key() or "replay")
     if not (SHEET_CREDENTIALS_JSON_ENV and SPREADSHEET_ID):
         return None
     try:
+        import gspread
+        from google.auth.transport.requests import AuthorizedSession
+        from google.oauth2.service_account import Credentials
+
         info = json.loads(SHEET_CREDENTIALS_JSON_ENV)
         creds = Credentials.from_service_account_info(info, scopes=SHEET_SCOPES)
-        client = gspread.authorize(creds)
+        client = gspread.Client(auth=creds, session=AuthorizedSession(creds))
         sh = client.open_by_key(SPREADSHEET_ID)
         ws = sh.worksheet(SHEET_NAME)
-        return ws
+        sheet_key = f"{SPREADSHEET_ID}/{SHEET_NAME}"
+        if replay.recording():
+            ws = replay.RecordingWorksheet(ws, sheet_key)
+        return _SheetSession(ws, sheet_key)
     except Exception as e:
         print(f"[warn] failed to init Google Sheet: {e}")
         return None
 
 
+def _get_sheet_session() -> Optional[_SheetSession]:
+    """スプシー接続を返す（最初の呼び出しでだけ作る。失敗もこの run の間は覚えておく）"""
+    global _SHEET_SESSION, _SHEET_SESSION_OPENED
+    with _SHEET_SESSION_LOCK:
+        if not _SHEET_SESSION_OPENED:
+            _SHEET_SESSION_OPENED = True
+            _SHEET_SESSION = _open_sheet_session()
+        return _SHEET_SESSION
+
+
+def reset_sheet_session(only_if_failed: bool = False) -> None:
+    """次の _get_sheet_session() で接続し直させる（only_if_failed なら、接続に失敗していたときだけ）"""
+    global _SHEET_SESSION, _SHEET_SESSION_OPENED
+    with _SHEET_SESSION_LOCK:
+        if only_if_failed and _SHEET_SESSION is not None:
+            return
+        _SHEET_SESSION = None
+        _SHEET_SESSION_OPENED = False
+
+
+def forget_sheet_rows() -> None:
+    """
+    前の run で控えた行番号（url_row と投稿待ちキュー由来の行）と差分読みの reader を忘れる。run の最初に呼ぶ。
+    デーモンモードでスプシー接続を run をまたいで使い回すとき、その間に行が挿入・削除されていても
+    古い行番号の E列に書き込まないように（行番号はその run で B列を読んで確かめたものだけ使う）。
+    reader も捨てるので、シートを読まなかった run（投稿待ちキューから投稿）は sheet_index.json を書かない。
+    """
+    with _SHEET_SESSION_LOCK:
+        session = _SHEET_SESSION
+    if session is not None:
+        session.url_row = {}
+        session.reader = None
+    _READY_SHEET_ROWS.clear()
+
+
+def _get_sheet() -> Optional["gspread.Worksheet"]:
+    session = _get_sheet_session()
+    return session.ws if session is not None else None
+
+
+# =========================
+#   dry run（書き込みを止める）
+# =========================
+
+_DRY_RUN = False
+
+
+def set_dry_run(dry_run: bool = True) -> None:
+    """
+    True にすると、スプシーへの書き込み（D/E 列）と状態ファイル（生存キャッシュ / sheet_index /
+    ページキャッシュ / crawl_stats / 投稿待ちキュー）の保存をやめる（読むのは今までどおり）。
+    bot_orevideo.py が DRY_RUN=1（REPLAY_MODE=replay を含む）のときに呼ぶ。
+    """
+    global _DRY_RUN
+    _DRY_RUN = bool(dry_run)
+
+
+# =========================
+#   スプシー書き込みバッファ
+# =========================
+
+# 429 などで batch_update が失敗したときのリトライ回数
+SHEET_WRITE_RETRIES = int(os.getenv("SHEET_WRITE_RETRIES", "5"))
+
+
+def _api_error_status(e: Exception) -> Optional[int]:
+    resp = getattr(e, "response", None)
+    return getattr(resp, "status_code", None) or getattr(e, "code", None)
+
+
+class _SheetWriteBuffer:
+    """
+    D列(リンク切れ) / E列(post成功) への書き込みを run 中ためておき、
+    flush() で 1 回の batch_update にまとめて書く（セル 1 つ = API 1 回 をやめる）。
+    429 / 5xx のときは指数バックオフ（ジッター付き）でリトライする。
+    """
+
+    def __init__(self):
+        self._cells: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, cell: str, value: str) -> None:
+        with self._lock:
+            self._cells[cell] = value
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def flush(self, ws) -> None:
+        with self._lock:
+            if not self._cells:
+                return
+            cells = list(self._cells.items())
+            self._cells.clear()
+
+        if _DRY_RUN:
+            shown = ", ".join(f"{cell}={value}" for cell, value in cells[:10])
+            more = f" (+{len(cells) - 10})" if len(cells) > 10 else ""
+            print(f"[info] dry run; not writing {len(cells)} sheet cells: {shown}{more}")
+            return
+
+        data = [{"range": cell, "values": [[value]]} for cell, value in cells]
+        for attempt in range(SHEET_WRITE_RETRIES + 1):
+            try:
+                ws.batch_update(data)
+                print(f"[info] sheet batch update: {len(data)} cells")
+                return
+            except Exception as e:
+                status = _api_error_status(e)
+                retryable = status == 429 or (status is not None and status >= 500)
+                if not retryable or attempt >= SHEET_WRITE_RETRIES:
+                    print(f"[warn] failed to batch update sheet ({len(data)} cells): {e}")
+                    return
+                wait = min(60.0, 2 ** attempt) + random.uniform(0, 1)
+                retry_after = getattr(getattr(e, "response", None), "headers", {}).get("Retry-After")
+                if retry_after and str(retry_after).isdigit():
+                    wait = max(wait, float(retry_after))
+                print(f"[info] sheet batch update status {status}; retry in {wait:.1f}s")
+                time.sleep(wait)
+
+
+
+# =========================
+#   共有ブラウザ（厳しめ判定の JS レンダリング用）
+# =========================
+
+class _GofileBrowserPool:
+    """
+    厳しめ判定用の Chromium を 1 run で 1 つだけ起動して使い回す。
+
+    Playwright(sync API) はスレッドをまたいで使えないので、専用スレッドが
+    ブラウザ・コンテキスト・タブを持ち、キューで受け取った URL を
+    最大 tabs 枚のタブで同時にレンダリングする。
+    呼び出し側は render() で Future を受け取り、HTML（失敗時は None）を待つ。
+    """
+
+    def __init__(self, tabs: int):
+        self.tabs = max(1, tabs)
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def render(
+        self,
+        url: str,
+        timeout: int = 15,
+        deadline_ts: Optional[float] = None,
+    ) -> "Future[Optional[str]]":
+        fut: "Future[Optional[str]]" = Future()
+        with self._lock:
+            if self._closed:
+                fut.set_result(None)
+                return fut
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="gofile-browser", daemon=True
+                )
+                self._thread.start()
+            self._jobs.put((url, timeout, deadline_ts, fut))
+        if replay.recording():
+            replay.watch_render(url, fut)
+        return fut
+
+    def close(self, wait_sec: float = 10.0) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._jobs.put(None)
+            thread = self._thread
+        if thread is not None:
+            thread.join(wait_sec)
+        self._drain()
+
+    def _drain(self) -> None:
+        """処理されなかった依頼は None で返しておく（呼び出し側を待たせない）"""
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if job is not None and not job[3].done():
+                job[3].set_result(None)
+
+    def _next_batch(self) -> Tuple[List[tuple], bool]:
+        """1 件目は待つ。残りは少しだけ待って tabs 件までまとめる。"""
+        batch: List[tuple] = []
+        job = self._jobs.get()
+        if job is None:
+            return batch, True
+        batch.append(job)
+        while len(batch) < self.tabs:
+            try:
+                job = self._jobs.get(timeout=0.05)
+            except queue.Empty:
+                break
+            if job is None:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _run(self) -> None:
+        try:
+            from playwright.sync_api import sync_playwright
+
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=True, args=["--no-sandbox"])
+                context = browser.new_context(user_agent=HEADERS["User-Agent"], locale="ja-JP")
+                pages: list = []
+                try:
+                    closing = False
+                    while not closing:
+                        batch, closing = self._next_batch()
+                        if batch:
+                            self._render_batch(context, pages, batch)
+                finally:
+                    context.close()
+                    browser.close()
+        except Exception as e:
+            # 起動に失敗しても致命的にはしない（待っている依頼は None = 判定不能で返す）
+            print(f"[warn] gofile browser pool failed: {e}")
+        finally:
+            with self._lock:
+                self._closed = True
+            self._drain()
+
+    def _render_batch(self, context, pages: list, batch: List[tuple]) -> None:
+        # まず全タブでナビゲーションを開始して、読み込みを並行させる
+        started = []
+        for i, (url, timeout, deadline_ts, fut) in enumerate(batch):
+            if _deadline_passed(deadline_ts):
+                print(f"[info] skip gofile JS check due to deadline: {url}")
+                run_report.count("deadline_skip")
+                fut.set_result(None)
+                continue
+            try:
+                if i >= len(pages):
+                    pages.append(context.new_page())
+                page = pages[i]
+                page.goto(url, timeout=_call_timeout(timeout, deadline_ts) * 1000, wait_until="commit")
+                started.append((page, url, timeout, deadline_ts, fut))
+            except Exception as e:
+                print(f"[warn] gofile(playwright) failed: {url} ({e})")
+                fut.set_result(None)
+
+        loaded = []
+        for page, url, timeout, deadline_ts, fut in started:
+            try:
+                page.wait_for_load_state("networkidle", timeout=_call_timeout(timeout, deadline_ts) * 1000)
+                loaded.append((page, url, fut))
+            except Exception as e:
+                print(f"[warn] gofile(playwright) failed: {url} ({e})")
+                fut.set_result(None)
+
+        if not loaded:
+            return
+        loaded[0][0].wait_for_timeout(1200)  # 1.2秒だけ余分に待つ（バッチで 1 回）
+        for page, url, fut in loaded:
+            try:
+                fut.set_result(page.content())
+            except Exception as e:
+                print(f"[warn] gofile(playwright) failed: {url} ({e})")
+                fut.set_result(None)
+
+
+_BROWSER_POOL: Optional[_GofileBrowserPool] = None
+_BROWSER_POOL_LOCK = threading.Lock()
+# True なら gofile 選別が終わってもブラウザを閉じない（デーモンモードで run をまたいで使い回す）
+_BROWSER_KEEP_OPEN = False
+
+
+def _get_browser_pool() -> _GofileBrowserPool:
+    """最初の厳しめ判定で初めてブラウザを用意する（遅延起動）"""
+    global _BROWSER_POOL
+    with _BROWSER_POOL_LOCK:
+        # 使い回している間にブラウザが落ちていたら作り直す
+        if isinstance(_BROWSER_POOL, _GofileBrowserPool) and _BROWSER_POOL._closed:
+            _BROWSER_POOL = None
+        if _BROWSER_POOL is None:
+            if replay.replaying():
+                _BROWSER_POOL = replay.ReplayBrowserPool()
+            else:
+                _BROWSER_POOL = _GofileBrowserPool(GOFILE_BROWSER_TABS)
+        return _BROWSER_POOL
+
+
+def keep_browser_open(keep: bool = True) -> None:
+    """keep=True の間は _close_browser_pool() でブラウザを閉じない（close_browser_pool() で閉じる）"""
+    global _BROWSER_KEEP_OPEN
+    _BROWSER_KEEP_OPEN = keep
+
+
+def close_browser_pool() -> None:
+    """keep_browser_open() の指定にかかわらずブラウザを閉じる"""
+    _close_browser_pool(force=True)
+
+
+def _close_browser_pool(force: bool = False) -> None:
+    global _BROWSER_POOL
+    if _BROWSER_KEEP_OPEN and not force:
+        return
+    with _BROWSER_POOL_LOCK:
+        pool, _BROWSER_POOL = _BROWSER_POOL, None
+    if pool is not None:
+        pool.close()
+
+
+# =========================
+#   gofile 判定（JSON API）
+# =========================
+
+# ゲストアカウントの token（1 run で 1 回だけ取得して使い回す。env で固定も可）
+_GOFILE_API_TOKEN: Optional[str] = os.getenv("GOFILE_API_TOKEN") or None
+_GOFILE_API_TOKEN_LOCK = threading.Lock()
+
+_GOFILE_ID_RE = re.compile(r"gofile\.io/d/([A-Za-z0-9]+)", re.I)
+
+
+def _gofile_content_id(url: str) -> Optional[str]:
+    m = _GOFILE_ID_RE.search(url or "")
+    return m.group(1) if m else None
+
+
+def _gofile_api_token(
+    timeout: int,
+    refresh: bool = False,
+    deadline_ts: Optional[float] = None,
+) -> Optional[str]:
+    """ゲスト token を返す（無ければ POST /accounts で作る）"""
+    global _GOFILE_API_TOKEN
+    with _GOFILE_API_TOKEN_LOCK:
+        if refresh:
+            _GOFILE_API_TOKEN = None
+        if _GOFILE_API_TOKEN:
+            return _GOFILE_API_TOKEN
+        try:
+            r = http_post(
+                f"{GOFILE_API_BASE}/accounts", headers=HEADERS, timeout=timeout, deadline_ts=deadline_ts
+            )
+            body = r.json()
+        except Exception as e:
+            print(f"[warn] gofile api token failed: {e}")
+            return None
+        # プロキシ / メンテナンス画面などで dict 以外の JSON が返ることがある
+        if not isinstance(body, dict):
+            print(f"[warn] gofile api token failed: unexpected body ({type(body).__name__})")
+            return None
+        data = body.get("data")
+        token = data.get("token") if body.get("status") == "ok" and isinstance(data, dict) else None
+        if not token:
+            print(f"[warn] gofile api token failed: status={body.get('status')}")
+            return None
+        _GOFILE_API_TOKEN = token
+        return token
+
+
+def _gofile_api_verdict(url: str, body: dict) -> Optional[Tuple[bool, bool]]:
+    """
+    contents API のレスポンスを (is_alive, definitely_dead) に変換する。
+    判定できないもの（rateLimit / 認証切れ / premium 限定 など）は None。
+    """
+    status = str(body.get("status") or "")
+    data = body.get("data")
+    if not isinstance(data, dict):
+        data = {}
+
+    if status == "ok":
+        if data.get("password") and data.get("passwordStatus") != "passwordOk":
+            print(f"[info] gofile api(passwordRequired): {url}")
+            return False, True
+        if data.get("type") == "folder" and not data.get("children") and not data.get("childrenCount"):
+            print(f"[info] gofile api(empty folder): {url}")
+            return False, True
+        return True, False
+
+    s_low = status.lower()
+    if "notfound" in s_low or "removed" in s_low or "deleted" in s_low or "passwordrequired" in s_low:
+        print(f"[info] gofile api({status}): {url}")
+        return False, True
+
+    print(f"[info] gofile api inconclusive ({status or 'no status'}): {url}")
+    return None
+
+
+def _check_gofile_status_api(
+    url: str,
+    timeout: int = 10,
+    deadline_ts: Optional[float] = None,
+) -> Optional[Tuple[bool, bool]]:
+    """
+    gofile の JSON API で生存確認する。
+    戻り値: (is_alive, definitely_dead)。判定できなければ None（→ HTML / JS にフォールバック）
+    """
+    content_id = _gofile_content_id(url)
+    if not content_id:
+        return None
+
+    for attempt in range(2):
+        if _deadline_passed(deadline_ts):
+            return None
+        token = _gofile_api_token(timeout, refresh=attempt > 0, deadline_ts=deadline_ts)
+        if not token:
+            return None
+
+        headers = dict(HEADERS)
+        headers["Accept"] = "application/json"
+        headers["Authorization"] = f"Bearer {token}"
+        headers["X-Website-Token"] = GOFILE_WEBSITE_TOKEN
+        try:
+            r = http_get(
+                f"{GOFILE_API_BASE}/contents/{content_id}",
+                params={"wt": GOFILE_WEBSITE_TOKEN},
+                headers=headers,
+                timeout=timeout,
+                deadline_ts=deadline_ts,
+            )
+        except Exception as e:
+            print(f"[warn] gofile api failed: {url} ({e})")
+            return None
+
+        if r.status_code == 429:
+            print(f"[info] gofile api status 429: {url}")
+            return None
+        try:
+            body = r.json()
+        except Exception:
+            print(f"[info] gofile api status {r.status_code} (not json): {url}")
+            return None
+        if not isinstance(body, dict):
+            print(f"[info] gofile api status {r.status_code} (unexpected json): {url}")
+            return None
+
+        # token 切れなら 1 回だけ取り直す
+        if str(body.get("status")) == "error-auth" and attempt == 0:
+            continue
+        return _gofile_api_verdict(url, body)
+
+    return None
+
+
+# =========================
+#   gofile 生存キャッシュ（run をまたいで保持）
+# =========================
+
+# 保存先（空文字ならファイルには保存しない = この run の中だけ）
+LIVENESS_CACHE_FILE = os.getenv("GOFILE_LIVENESS_CACHE_FILE", "gofile_liveness.json")
+LIVENESS_CACHE_MAX = int(os.getenv("GOFILE_LIVENESS_CACHE_MAX", "5000"))
+# 判定ごとの有効期間（秒）
+LIVENESS_TTL_ALIVE = int(os.getenv("GOFILE_LIVENESS_TTL_ALIVE_SEC", "1800"))
+LIVENESS_TTL_DEAD = int(os.getenv("GOFILE_LIVENESS_TTL_DEAD_SEC", str(7 * 24 * 3600)))
+LIVENESS_TTL_ERROR = int(os.getenv("GOFILE_LIVENESS_TTL_ERROR_SEC", "600"))
+
+
+def _verdict_label(verdict: Tuple[bool, bool]) -> str:
+    if verdict[0]:
+        return "alive"
+    return "dead" if verdict[1] else "error"
+
+
+class _LivenessCache:
+    """
+    gofile 生存確認の結果キャッシュ（twimg の判定にも同じ形で使う）。
+      - 判定（alive / dead / error）ごとに TTL を持つ（ttls = (alive, dead, error)。省略時は LIVENESS_TTL_*）
+      - alive は「どの判定で生きていたか」も覚える
+        （ゆるめ判定の alive は、厳しめ判定では使わない）
+      - 件数が max_entries を超えたら、使われていない順に捨てる（LRU）
+    エントリ: key_func(url) -> [verdict, strict(0/1), 記録時刻(epoch 秒)]
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int,
+        key_func: Optional[Callable[[str], str]] = None,
+        ttls: Optional[Tuple[int, int, int]] = None,
+    ):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.key_func = key_func or canonical_url_key
+        self.ttls = ttls
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, verdict, strict, ts in data.get("entries", []):
+                self._entries[key] = [verdict, int(strict), float(ts)]
+        except Exception as e:
+            print(f"[warn] failed to load liveness cache ({self.path}): {e}")
+            self._entries.clear()
+
+    def _ttl(self, verdict: str) -> int:
+        alive, dead, error = self.ttls or (LIVENESS_TTL_ALIVE, LIVENESS_TTL_DEAD, LIVENESS_TTL_ERROR)
+        if verdict == "alive":
+            return alive
+        if verdict == "dead":
+            return dead
+        return error
+
+    def get(self, url: str, strict: bool) -> Optional[Tuple[bool, bool]]:
+        key = self.key_func(url)
+        with self._lock:
+            ent = self._entries.get(key)
+            if ent is None:
+                return None
+            verdict, ent_strict, ts = ent
+            if time.time() - ts > self._ttl(verdict):
+                del self._entries[key]
+                self._dirty = True
+                return None
+            if verdict == "alive" and strict and not ent_strict:
+                return None
+            self._entries.move_to_end(key)
+        if verdict == "alive":
+            return True, False
+        return False, verdict == "dead"
+
+    def has(self, url: str, strict: bool) -> bool:
+        return self.get(url, strict=strict) is not None
+
+    def put(self, url: str, result: Tuple[bool, bool], strict: bool) -> None:
+        key = self.key_func(url)
+        verdict = _verdict_label(result)
+        with self._lock:
+            self._entries[key] = [verdict, int(strict), time.time()]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self.path or _DRY_RUN:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            entries = [
+                [k, v[0], v[1], round(v[2], 1)]
+                for k, v in self._entries.items()
+                if now - v[2] <= self._ttl(v[0])
+            ]
+            self._dirty = False
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"entries": entries}, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[warn] failed to save liveness cache ({self.path}): {e}")
+
+
+_LIVENESS: Optional[_LivenessCache] = None
+_LIVENESS_LOCK = threading.Lock()
+
+
+def _liveness_cache() -> _LivenessCache:
+    global _LIVENESS
+    with _LIVENESS_LOCK:
+        if _LIVENESS is None:
+            _LIVENESS = _LivenessCache(LIVENESS_CACHE_FILE, LIVENESS_CACHE_MAX)
+        return _LIVENESS
+
+
+def merge_liveness_files(path: str, other: str, max_entries: int = LIVENESS_CACHE_MAX) -> int:
+    """
+    生存キャッシュのファイル other を path にまとめる（gofile_liveness.json / twimg_liveness.json 共通）。
+    同じキーは記録時刻が新しいほうを残し、max_entries を超えたら古いものから捨てる。
+    workflow のコミット前に、同時に走った別の run（投稿 / prefetch）が先にコミットした判定を
+    上書きで捨てないために使う。戻り値はまとめた後の件数。
+    """
+    merged: dict = {}
+    for p in (path, other):
+        try:
+            with open(p, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("entries", [])
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            print(f"[warn] failed to read liveness cache for merge ({p}): {e}")
+            continue
+        for ent in entries:
+            try:
+                key, ts = ent[0], float(ent[3])
+            except (TypeError, ValueError, IndexError):
+                continue
+            if key not in merged or ts > float(merged[key][3]):
+                merged[key] = ent
+    entries = sorted(merged.values(), key=lambda e: float(e[3]))[-max(1, max_entries):]
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"entries": entries}, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return len(entries)
+
+
+def save_liveness_cache() -> None:
+    """生存キャッシュ（gofile / twimg）のうち、この run で使ったものを保存する"""
+    for cache in (_LIVENESS, _TWIMG_LIVENESS):
+        if cache is not None:
+            cache.save()
+
+
 # =========================
 #   gofile 判定（共通）
 # =========================
@@ -157,6 +962,43 @@ NOT_FOUND_KEYWORDS = [
     "has been deleted by the owner",
 ]
 
+# NOT_FOUND_KEYWORDS をまとめた 1 本の正規表現（本文を 1 回なめるだけで全キーワードを探す）
+_NOT_FOUND_RE = re.compile("|".join(re.escape(kw) for kw in NOT_FOUND_KEYWORDS))
+_NOT_FOUND_RE_BYTES = re.compile(b"|".join(re.escape(kw.encode("utf-8")) for kw in NOT_FOUND_KEYWORDS))
+# chunk の境目をまたいだキーワードも拾えるよう、前の chunk の末尾をこれだけ残す
+_NOT_FOUND_OVERLAP = max(len(kw.encode("utf-8")) for kw in NOT_FOUND_KEYWORDS) - 1
+
+# gofile の HTML は先頭からこのバイト数までしか読まない（0 なら最後まで）
+GOFILE_HTML_MAX_BYTES = max(0, int(os.getenv("GOFILE_HTML_MAX_BYTES", str(256 * 1024))))
+GOFILE_HTML_CHUNK_BYTES = max(1024, int(os.getenv("GOFILE_HTML_CHUNK_BYTES", str(16 * 1024))))
+
+
+def _find_not_found_keyword(resp) -> Optional[str]:
+    """
+    stream=True のレスポンス本文を chunk ごとに読みながら NOT_FOUND_KEYWORDS を探す。
+    見つかった時点 / GOFILE_HTML_MAX_BYTES 読んだ時点で読むのをやめる（残りは落とさない）。
+    戻り値: 見つかったキーワード（無ければ None）。読み込み中の通信エラーはそのまま投げる。
+    """
+    tail = b""
+    read = 0
+    try:
+        for chunk in resp.iter_content(chunk_size=GOFILE_HTML_CHUNK_BYTES):
+            if not chunk:
+                continue
+            read += len(chunk)
+            buf = tail + chunk
+            m = _NOT_FOUND_RE_BYTES.search(buf)
+            if m:
+                return m.group(0).decode("utf-8")
+            if GOFILE_HTML_MAX_BYTES and read >= GOFILE_HTML_MAX_BYTES:
+                run_report.count("gofile.html_capped")
+                break
+            tail = buf[-_NOT_FOUND_OVERLAP:]
+        return None
+    finally:
+        run_report.count("gofile.html_bytes", read)
+        resp.close()
+
 
 def _check_gofile_status_basic(
     url: str,
@@ -173,30 +1015,67 @@ def _check_gofile_status_basic(
     ネットワークエラーや 429/500 系は:
       → is_alive=False, definitely_dead=False
       → シートには「リンク切れ」とは書かない（保留扱い）
+
+    GOFILE_CHECK_BACKEND=api なら先に JSON API で判定し、
+    判定できなかったときだけ HTML を見る。
+    生存キャッシュに有効な結果があれば、通信せずにそれを返す。
     """
     if _deadline_passed(deadline_ts):
         print(f"[info] skip basic gofile check due to deadline: {url}")
+        run_report.count("deadline_skip")
         return False, False
 
+    cache = _liveness_cache()
+    cached = cache.get(url, strict=False)
+    if cached is not None:
+        print(f"[info] gofile basic (cached {_verdict_label(cached)}): {url}")
+        run_report.count("liveness_cache.hit")
+        return cached
+
+    with run_report.span("check.basic", url=url) as sp:
+        verdict = _check_gofile_status_basic_uncached(url, timeout=timeout, deadline_ts=deadline_ts)
+        sp["result"] = _verdict_label(verdict)
+    if verdict[1]:
+        run_report.count("gofile.dead")
+    # 締切で打ち切られた「保留」は覚えない
+    if verdict[0] or verdict[1] or not _deadline_passed(deadline_ts):
+        cache.put(url, verdict, strict=False)
+    return verdict
+
+
+def _check_gofile_status_basic_uncached(
+    url: str,
+    timeout: int = 10,
+    deadline_ts: Optional[float] = None,
+) -> Tuple[bool, bool]:
+    if GOFILE_CHECK_BACKEND == "api":
+        verdict = _check_gofile_status_api(url, timeout=timeout, deadline_ts=deadline_ts)
+        if verdict is not None:
+            return verdict
+
     try:
-        r = requests.get(url, headers=HEADERS, timeout=timeout)
+        r = http_get(url, headers=HEADERS, timeout=timeout, deadline_ts=deadline_ts, stream=True)
     except Exception as e:
         print(f"[warn] gofile(requests basic) failed: {url} ({e})")
         return False, False
 
-    if r.status_code == 429:
-        print(f"[info] gofile basic status 429: {url}")
-        return False, False
+    with closing(r):
+        if r.status_code == 429:
+            print(f"[info] gofile basic status 429: {url}")
+            return False, False
 
-    if r.status_code != 200:
-        print(f"[info] gofile basic status {r.status_code}: {url}")
-        return False, False
+        if r.status_code != 200:
+            print(f"[info] gofile basic status {r.status_code}: {url}")
+            return False, False
 
-    text = (r.text or "")
-    for kw in NOT_FOUND_KEYWORDS:
-        if kw in text:
-            print(f"[info] gofile basic(not found text): {url}")
-            return False, True  # 明確に死んでいる
+        try:
+            kw = _find_not_found_keyword(r)
+        except Exception as e:
+            print(f"[warn] gofile(requests basic) read failed: {url} ({e})")
+            return False, False
+    if kw:
+        print(f"[info] gofile basic(not found text): {url}")
+        return False, True  # 明確に死んでいる
 
     # 特に問題なければ「生きている」
     return True, False
@@ -209,59 +1088,516 @@ def _is_gofile_alive(
 ) -> bool:
     """
     orevideo 用の「厳しめ」判定。
+    GOFILE_CHECK_BACKEND=api なら JSON API で判定し、判定できないときだけ
     gofile のページを直接 GET + JSロードして生存確認。
     - 200 以外: NG
     - HTML / JSロード後の HTML に NOT_FOUND_KEYWORDS が含まれていたら NG
     - 締切(deadline_ts)を超えそうなら即 False
+    - 生存キャッシュに有効な結果があれば、通信せずにそれを返す
     """
     if _deadline_passed(deadline_ts):
         print(f"[info] skip gofile check due to deadline: {url}")
+        run_report.count("deadline_skip")
         return False
 
-    # まずは普通の HTTP GET
+    cache = _liveness_cache()
+    cached = cache.get(url, strict=True)
+    if cached is not None:
+        print(f"[info] gofile (cached {_verdict_label(cached)}): {url}")
+        run_report.count("liveness_cache.hit")
+        return cached[0]
+
+    with run_report.span("check.strict", url=url) as sp:
+        verdict, conclusive = _check_gofile_status_strict_detail(url, timeout=timeout, deadline_ts=deadline_ts)
+        sp["result"] = _verdict_label(verdict)
+    if verdict[1]:
+        run_report.count("gofile.dead")
+    # 最後までチェックできた判定だけキャッシュする（描画が終わらなかったものは次の run で確認し直す）
+    if conclusive and (verdict[0] or verdict[1] or not _deadline_passed(deadline_ts)):
+        cache.put(url, verdict, strict=True)
+    return verdict[0]
+
+
+def _check_gofile_status_strict(
+    url: str,
+    timeout: int = 15,
+    deadline_ts: Optional[float] = None,
+) -> Tuple[bool, bool]:
+    """_is_gofile_alive の本体。キャッシュできるよう (is_alive, definitely_dead) で返す。"""
+    return _check_gofile_status_strict_detail(url, timeout=timeout, deadline_ts=deadline_ts)[0]
+
+
+def _check_gofile_status_strict_detail(
+    url: str,
+    timeout: int = 15,
+    deadline_ts: Optional[float] = None,
+) -> Tuple[Tuple[bool, bool], bool]:
+    """
+    ((is_alive, definitely_dead), conclusive) を返す。
+    conclusive=False は締切や JS レンダリングの未完了でチェックが最後まで走らなかったもの（キャッシュしない）。
+    """
+    # API で判定できればそれで確定（ブラウザ描画は不要）
+    if GOFILE_CHECK_BACKEND == "api":
+        verdict = _check_gofile_status_api(url, timeout=timeout, deadline_ts=deadline_ts)
+        if verdict is not None:
+            if verdict[0]:
+                print(f"[info] gofile alive (api): {url}")
+            return verdict, True
+
+    # まずは普通の HTTP GET（本文はキーワードが見つかるまで chunk ごとに読む）
     try:
-        r = requests.get(url, headers=HEADERS, timeout=timeout)
+        r = http_get(url, headers=HEADERS, timeout=timeout, deadline_ts=deadline_ts, stream=True)
     except Exception as e:
         print(f"[warn] gofile(requests) failed: {url} ({e})")
-        return False
+        return (False, False), True
 
-    if r.status_code == 429:
-        print(f"[info] gofile status 429: {url}")
-        return False
+    with closing(r):
+        if r.status_code == 429:
+            print(f"[info] gofile status 429: {url}")
+            return (False, False), True
 
-    if r.status_code != 200:
-        print(f"[info] gofile status {r.status_code}: {url}")
-        return False
+        if r.status_code != 200:
+            print(f"[info] gofile status {r.status_code}: {url}")
+            return (False, False), True
 
-    text = (r.text or "")
-    for kw in NOT_FOUND_KEYWORDS:
-        if kw in text:
-            print(f"[info] gofile(not found text): {url}")
-            return False
+        try:
+            kw = _find_not_found_keyword(r)
+        except Exception as e:
+            print(f"[warn] gofile(requests) read failed: {url} ({e})")
+            return (False, False), True
+    if kw:
+        print(f"[info] gofile(not found text): {url}")
+        return (False, True), True
 
     if _deadline_passed(deadline_ts):
         print(f"[info] skip gofile JS check due to deadline: {url}")
-        return False
+        run_report.count("deadline_skip")
+        return (False, False), False
+
+    # JS ロード後の HTML もチェック（共有ブラウザのタブでレンダリング）
+    with run_report.span("render", url=url) as sp:
+        fut = _get_browser_pool().render(url, timeout=timeout, deadline_ts=deadline_ts)
+        try:
+            html = fut.result(
+                timeout=_call_timeout(timeout * 2 + 5, None if deadline_ts is None else deadline_ts + 5)
+            )
+        except Exception as e:
+            html = None
+            print(f"[warn] gofile(playwright) timed out: {url} ({e})")
+        sp["ok"] = bool(html)
+    if html is None:
+        # タイムアウト / 締切 / ブラウザを閉じて取り消された → JS チェックをしていないので判定不能
+        print(f"[info] gofile JS check did not complete: {url}")
+        run_report.count("gofile.render_incomplete")
+        return (False, False), False
+    if _NOT_FOUND_RE.search(html):
+        print(f"[info] gofile(not found text via JS): {url}")
+        return (False, True), True
+
+    print(f"[info] gofile alive: {url}")
+    return (True, False), True
+
+
+# =========================
+#   並列の生存確認（結果は優先順に確定）
+# =========================
+
+# 生存確認を何件まで先読みで同時に走らせるか（1 なら従来どおり 1 件ずつ）
+GOFILE_VERIFY_PARALLEL = max(1, int(os.getenv("GOFILE_VERIFY_PARALLEL", "4")))
+
+
+def _verify_in_priority_order(
+    candidates: Iterable[T],
+    check: Callable[[T], R],
+    deadline_ts: Optional[float],
+    parallel: Optional[int] = None,
+) -> Iterator[Tuple[T, R]]:
+    """
+    candidates を優先順に最大 parallel 件先読みして並列に check し、
+    (候補, 結果) を必ず candidates の順に返すジェネレータ。
+
+    - 呼び出し側は 1 件ずつ結果を見て、目標数に届いたら break するだけでよい
+      （break / 締切でジェネレータが閉じられたら、まだ始まっていないチェックは取り消す）
+    - candidates 側も遅延評価なので、チェック件数の上限はそちらで数える
+    """
+    parallel = parallel or GOFILE_VERIFY_PARALLEL
+    it = iter(candidates)
+    executor = ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="verify")
+    pending = deque()  # (候補, future) を優先順に保持
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) < parallel:
+                try:
+                    item = next(it)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append((item, executor.submit(check, item)))
+
+            if not pending:
+                return
+            if _deadline_passed(deadline_ts):
+                return
+
+            item, fut = pending.popleft()
+            yield item, fut.result()
+    finally:
+        for _, fut in pending:
+            fut.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    # JS ロード後の HTML もチェック（短めの待ち時間）
+
+# =========================
+#   twimg 判定（HEAD / Range だけで中身は落とさない）
+# =========================
+
+# 0 なら twimg は確認せずに使う（解像度違いの並べ替えだけする）
+TWIMG_CHECK = os.getenv("TWIMG_CHECK", "1") == "1"
+# 判定の保存先（空文字ならファイルには保存しない = この run の中だけ）
+TWIMG_LIVENESS_CACHE_FILE = os.getenv("TWIMG_LIVENESS_CACHE_FILE", "twimg_liveness.json")
+TWIMG_LIVENESS_CACHE_MAX = int(os.getenv("TWIMG_LIVENESS_CACHE_MAX", "5000"))
+# 判定ごとの有効期間（秒）
+TWIMG_TTL_ALIVE = int(os.getenv("TWIMG_TTL_ALIVE_SEC", str(6 * 3600)))
+TWIMG_TTL_DEAD = int(os.getenv("TWIMG_TTL_DEAD_SEC", str(24 * 3600)))
+TWIMG_TTL_ERROR = int(os.getenv("TWIMG_TTL_ERROR_SEC", "600"))
+# 同時に確認する本数
+TWIMG_CHECK_PARALLEL = max(1, int(os.getenv("TWIMG_CHECK_PARALLEL", "8")))
+# 1 run で通信して確認する動画の最大数（キャッシュで判定がついたものは数えない）
+TWIMG_MAX_CHECK = int(os.getenv("TWIMG_MAX_CHECK", "40"))
+TWIMG_CHECK_TIMEOUT_SEC = float(os.getenv("TWIMG_CHECK_TIMEOUT_SEC", "8"))
+# 解像度の好み（短辺）: これ以下で一番大きいもの → 無ければこれを超える中で一番小さいもの（0 なら一番大きいもの）
+TWIMG_MAX_QUALITY = int(os.getenv("TWIMG_MAX_QUALITY", "1080"))
+
+TWIMG_HEADERS = {"User-Agent": HEADERS["User-Agent"], "Accept": "*/*"}
+
+# リンク切れ扱いにするステータス（期限切れ・削除済みの twimg は 403 / 404 / 410 を返す）
+_TWIMG_DEAD_STATUSES = (403, 404, 410)
+_TWIMG_RES_RE = re.compile(r"/(\d+)x(\d+)/")
+
+
+def _twimg_variant_key(url: str) -> str:
+    """
+    twimg 判定キャッシュのキー。canonical_url_key と違って解像度までは区別する（?tag= は無視）。
+      https://video.twimg.com/ext_tw_video/1/pu/vid/avc1/1280x720/x.mp4?tag=12 → "twv:ext_tw_video/1/pu/vid/avc1/1280x720/x.mp4"
+    """
+    norm = _normalize_url(url)
+    m = _TWIMG_PATH_RE.match(norm)
+    return "twv:" + m.group(1) if m else norm
+
+
+def _prefer_twimg_variants(urls: Iterable[str]) -> List[str]:
+    """
+    同じ動画の解像度違いを好みの順（TWIMG_MAX_QUALITY）に並べて返す。
+    URL は _normalize_url して、?tag= だけ違うものは最初の 1 本にまとめる。解像度の無い URL は最後。
+    """
+    out: List[str] = []
+    seen: Set[str] = set()
+    for u in urls:
+        norm = _normalize_url(u)
+        key = _twimg_variant_key(norm)
+        if norm and key not in seen:
+            seen.add(key)
+            out.append(norm)
+
+    def _rank(u: str) -> Tuple[int, int]:
+        m = _TWIMG_RES_RE.search(u)
+        if not m:
+            return 2, 0
+        w, h = int(m.group(1)), int(m.group(2))
+        if not TWIMG_MAX_QUALITY or min(w, h) <= TWIMG_MAX_QUALITY:
+            return 0, -w * h
+        return 1, w * h
+
+    return sorted(out, key=_rank)
+
+
+_TWIMG_LIVENESS: Optional[_LivenessCache] = None
+
+
+def _twimg_cache() -> _LivenessCache:
+    global _TWIMG_LIVENESS
+    with _LIVENESS_LOCK:
+        if _TWIMG_LIVENESS is None:
+            _TWIMG_LIVENESS = _LivenessCache(
+                TWIMG_LIVENESS_CACHE_FILE,
+                TWIMG_LIVENESS_CACHE_MAX,
+                key_func=_twimg_variant_key,
+                ttls=(TWIMG_TTL_ALIVE, TWIMG_TTL_DEAD, TWIMG_TTL_ERROR),
+            )
+        return _TWIMG_LIVENESS
+
+
+def _check_twimg_status_uncached(
+    url: str,
+    timeout: float = TWIMG_CHECK_TIMEOUT_SEC,
+    deadline_ts: Optional[float] = None,
+) -> Tuple[bool, bool]:
+    """
+    twimg を HEAD で確認する（HEAD を受け付けなければ Range: bytes=0-0 の GET）。
+    戻り値: (is_alive, definitely_dead)。403 / 404 / 410 は明確に死んでいる、429 / 5xx / 通信エラーは保留。
+    """
+    try:
+        r = http_request(
+            "HEAD", url, headers=TWIMG_HEADERS, timeout=timeout, deadline_ts=deadline_ts, allow_redirects=True
+        )
+        if r.status_code in (405, 501):
+            r = http_get(
+                url, headers=dict(TWIMG_HEADERS, Range="bytes=0-0"), timeout=timeout, deadline_ts=deadline_ts,
+                stream=True,
+            )
+            r.close()  # 本文は読まない
+    except Exception as e:
+        print(f"[warn] twimg check failed: {url} ({e})")
+        return False, False
+
+    if r.status_code in (200, 206):
+        return True, False
+    print(f"[info] twimg status {r.status_code}: {url}")
+    if r.status_code in _TWIMG_DEAD_STATUSES:
+        return False, True
+    return False, False
+
+
+def _check_twimg_status(
+    url: str,
+    timeout: float = TWIMG_CHECK_TIMEOUT_SEC,
+    deadline_ts: Optional[float] = None,
+) -> Tuple[bool, bool]:
+    """_check_twimg_status_uncached に判定キャッシュ（解像度ごと）を挟んだもの"""
+    if _deadline_passed(deadline_ts):
+        print(f"[info] skip twimg check due to deadline: {url}")
+        run_report.count("deadline_skip")
+        return False, False
+
+    cache = _twimg_cache()
+    cached = cache.get(url, strict=False)
+    if cached is not None:
+        run_report.count("twimg_cache.hit")
+        return cached
+
+    with run_report.span("check.twimg", url=url) as sp:
+        verdict = _check_twimg_status_uncached(url, timeout=timeout, deadline_ts=deadline_ts)
+        sp["result"] = _verdict_label(verdict)
+    if verdict[1]:
+        run_report.count("twimg.dead")
+    if verdict[0] or verdict[1] or not _deadline_passed(deadline_ts):
+        cache.put(url, verdict, strict=False)
+    return verdict
+
+
+def _pick_live_twimg(variants: List[str], deadline_ts: Optional[float]) -> Tuple[Optional[str], bool]:
+    """
+    同じ動画の解像度違い（_prefer_twimg_variants の順）を前から確認して、最初に生きていたものを返す。
+    戻り値は (url, verified)。リンク切れと分かったものだけ飛ばし、
+    429 / タイムアウトなどで判定できなかったら、それ以上は叩かずにその解像度を未確認のまま返す
+    （確認前と同じく使う）。全部リンク切れのときだけ (None, True)。TWIMG_CHECK=0 なら先頭を未確認で返す。
+    """
+    if not TWIMG_CHECK:
+        return (variants[0] if variants else None), False
+    for url in variants:
+        alive, definitely_dead = _check_twimg_status(url, deadline_ts=deadline_ts)
+        if alive:
+            return url, True
+        if not definitely_dead:
+            run_report.count("twimg.unknown")
+            return url, False
+    return None, True
+
+
+def _twimg_check_needed(variants: List[str]) -> bool:
+    """この動画を選ぶのに通信が要るか（TWIMG_MAX_CHECK の数え方用。先頭の解像度だけ見る）"""
+    return TWIMG_CHECK and bool(variants) and not _twimg_cache().has(variants[0], strict=False)
+
+
+# =========================
+#   スプシーの差分読み（前回 run の索引を使う）
+# =========================
+
+# 前回までに読んだシートの情報（行数・末尾の指紋・処理済み行）の保存先（空なら毎回全件読む）
+SHEET_INDEX_FILE = os.getenv("SHEET_INDEX_FILE", "sheet_index.json")
+# 下から何行ずつ読むか
+SHEET_CHUNK_ROWS = max(10, int(os.getenv("SHEET_CHUNK_ROWS", "200")))
+# 構造変更の検出に使う末尾の行数（この範囲の B列が前回と違えば全件読み直す）
+SHEET_TAIL_CHECK_ROWS = max(1, int(os.getenv("SHEET_TAIL_CHECK_ROWS", "20")))
+# 何 run に 1 回は全件読み直すか（手で D/E を消した行なども拾い直すため）
+SHEET_FULL_READ_EVERY = max(1, int(os.getenv("SHEET_FULL_READ_EVERY", "24")))
+
+SHEET_START_ROW = 2
+
+
+def _cell(row: list, i: int) -> str:
+    return row[i].strip() if len(row) > i and row[i] else ""
+
+
+def _rows_to_ranges(rows: Set[int]) -> List[List[int]]:
+    out: List[List[int]] = []
+    for r in sorted(rows):
+        if out and out[-1][1] == r - 1:
+            out[-1][1] = r
+        else:
+            out.append([r, r])
+    return out
+
+
+def _ranges_to_rows(ranges: List[List[int]]) -> Set[int]:
+    rows: Set[int] = set()
+    for a, b in ranges:
+        rows.update(range(int(a), int(b) + 1))
+    return rows
+
+
+class _SheetRowReader:
+    """
+    シートの B:E を「下から上」に、必要な分だけ SHEET_CHUNK_ROWS 行ずつ読む。
+
+    前回 run の索引（sheet_index.json）があれば:
+      - 前回の最終行の少し上から下だけを読み、末尾 SHEET_TAIL_CHECK_ROWS 行の B列が
+        前回と同じか確かめる（違えば行の挿入・削除などとみなして全件読み直す）
+      - 前回より下にある行 = 新しく追加された行
+      - D/E が埋まっている・投稿済み などで「もう候補にならない」と分かっている行は読まない
+    索引が無い / シートが変わった / SHEET_FULL_READ_EVERY run ごと は従来どおり全件読む。
+    """
+
+    def __init__(self, ws, sheet_key: str):
+        self.ws = ws
+        self.sheet_key = sheet_key
+        self.rows: dict[int, list] = {}   # 行番号 -> [B, C, D, E]（読んだ分だけ）
+        self.done: Set[int] = set()       # もう候補にならない行
+        self.last_row = SHEET_START_ROW - 1
+        self.runs_since_full = 0
+
+    # ---------- 読み込み ----------
+
+    def _get(self, first: int, last: Optional[int]) -> List[list]:
+        rng = f"B{first}:E{'' if last is None else last}"
+        with run_report.span("sheet.read", range=rng) as sp:
+            values = self.ws.get(rng)
+            sp["rows"] = len(values)
+        return values
+
+    def _store(self, first: int, values: List[list]) -> None:
+        for i, row in enumerate(values):
+            self.rows[first + i] = list(row)
+
+    def _full_read(self) -> None:
+        values = self._get(SHEET_START_ROW, None)
+        self.rows.clear()
+        self.done.clear()
+        self._store(SHEET_START_ROW, values)
+        self.last_row = SHEET_START_ROW + len(values) - 1
+        self.runs_since_full = 0
+
+    def _incremental_read(self, index: dict) -> bool:
+        """前回の末尾から下だけ読む。構造が変わっていそうなら False"""
+        prev_last = int(index.get("last_row", 0))
+        tail = {int(r): b for r, b in index.get("tail", [])}
+        if prev_last < SHEET_START_ROW or not tail:
+            return False
+
+        first = max(SHEET_START_ROW, min(tail))
+        last = prev_last + SHEET_CHUNK_ROWS
+        values = self._get(first, last)
+        self._store(first, values)
+
+        # 末尾の指紋（B列）が前回と同じか
+        for r, b in tail.items():
+            if _cell(self.rows.get(r, []), 0) != b:
+                print(f"[info] sheet tail changed at row {r}; full read.")
+                return False
+
+        # 追加行が多ければ、足りなくなるまで下へ読み進める
+        got_last = first + len(values) - 1
+        while got_last >= last:
+            more_first, last = last + 1, last + SHEET_CHUNK_ROWS
+            more = self._get(more_first, last)
+            if not more:
+                break
+            self._store(more_first, more)
+            got_last = more_first + len(more) - 1
+
+        self.last_row = max(prev_last, got_last)
+        self.done = _ranges_to_rows(index.get("done", []))
+        self.runs_since_full = int(index.get("runs_since_full", 0)) + 1
+        print(f"[info] sheet incremental read: rows {first}..{self.last_row} (new={self.last_row - prev_last})")
+        return True
+
+    def open(self, index: Optional[dict]) -> None:
+        usable = (
+            index is not None
+            and index.get("sheet") == self.sheet_key
+            and int(index.get("runs_since_full", 0)) + 1 < SHEET_FULL_READ_EVERY
+        )
+        if not (usable and self._incremental_read(index)):
+            self._full_read()
+            print(f"[info] sheet full read: rows={self.last_row - SHEET_START_ROW + 1}")
+
+    def iter_rows_bottom_up(self) -> Iterator[Tuple[int, list]]:
+        """
+        (行番号, [B, C, D, E]) を下から順に返す。処理済みと分かっている行は飛ばし、
+        未読の行は必要になった時点でまとめて読む。
+        """
+        r = self.last_row
+        while r >= SHEET_START_ROW:
+            if r in self.done:
+                r -= 1
+                continue
+            if r not in self.rows:
+                first = max(SHEET_START_ROW, r - SHEET_CHUNK_ROWS + 1)
+                values = self._get(first, r)
+                self._store(first, values)
+                for rr in range(first, r + 1):
+                    self.rows.setdefault(rr, [])
+            yield r, self.rows[r]
+            r -= 1
+
+    # ---------- 索引 ----------
+
+    def mark_done(self, row: int) -> None:
+        self.done.add(row)
+
+    def to_index(self) -> dict:
+        tail_first = max(SHEET_START_ROW, self.last_row - SHEET_TAIL_CHECK_ROWS + 1)
+        tail = [
+            [r, _cell(self.rows[r], 0)]
+            for r in range(tail_first, self.last_row + 1)
+            if r in self.rows
+        ]
+        return {
+            "sheet": self.sheet_key,
+            "last_row": self.last_row,
+            "tail": tail,
+            "done": _rows_to_ranges(self.done),
+            "runs_since_full": self.runs_since_full,
+        }
+
+
+def _load_sheet_index() -> Optional[dict]:
+    if not SHEET_INDEX_FILE or not os.path.exists(SHEET_INDEX_FILE):
+        return None
+    try:
+        with open(SHEET_INDEX_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[warn] failed to load sheet index ({SHEET_INDEX_FILE}): {e}")
+        return None
+
+
+def _save_sheet_index(session: _SheetSession) -> None:
+    if not SHEET_INDEX_FILE or session.reader is None or _DRY_RUN:
+        return
+    text = json.dumps(session.reader.to_index(), ensure_ascii=False, separators=(",", ":"))
+    if text == session.saved_index:
+        return
+    tmp = SHEET_INDEX_FILE + ".tmp"
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True, args=["--no-sandbox"])
-            page = browser.new_page()
-            page.goto(url, timeout=timeout * 1000, wait_until="networkidle")
-            page.wait_for_timeout(1200)  # 1.2秒だけ余分に待つ
-            html = page.content()
-            browser.close()
-        for kw in NOT_FOUND_KEYWORDS:
-            if kw in html:
-                print(f"[info] gofile(not found text via JS): {url}")
-                return False
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, SHEET_INDEX_FILE)
+        session.saved_index = text
     except Exception as e:
-        # Playwright がコケても致命的にはしない
-        print(f"[warn] gofile(playwright) failed: {url} ({e})")
-
-    print(f"[info] gofile alive: {url}")
-    return True
+        print(f"[warn] failed to save sheet index ({SHEET_INDEX_FILE}): {e}")
 
 
 # =========================
@@ -278,99 +1614,115 @@ def _load_alive_urls_from_sheet(
     スプシー(B列)から gofile URL を読み取り、以下を行う:
 
       - B列を「下から上」に読む（下の行ほど新しい）
+        前回 run の索引があれば、新しい行と末尾だけ読み、足りなければ上へ少しずつ読む
       - D列 or E列に何か書いてある行はスキップ
       - B列が重複している場合は、下の行を優先
       - state.json & この run 内の seen_now に含まれる URL はスキップ
+        （重複判定・行番号の対応は canonical_url_key で行う）
       - gofile 生存確認 (_check_gofile_status_basic) で:
           ・ alive=True           → 採用
-          ・ definitely_dead=True → D列に「リンク切れ」
+          ・ definitely_dead=True → D列に「リンク切れ」（最後にまとめて batch_update）
           ・ それ以外            → 何もしない（保留）
 
     ※ シート側の gofile チェック件数は MAX_SHEET_GOFILE_CHECK で制限（デフォ 30 件）
     """
-    ws = _get_sheet()
-    if ws is None:
+    session = _get_sheet_session()
+    if session is None:
         return []
+    ws = session.ws
 
     alive_urls: List[str] = []
     local_seen_urls: Set[str] = set()
 
+    url_row = session.url_row = {}
+
+    # 前回の索引があれば、新しい行＋末尾だけ読む（下から必要な分だけ追加で読む）
+    reader = _SheetRowReader(ws, session.sheet_key)
     try:
-        # B2:E の範囲をまとめて取得（2行目以降）
-        rows = ws.get("B2:E")
+        reader.open(_load_sheet_index())
     except Exception as e:
         print(f"[warn] failed to read sheet values: {e}")
         return []
+    session.reader = reader
 
-    global _SHEET_URL_ROW
-    _SHEET_URL_ROW = {}
-
-    start_row = 2
-    total = len(rows)
     sheet_checks = 0
 
-    # rows を「下から上」に読む
-    for i, row in enumerate(reversed(rows)):
-        if len(alive_urls) >= max_needed:
-            break
-        if _deadline_passed(deadline_ts):
-            print("[info] deadline reached during sheet selection; stop.")
-            break
-        if sheet_checks >= MAX_SHEET_GOFILE_CHECK:
-            print(f"[info] reached MAX_SHEET_GOFILE_CHECK={MAX_SHEET_GOFILE_CHECK}; stop in sheet.")
-            break
-
-        orig_i = total - 1 - i
-        row_index = start_row + orig_i  # 実際のシート行番号
-
-        b = row[0].strip() if len(row) >= 1 and row[0] else ""
-        d = row[2].strip() if len(row) >= 3 and row[2] else ""
-        e = row[3].strip() if len(row) >= 4 and row[3] else ""
-
-        if not b:
-            continue
+    def _candidates():
+        """チェック対象の (行番号, URL) を「下から上」の順に出す"""
+        nonlocal sheet_checks
+        for row_index, row in reader.iter_rows_bottom_up():
+            if _deadline_passed(deadline_ts):
+                print("[info] deadline reached during sheet selection; stop.")
+                run_report.count("deadline_stop")
+                return
+            if sheet_checks >= MAX_SHEET_GOFILE_CHECK:
+                print(f"[info] reached MAX_SHEET_GOFILE_CHECK={MAX_SHEET_GOFILE_CHECK}; stop in sheet.")
+                return
+
+            b = _cell(row, 0)
+            d = _cell(row, 2)
+            e = _cell(row, 3)
+
+            if not b:
+                continue
 
-        norm = _normalize_url(b)
+            norm = _normalize_url(b)
 
-        # gofile 以外は無視
-        if not GOFILE_RE.match(norm):
-            continue
+            # gofile 以外は無視
+            if not GOFILE_RE.match(norm):
+                reader.mark_done(row_index)
+                continue
+            key = canonical_url_key(norm)
 
-        # URL -> 行番号の対応（下の行を優先）
-        if norm not in _SHEET_URL_ROW:
-            _SHEET_URL_ROW[norm] = row_index
+            # URL -> 行番号の対応（下の行を優先）
+            if key not in url_row:
+                url_row[key] = row_index
 
-        # D or E に何か書いてあれば「処理済み」
-        if d or e:
-            continue
+            # D or E に何か書いてあれば「処理済み」
+            if d or e:
+                reader.mark_done(row_index)
+                continue
 
-        # シート内重複
-        if norm in local_seen_urls:
-            continue
-        local_seen_urls.add(norm)
+            # シート内重複
+            if key in local_seen_urls:
+                continue
+            local_seen_urls.add(key)
 
-        # state.json / run 内で既に使用済み
-        if norm in already_seen or norm in seen_now:
-            continue
+            # state.json / run 内で既に使用済み
+            if norm in already_seen:
+                reader.mark_done(row_index)
+                continue
+            if key in seen_now:
+                continue
 
-        sheet_checks += 1
-        alive, definitely_dead = _check_gofile_status_basic(
-            norm,
-            timeout=10,
-            deadline_ts=deadline_ts,
-        )
-        if alive:
-            seen_now.add(norm)
-            alive_urls.append(norm)
-        elif definitely_dead:
-            # 明確に "This content does not exist" などが出ているときだけ D列にマーク
-            try:
-                ws.update_acell(f"D{row_index}", "リンク切れ")
-            except Exception as e2:
-                print(f"[warn] failed to mark dead in sheet (row={row_index}): {e2}")
-        else:
-            # ネットワークエラー / 一時的なエラーなどはシートには何も書かない
-            pass
+            # キャッシュで判定がつく URL はチェック枠を使わない
+            if not _liveness_cache().has(norm, strict=False):
+                sheet_checks += 1
+            yield row_index, norm
+
+    def _check(item):
+        return _check_gofile_status_basic(item[1], timeout=10, deadline_ts=deadline_ts)
+
+    if max_needed > 0:
+        # 先の候補も並列にチェックしておき、結果は「下から上」の順に確定させる
+        with closing(_verify_in_priority_order(_candidates(), _check, deadline_ts)) as results:
+            for (row_index, norm), (alive, definitely_dead) in results:
+                if alive:
+                    seen_now.add(canonical_url_key(norm))
+                    alive_urls.append(norm)
+                    if len(alive_urls) >= max_needed:
+                        break
+                elif definitely_dead:
+                    # 明確に "This content does not exist" などが出ているときだけ D列にマーク
+                    # （書き込みはためておいて、シート選別の最後にまとめて書く）
+                    session.writes.add(f"D{row_index}", "リンク切れ")
+                    reader.mark_done(row_index)
+                else:
+                    # ネットワークエラー / 一時的なエラーなどはシートには何も書かない
+                    pass
+
+    session.writes.flush(ws)
+    _save_sheet_index(session)
 
     print(f"[info] sheet selected: gofile={len(alive_urls)} (max_needed={max_needed})")
     return alive_urls
@@ -379,127 +1731,492 @@ def _load_alive_urls_from_sheet(
 def mark_sheet_posted(urls: List[str], label: str = "post成功") -> None:
     """
     ツイートに成功した URL について、スプシーの
-      - 「B列と同じ行」の E列 に「post成功」を書き込む。
+      - 「B列と同じ行」の E列 に「post成功」を書き込む（1 回の batch_update でまとめて）。
     （※ bot_orevideo.py 側から必要なら呼ぶ想定）
     """
     if not urls:
         return
-    ws = _get_sheet()
-    if ws is None:
+    session = _get_sheet_session()
+    if session is None:
         return
 
-    global _SHEET_URL_ROW
-
+    rows = {}
     for u in urls:
-        norm = _normalize_url(u)
-        row = _SHEET_URL_ROW.get(norm)
+        key = canonical_url_key(u)
+        row = session.url_row.get(key)
+        if row:
+            rows[key] = row
+        elif key in _READY_SHEET_ROWS:
+            rows[key] = 0  # あとで投稿待ちキューの行番号を確かめて埋める
+    _resolve_ready_rows(session, rows)
+
+    for row in rows.values():
         if not row:
             continue
-        try:
-            ws.update_acell(f"E{row}", label)
-        except Exception as e:
-            print(f"[warn] failed to mark post成功 in sheet (row={row}): {e}")
+        session.writes.add(f"E{row}", label)
+        if session.reader is not None:
+            session.reader.mark_done(row)
+
+    # 1 回の batch_update でまとめて書く
+    session.writes.flush(session.ws)
+    _save_sheet_index(session)
+
+
+def _resolve_ready_rows(session: _SheetSession, rows: dict) -> None:
+    """
+    投稿待ちキュー由来の URL（この run ではシートを読んでいない）の行番号を埋める。
+    キューに控えた行の B列を読んで、同じ URL のままのときだけ使う（行がずれていたら書かない）。
+    """
+    hinted = {key: _READY_SHEET_ROWS[key] for key, row in rows.items() if not row}
+    if not hinted:
+        return
+    lo, hi = min(hinted.values()), max(hinted.values())
+    try:
+        values = session.ws.get(f"B{lo}:B{hi}")
+    except Exception as e:
+        print(f"[warn] failed to read sheet rows {lo}..{hi}: {e}")
+        return
+    for key, row in hinted.items():
+        i = row - lo
+        b = _cell(values[i], 0) if i < len(values) else ""
+        if b and canonical_url_key(_normalize_url(b)) == key:
+            rows[key] = row
+            session.url_row[key] = row
+        else:
+            print(f"[info] sheet row {row} no longer holds the queued URL; skip marking.")
 
 
 # =========================
 #   HTML からリンク抽出
 # =========================
 
-def extract_links_from_html(html: str) -> Tuple[List[str], List[str]]:
+def scan_links(body) -> Tuple[List[str], List[str], Optional[str]]:
+    """
+    orevideo のページ本文（bytes のままでも str でも可）を 1 回だけ走査して
+      - twimg mp4
+      - gofile
+    を出てきた順・重複なしで抜き出す。
+    戻り値: (twimg_list, gofile_list, ページで最初に出てきたリンク)
+    """
+    if not body:
+        return [], [], None
+
+    is_bytes = isinstance(body, (bytes, bytearray, memoryview))
+    pattern = LINK_RE_BYTES if is_bytes else LINK_RE
+
+    tw: List[str] = []
+    gf: List[str] = []
+    seen = set()
+    first: Optional[str] = None
+    for m in pattern.finditer(body):
+        raw = m.group(0)
+        if raw in seen:
+            continue
+        seen.add(raw)
+        url = raw.decode("utf-8", "replace") if is_bytes else raw
+        if first is None:
+            first = url
+        if m.lastindex == 1:
+            tw.append(url)
+        else:
+            gf.append(url)
+
+    if EXTRACT_DEBUG:
+        print(f"[debug] scan_links: twimg={len(tw)}, gofile={len(gf)}")
+    return tw, gf, first
+
+
+def extract_links_from_html(html) -> Tuple[List[str], List[str]]:
     """
     orevideo のページ HTML から
       - twimg mp4
       - gofile
-    を抜き出す。
+    を抜き出す（scan_links の互換ラッパ）。
     戻り値: (twimg_list, gofile_list)
     """
-    if not html:
-        return [], []
+    tw, gf, _ = scan_links(html)
+    return tw, gf
+
+
+# =========================
+#   orevideo ページキャッシュ（run をまたいで保持）
+# =========================
+
+# 保存先（空文字ならファイルには保存しない = この run の中だけ）
+OREVIDEO_PAGE_CACHE_FILE = os.getenv("OREVIDEO_PAGE_CACHE_FILE", "orevideo_pages.json")
+# 前回 run のページを「続き」として使ってよい古さ（秒）。これより古いページは取りに行く
+# （続きとして返すページは条件付き GET もしないので、奥のページの削除・並べ替えはこの秒数まで気づかない。短めにしておく）
+OREVIDEO_REPLAY_MAX_AGE_SEC = int(os.getenv("OREVIDEO_REPLAY_MAX_AGE_SEC", "1800"))
+
+
+class _PageCache:
+    """
+    orevideo 一覧ページのキャッシュ（URL ごと）。
+      - etag / last_modified … 条件付き GET 用
+      - hash … 本文の blake2b（200 でも前回と同じならリンク抽出しない）
+      - tw / gf / first … 抜き出したリンクと、ページ先頭のリンク
+      - ts … 最後にサーバーの内容と一致を確認した時刻(epoch 秒)
+    エントリは差し替えるだけで書き換えない（get したものは呼び出し側で持っていてよい）。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = {
+                url: ent for url, ent in (data.get("pages") or {}).items()
+                if isinstance(ent.get("tw"), list) and isinstance(ent.get("gf"), list)
+            }
+        except Exception as e:
+            print(f"[warn] failed to load page cache ({self.path}): {e}")
+            self._entries = {}
+
+    def get(self, url: str) -> Optional[dict]:
+        with self._lock:
+            return self._entries.get(url)
+
+    def put(self, url: str, entry: dict) -> None:
+        with self._lock:
+            self._entries[url] = entry
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self.path or _DRY_RUN:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            pages = dict(self._entries)
+            self._dirty = False
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"pages": pages}, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[warn] failed to save page cache ({self.path}): {e}")
+
+
+_PAGE_CACHE: Optional[_PageCache] = None
+_PAGE_CACHE_LOCK = threading.Lock()
 
-    tw = TWIMG_RE.findall(html)
-    gf = GOFILE_RE.findall(html)
 
-    tw_u = _unique_preserve(tw)
-    gf_u = _unique_preserve(gf)
+def _page_cache() -> _PageCache:
+    global _PAGE_CACHE
+    with _PAGE_CACHE_LOCK:
+        if _PAGE_CACHE is None:
+            _PAGE_CACHE = _PageCache(OREVIDEO_PAGE_CACHE_FILE)
+        return _PAGE_CACHE
 
-    print(f"[debug] extract_links_from_html: twimg={len(tw_u)}, gofile={len(gf_u)}")
-    return tw_u, gf_u
+
+def save_page_cache() -> None:
+    if _PAGE_CACHE is not None:
+        _PAGE_CACHE.save()
 
 
 # =========================
 #   orevideo からリンク収集
 # =========================
 
-def _collect_orevideo_links(
-    num_pages: int,
-    deadline_ts: Optional[float],
-) -> Tuple[List[str], List[str], List[str]]:
+class _HostRateLimiter:
     """
-    orevideo のページを巡回してリンクを集める。
-    戻り値: (twimg_all, gofile_early, gofile_late)
-      - twimg_all     … popular(1ページ目) + newest(1..num_pages)
-      - gofile_early  … newest のうち page <= GOFILE_PRIORITY_MAX_PAGE の gofile（優先）
-      - gofile_late   … newest のうち page >  GOFILE_PRIORITY_MAX_PAGE の gofile（予備）
+    ホストごとに「リクエスト開始を最低 min_interval 秒あける」だけの簡易レートリミッタ。
+    複数スレッドから呼ばれても、順番に予約した時刻まで待つ。
     """
-    twimg_all: List[str] = []
-    gofile_early: List[str] = []
-    gofile_late: List[str] = []
 
+    def __init__(self, min_interval: float):
+        self.min_interval = max(0.0, min_interval)
+        self._lock = threading.Lock()
+        self._next_ts: dict[str, float] = {}
+
+    def wait(
+        self,
+        host: str,
+        deadline_ts: Optional[float] = None,
+        stop: Optional[threading.Event] = None,
+    ) -> bool:
+        """待ち終わったら True。締切超え / stop されたら False（リクエストしない）"""
+        with self._lock:
+            now = _now()
+            start_ts = max(now, self._next_ts.get(host, 0.0))
+            self._next_ts[host] = start_ts + self.min_interval
+
+        if deadline_ts is not None and start_ts >= deadline_ts:
+            return False
+
+        delay = start_ts - now
+        if delay > 0:
+            if stop is not None:
+                if stop.wait(delay):
+                    return False
+            else:
+                time.sleep(delay)
+        return not (stop is not None and stop.is_set())
+
+
+_OREVIDEO_RATE = _HostRateLimiter(OREVIDEO_MIN_INTERVAL_SEC)
+
+
+def _orevideo_newest_url(p: int) -> str:
+    if p == 1:
+        return f"{BASE_ORIGIN}/?sort=newest&page=1"
+    return f"{BASE_ORIGIN}/?page={p}&sort=newest"
+
+
+def _fetch_orevideo_page(
+    url: str,
+    label: str = "",
+    deadline_ts: Optional[float] = None,
+    stop: Optional[threading.Event] = None,
+) -> Optional[Tuple[List[str], List[str], Optional[str]]]:
+    """
+    orevideo のページを 1 枚取得して (twimg_list, gofile_list, 先頭リンク) を返す（失敗時は None）。
+    ワーカースレッドから呼ばれる前提で、レートリミット・stop を見てから GET する。
+    前回と同じ内容（304 / 本文のハッシュが同じ）なら、リンク抽出はせずキャッシュの結果を返す。
+    """
+    host = urlsplit(url).netloc
+    if not _OREVIDEO_RATE.wait(host, deadline_ts=deadline_ts, stop=stop):
+        return None
+
+    with run_report.span("page", url=url) as sp:
+        return _fetch_orevideo_page_once(url, label, deadline_ts, sp)
+
+
+def _fetch_orevideo_page_once(
+    url: str,
+    label: str,
+    deadline_ts: Optional[float],
+    sp: dict,
+) -> Optional[Tuple[List[str], List[str], Optional[str]]]:
+    """_fetch_orevideo_page の本体（レートリミット待ちのあと）。結果の種類は sp["result"] に残す"""
+    cache = _page_cache()
+    ent = cache.get(url)
+    headers = HEADERS
+    if ent is not None and (ent.get("etag") or ent.get("last_modified")):
+        headers = dict(HEADERS)
+        if ent.get("etag"):
+            headers["If-None-Match"] = ent["etag"]
+        if ent.get("last_modified"):
+            headers["If-Modified-Since"] = ent["last_modified"]
+
+    try:
+        resp = http_get(url, headers=headers, timeout=20, deadline_ts=deadline_ts)
+    except Exception as e:
+        print(f"[warn] orevideo request failed{label}: {url} ({e})")
+        sp["result"] = "error"
+        return None
+
+    if resp.status_code == 304 and ent is not None:
+        print(f"[info] orevideo not modified{label}: {url}")
+        cache.put(url, dict(ent, ts=time.time()))
+        sp["result"] = "not_modified"
+        run_report.count("page_cache.not_modified")
+        return ent["tw"], ent["gf"], ent.get("first")
+
+    if resp.status_code != 200:
+        print(f"[warn] orevideo status {resp.status_code}{label}: {url}")
+        sp["result"] = f"status_{resp.status_code}"
+        return None
+
+    digest = hashlib.blake2b(resp.content, digest_size=16).hexdigest()
+    validators = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "hash": digest,
+        "ts": time.time(),
+    }
+    if ent is not None and ent.get("hash") == digest:
+        print(f"[info] orevideo unchanged{label}: {url}")
+        cache.put(url, dict(ent, **validators))
+        sp["result"] = "unchanged"
+        run_report.count("page_cache.unchanged")
+        return ent["tw"], ent["gf"], ent.get("first")
+
+    # 本文は str にデコードせず bytes のまま走査する
+    tw_list, gf_list, first = scan_links(resp.content)
+    cache.put(url, dict(validators, tw=tw_list, gf=gf_list, first=first))
+    sp["result"] = "fetched"
+    return tw_list, gf_list, first
+
+
+def iter_orevideo_pages(
+    num_pages: int,
+    deadline_ts,
+) -> Iterator[Tuple[int, List[str], List[str]]]:
+    """
+    orevideo のページを巡回して (page, twimg_list, gofile_list) を 1 ページずつ返すジェネレータ。
+      - page=0 … popular(1ページ目)。twimg だけ使う（gofile は空で返す）
+      - page=1.. … newest の各ページ
+
+    newest は最大 OREVIDEO_CONCURRENCY ページを先読みで並列取得するが、
+    結果は必ず page 1, 2, 3 ... の順に返す（RAW_LIMIT 判定もこの順）。
+    RAW_LIMIT / 締切に達したとき、または呼び出し側がジェネレータを閉じたとき
+    （必要な本数が揃って読むのをやめたとき）は、まだ終わっていない取得をキャンセルする。
+
+    page N の先頭リンクが前回 run の page M の先頭リンクと同じなら、新着は page 単位でずれた
+    だけなので、N+1 以降は前回の M+1 以降をキャッシュから返す（取りに行かない）。
+    キャッシュが無い / 最後にサーバーと一致を確認してから OREVIDEO_REPLAY_MAX_AGE_SEC より
+    経ったページからは、また取りに行く（続きとして返したページの確認時刻は更新しない）。
+
+    deadline_ts は締切の時刻か、締切を返す関数（途中で締切を延ばしたいとき用。取得を始める
+    たびに呼ぶ）。
+    """
+    deadline_of: Callable[[], Optional[float]] = (
+        deadline_ts if callable(deadline_ts) else (lambda: deadline_ts)
+    )
     total_raw = 0
 
-    # 0) popular 1ページ目
+    # 前回 run の newest ページ（このあと上書きされる前に控えておく）
+    cache = _page_cache()
+    prev_pages: dict[int, dict] = {}
+    prev_first: dict[str, int] = {}
+    for p in range(1, num_pages + 1):
+        ent = cache.get(_orevideo_newest_url(p))
+        if ent is None:
+            continue
+        prev_pages[p] = ent
+        if ent.get("first"):
+            prev_first.setdefault(ent["first"], p)
+
+    def _replayable(ent: Optional[dict]) -> bool:
+        return ent is not None and time.time() - float(ent.get("ts") or 0) <= OREVIDEO_REPLAY_MAX_AGE_SEC
+
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(
+        max_workers=OREVIDEO_CONCURRENCY,
+        thread_name_prefix="orevideo",
+    )
+    pending = deque()  # (page, url, future) を page 順に保持
+    next_page = 1
+
+    def _fill_window() -> None:
+        nonlocal next_page
+        while len(pending) < OREVIDEO_CONCURRENCY and next_page <= num_pages:
+            url = _orevideo_newest_url(next_page)
+            fut = executor.submit(_fetch_orevideo_page, url, "", deadline_of(), stop)
+            pending.append((next_page, url, fut))
+            next_page += 1
+
     try:
+        # 0) popular 1ページ目（newest の先読みと並行して取得）
         pop_url = f"{BASE_ORIGIN}/?page=1&sort=popular"
-        resp = requests.get(pop_url, headers=HEADERS, timeout=20)
-        if resp.status_code == 200:
-            html = resp.text
-            tw_pop, gf_pop = extract_links_from_html(html)
+        pop_fut = executor.submit(_fetch_orevideo_page, pop_url, " (popular)", deadline_of(), stop)
+        _fill_window()
+
+        dl = deadline_of()
+        remaining = None if dl is None else max(0.0, dl - _now())
+        _wait_futures([pop_fut], timeout=remaining)
+        if pop_fut.done() and pop_fut.result():
+            tw_pop, gf_pop, _ = pop_fut.result()
             print(f"[info] orevideo popular {pop_url}: twimg={len(tw_pop)}, gofile={len(gf_pop)}")
-            twimg_all.extend(tw_pop)
-        else:
-            print(f"[warn] orevideo status {resp.status_code} (popular): {pop_url}")
-    except Exception as e:
-        print(f"[warn] orevideo request failed (popular): {pop_url} ({e})")
+            total_raw += len(tw_pop)
+            yield 0, tw_pop, []
 
-    # 1) newest 1..num_pages
-    for p in range(1, num_pages + 1):
-        if _deadline_passed(deadline_ts):
-            print(f"[info] orevideo deadline at page={p}; stop.")
-            break
+        # 1) newest 1..num_pages（page 順に返す）
+        while pending:
+            p, url, fut = pending.popleft()
 
-        if p == 1:
-            url = f"{BASE_ORIGIN}/?sort=newest&page=1"
-        else:
-            url = f"{BASE_ORIGIN}/?page={p}&sort=newest"
+            dl = deadline_of()
+            if _deadline_passed(dl):
+                print(f"[info] orevideo deadline at page={p}; stop.")
+                break
 
-        try:
-            resp = requests.get(url, headers=HEADERS, timeout=20)
-        except Exception as e:
-            print(f"[warn] orevideo request failed: {url} ({e})")
-            continue
+            remaining = None if dl is None else max(0.0, dl - _now())
+            _wait_futures([fut], timeout=remaining)
+            if not fut.done():
+                print(f"[info] orevideo deadline at page={p}; stop.")
+                break
 
-        if resp.status_code != 200:
-            print(f"[warn] orevideo status {resp.status_code}: {url}")
-            continue
+            _fill_window()
 
-        html = resp.text
-        tw_list, gf_list = extract_links_from_html(html)
-        print(f"[info] orevideo list {url}: twimg={len(tw_list)}, gofile={len(gf_list)}")
+            page = fut.result()
+            if not page:
+                continue
 
-        twimg_all.extend(tw_list)
+            tw_list, gf_list, first = page
+            print(f"[info] orevideo list {url}: twimg={len(tw_list)}, gofile={len(gf_list)}")
+
+            total_raw += len(tw_list) + len(gf_list)
+            yield p, tw_list, gf_list
+
+            if total_raw >= RAW_LIMIT:
+                print(f"[info] orevideo early stop at RAW_LIMIT={RAW_LIMIT}")
+                break
+
+            # 先頭リンクが前回の page m と同じ → p+1 以降は前回の m+1 以降と同じ並び
+            m = prev_first.get(first) if first else None
+            if m is None or m > p:
+                continue
+            prev_first = {}  # 1 run で 1 回だけ
+
+            q = p + 1
+            while q <= num_pages and total_raw < RAW_LIMIT:
+                ent = prev_pages.get(m + (q - p))
+                if not _replayable(ent):
+                    break
+                # 次の run でも同じ判定ができるよう、ずれた先の URL のキャッシュにしておく
+                cache.put(_orevideo_newest_url(q), dict(ent, etag=None, last_modified=None))
+                total_raw += len(ent["tw"]) + len(ent["gf"])
+                run_report.count("page_cache.replayed")
+                yield q, ent["tw"], ent["gf"]
+                q += 1
+            if q == p + 1:
+                continue
+
+            print(
+                f"[info] orevideo page={p} starts like last run's page={m}; "
+                f"reused cached pages {p + 1}..{q - 1} (last run {m + 1}..{m + q - p - 1})"
+            )
+            if total_raw >= RAW_LIMIT:
+                print(f"[info] orevideo early stop at RAW_LIMIT={RAW_LIMIT}")
+                break
+
+            # キャッシュで埋めた分の先読みは捨てて、続き（あれば）から取りに行く
+            for _, _, f in pending:
+                f.cancel()
+            pending.clear()
+            next_page = q
+            _fill_window()
+    finally:
+        # 残りの先読みは捨てる（実行中のものは stop を見て即終了 / 結果は無視）
+        stop.set()
+        for _, _, fut in pending:
+            fut.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        save_page_cache()
+
+
+def _collect_orevideo_links(
+    num_pages: int,
+    deadline_ts: Optional[float],
+) -> Tuple[List[str], List[str], List[str]]:
+    """
+    orevideo のページを最後まで巡回してリンクを集める（iter_orevideo_pages をまとめるだけ）。
+    戻り値: (twimg_all, gofile_early, gofile_late)
+      - twimg_all     … popular(1ページ目) + newest(1..num_pages)
+      - gofile_early  … newest のうち page <= GOFILE_PRIORITY_MAX_PAGE の gofile（優先）
+      - gofile_late   … newest のうち page >  GOFILE_PRIORITY_MAX_PAGE の gofile（予備）
+    """
+    twimg_all: List[str] = []
+    gofile_early: List[str] = []
+    gofile_late: List[str] = []
 
+    for p, tw_list, gf_list in iter_orevideo_pages(num_pages, deadline_ts):
+        twimg_all.extend(tw_list)
         if p <= GOFILE_PRIORITY_MAX_PAGE:
             gofile_early.extend(gf_list)
         else:
             gofile_late.extend(gf_list)
 
-        total_raw = len(twimg_all) + len(gofile_early) + len(gofile_late)
-        if total_raw >= RAW_LIMIT:
-            print(f"[info] orevideo early stop at RAW_LIMIT={RAW_LIMIT}")
-            break
-
-        time.sleep(0.3)
-
     return twimg_all, gofile_early, gofile_late
 
 
@@ -521,6 +2238,134 @@ def fetch_listing_pages(
     return all_urls[:RAW_LIMIT]
 
 
+# =========================
+#   orevideo 巡回の統計（run をまたいで保持 → 次の run の巡回ページ数を決める）
+# =========================
+
+# 保存先（空文字なら保存しない = 毎回 num_pages 固定）
+CRAWL_STATS_FILE = os.getenv("CRAWL_STATS_FILE", "crawl_stats.json")
+# 1 なら統計から巡回ページ数を決める（0 なら従来どおり固定）
+ADAPTIVE_CRAWL = os.getenv("ADAPTIVE_CRAWL", "1") == "1"
+# 何 run 分の統計を使うか / 何 run 分たまるまでは固定値で回すか
+CRAWL_STATS_RUNS = max(1, int(os.getenv("CRAWL_STATS_RUNS", "24")))
+CRAWL_STATS_MIN_RUNS = max(1, int(os.getenv("CRAWL_STATS_MIN_RUNS", "3")))
+# 巡回ページ数の範囲（CRAWL_MAX_PAGES=0 なら num_pages まで）
+CRAWL_MIN_PAGES = max(1, int(os.getenv("CRAWL_MIN_PAGES", "5")))
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "0"))
+# 未使用リンクのうち、この割合が出てくるページまで読む（＋余裕 CRAWL_DEPTH_MARGIN ページ）
+CRAWL_YIELD_COVERAGE = float(os.getenv("CRAWL_YIELD_COVERAGE", "0.95"))
+CRAWL_DEPTH_MARGIN = max(0, int(os.getenv("CRAWL_DEPTH_MARGIN", "2")))
+# 何 run に 1 回は上限まで読む（深いページに新しい URL が出てきても気づけるように。0 ならしない）
+# この run は必要な本数が揃っても途中でやめずに最後まで読んで、深いページの収穫も記録する
+CRAWL_EXPLORE_EVERY = max(0, int(os.getenv("CRAWL_EXPLORE_EVERY", "12")))
+
+
+def _coverage_page(per_page: dict[int, float], ratio: float) -> Optional[int]:
+    """page 1 から足していって、合計の ratio 以上に達するページ（合計 0 なら None）"""
+    total = sum(per_page.values())
+    if total <= 0:
+        return None
+    acc = 0
+    for p in sorted(per_page):
+        acc += per_page[p]
+        if acc >= total * ratio:
+            return p
+    return max(per_page)
+
+
+class _CrawlStats:
+    """
+    orevideo newest の「ページごとの収穫」を run ごとに記録する。
+      - raw    … そのページのリンク数（twimg + gofile）
+      - unseen … そのうち投稿済み / この run で使用済みでないもの
+      - live   … そのうち生存確認で生きていた gofile
+    記録するのはその run で読んだページだけ（必要な本数が揃って途中でやめた run は浅いページしか無い）。
+    直近 CRAWL_STATS_RUNS run 分の「読んだ run での 1 run あたりの unseen」から、次の run の巡回ページ数を決める。
+    ファイル: {"run_no": n, "runs": [{"ts", "depth", "explore", "pages": {"1": [raw, unseen, live]}}]}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.run_no = 0
+        self.runs: List[dict] = []
+        self.pages: dict[int, List[int]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.run_no = int(data.get("run_no") or 0)
+            self.runs = [r for r in data.get("runs", []) if isinstance(r.get("pages"), dict)]
+        except Exception as e:
+            print(f"[warn] failed to load crawl stats ({self.path}): {e}")
+            self.run_no, self.runs = 0, []
+
+    def plan(self, num_pages: int) -> Tuple[int, bool]:
+        """(巡回ページ数, 探索 run か) を返す"""
+        hi = min(CRAWL_MAX_PAGES, num_pages) if CRAWL_MAX_PAGES > 0 else num_pages
+        lo = min(CRAWL_MIN_PAGES, hi)
+        if not (ADAPTIVE_CRAWL and self.path):
+            return num_pages, False
+        if len(self.runs) < CRAWL_STATS_MIN_RUNS:
+            print(f"[info] adaptive crawl: {len(self.runs)} run(s) of stats (< {CRAWL_STATS_MIN_RUNS}); use defaults.")
+            return hi, False
+
+        if CRAWL_EXPLORE_EVERY and (self.run_no + 1) % CRAWL_EXPLORE_EVERY == 0:
+            print(f"[info] adaptive crawl: explore run; depth={hi}")
+            return hi, True
+
+        # ページごとに「そのページを読んだ run」だけで平均する
+        # （途中でやめた run の、読んでいない深いページを 0 件として数えない）
+        unseen: dict[int, int] = {}
+        runs_read: dict[int, int] = {}
+        for run in self.runs:
+            for p, (_, n_unseen, _) in run["pages"].items():
+                unseen[int(p)] = unseen.get(int(p), 0) + n_unseen
+                runs_read[int(p)] = runs_read.get(int(p), 0) + 1
+        avg = {p: unseen[p] / runs_read[p] for p in unseen if p <= hi}
+
+        cover = _coverage_page(avg, CRAWL_YIELD_COVERAGE)
+        depth = max(lo, min(hi, (cover or 0) + CRAWL_DEPTH_MARGIN))
+        print(
+            f"[info] adaptive crawl: depth={depth} (range {lo}..{hi}) "
+            f"from {len(self.runs)} run(s), pages read up to {max(avg, default=0)}"
+        )
+        return depth, False
+
+    def record(self, page: int, raw: int, unseen: int) -> None:
+        ent = self.pages.setdefault(page, [0, 0, 0])
+        ent[0] += raw
+        ent[1] += unseen
+
+    def add_live(self, page: int) -> None:
+        if page <= 0:
+            return
+        self.pages.setdefault(page, [0, 0, 0])[2] += 1
+
+    def save(self, depth: int, explore: bool) -> None:
+        if not self.path or _DRY_RUN:
+            return
+        self.run_no += 1
+        if self.pages:
+            self.runs.append({
+                "ts": int(time.time()),
+                "depth": depth,
+                "explore": explore,
+                "pages": {str(p): v for p, v in sorted(self.pages.items())},
+            })
+            self.runs = self.runs[-CRAWL_STATS_RUNS:]
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"run_no": self.run_no, "runs": self.runs}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[warn] failed to save crawl stats ({self.path}): {e}")
+
+
 # =========================
 #   collect_fresh_gofile_urls（bot_orevideo.py から呼ばれるメイン）
 # =========================
@@ -530,6 +2375,7 @@ def collect_fresh_gofile_urls(
     want: int = 5,
     num_pages: int = 50,
     deadline_sec: Optional[int] = None,
+    budget: Optional[RunBudget] = None,
 ) -> List[str]:
     """
     orevideo 用の URL 選別ロジック。
@@ -539,6 +2385,14 @@ def collect_fresh_gofile_urls(
       2. orevideo の gofile（ページ 1〜GOFILE_PRIORITY_MAX_PAGE 優先）
       3. twimg で残りを埋める
 
+    ADAPTIVE_CRAWL=1 なら、巡回ページ数（num_pages 以下）は
+    前回までの crawl_stats.json（ページごとの収穫）から決める。
+    CRAWL_EXPLORE_EVERY run に 1 回は、必要な本数が揃ったあとも巡回ページ数まで読んで収穫を記録する。
+
+    持ち時間は budget（bot 側の run 全体の RunBudget）のステージ配分に従う:
+      sheet → crawl ＋ strict（並行）→ fill。どのステージも deadline_sec の締切は超えない。
+    budget が無ければ deadline_sec をこの 4 ステージで分ける。
+
     - gofile 合計本数は GOFILE_TARGET 本（ただし want まで）
     - スプシー側 gofile は _check_gofile_status_basic でゆるめチェック（最大30件）
     - orevideo の gofile は _is_gofile_alive() で厳しめチェック
@@ -562,14 +2416,8 @@ def collect_fresh_gofile_urls(
             deadline_sec = None
 
     deadline_ts = (_now() + deadline_sec) if deadline_sec else None
-
-    # orevideo から raw リンク収集
-    tw_all_raw, gf_early_raw, gf_late_raw = _collect_orevideo_links(num_pages=num_pages, deadline_ts=deadline_ts)
-
-    # 重複削除
-    tw_all    = _unique_preserve(tw_all_raw)
-    gf_early  = _unique_preserve(gf_early_raw)
-    gf_late   = _unique_preserve(gf_late_raw)
+    if budget is None:
+        budget = RunBudget(deadline_sec or None, stages=("sheet", "crawl", "strict", "fill"))
 
     # 目標本数
     go_target = min(GOFILE_TARGET, want)
@@ -577,14 +2425,14 @@ def collect_fresh_gofile_urls(
     results: List[str] = []
     selected_gofile: List[str] = []
     selected_twimg: List[str] = []
-    seen_now: Set[str] = set()
+    seen_now: Set[str] = set()     # この run で使った URL のキー(canonical_url_key)
 
     def can_use_url(raw_url: str) -> Optional[str]:
         """state.json & この run 内での重複をチェックして OK なら正規化URLを返す"""
         if not raw_url:
             return None
         norm = _normalize_url(raw_url)
-        if norm in seen_now:
+        if canonical_url_key(norm) in seen_now:
             return None
         if norm in already_seen:
             return None
@@ -592,87 +2440,525 @@ def collect_fresh_gofile_urls(
 
     # ------- 0) スプシー(B列)の gofile を優先して拾う（チェックあり） -------
 
-    sheet_alive = _load_alive_urls_from_sheet(
-        already_seen=already_seen,
-        seen_now=seen_now,
-        max_needed=go_target,
-        deadline_ts=deadline_ts,
-    )
+    with run_report.span("sheet") as sp:
+        sheet_alive = _load_alive_urls_from_sheet(
+            already_seen=already_seen,
+            seen_now=seen_now,
+            max_needed=go_target,
+            deadline_ts=budget.deadline("sheet", cap=deadline_ts),
+        )
+        sp["selected"] = len(sheet_alive)
     selected_gofile.extend(sheet_alive)
+    budget.finish("sheet")
+
+    # crawl と strict は並行（ページを読みながら生存確認する）
+    crawl_deadline = budget.deadline("crawl", cap=deadline_ts)
+    strict_deadline = budget.deadline("strict", cap=deadline_ts)
+
+    # 巡回ページ数（統計があればそこから決める）
+    stats = _CrawlStats(CRAWL_STATS_FILE)
+    crawl_pages, explore = stats.plan(num_pages)
+
+    # orevideo は必要な分だけ 1 ページずつ読む（gofile / twimg が揃ったら巡回をやめる）
+    # fill で続きのページを読むときは fill の締切に差し替える
+    page_deadline = {"ts": crawl_deadline}
+    pages = iter_orevideo_pages(num_pages=crawl_pages, deadline_ts=lambda: page_deadline["ts"])
+    tw_keys: List[str] = []                 # 読んだページの twimg の動画キー（popular → newest の順、重複なし）
+    tw_variants: dict[str, List[str]] = {}  # 動画キー -> 出てきた URL（?tag= / 解像度違い）
+
+    def _take_twimg(tw_list: List[str]) -> None:
+        # 同じ動画の ?tag= / 解像度違いはまとめておき、fill で好みの解像度から確認する
+        for u in tw_list:
+            key = canonical_url_key(u)
+            if key not in tw_variants:
+                tw_variants[key] = []
+                tw_keys.append(key)
+            tw_variants[key].append(u)
 
     # ------- 1) orevideo の gofile: 優先ページ (1〜GOFILE_PRIORITY_MAX_PAGE) -------
+    # ------- 2) orevideo の gofile: それ以降のページ -------
+    #
+    # ページ順（= gf_early → gf_late の順）に候補を並べ、先の候補も並列にチェックしておく。
+    # 結果はこの順にしか採用しないので、選ばれる URL は 1 件ずつ調べた場合と同じ。
 
     gofile_checks = 0
-    for url in gf_early:
-        if len(selected_gofile) >= go_target:
-            break
-        if _deadline_passed(deadline_ts):
-            print("[info] deadline reached during gofile-early selection; stop.")
-            break
-        if gofile_checks >= MAX_GOFILE_CHECK:
-            print(f"[info] reached MAX_GOFILE_CHECK={MAX_GOFILE_CHECK}; stop gofile checks.")
-            break
-
-        norm = can_use_url(url)
-        if not norm:
-            continue
+    queued: dict[str, int] = {}     # 生存確認に回した gofile のキー -> ページ
+
+    def _record_page(page: int, tw_list: List[str], gf_list: List[str]) -> None:
+        if page <= 0:
+            return
+        unseen = sum(1 for u in tw_list + gf_list if can_use_url(u))
+        stats.record(page, len(tw_list) + len(gf_list), unseen)
+
+    def _gofile_candidates():
+        nonlocal gofile_checks
+        for page, tw_list, gf_list in pages:
+            _record_page(page, tw_list, gf_list)
+            _take_twimg(tw_list)
+            stage = "early" if page <= GOFILE_PRIORITY_MAX_PAGE else "late"
+            for url in gf_list:
+                if _deadline_passed(strict_deadline):
+                    print(f"[info] deadline reached during gofile-{stage} selection; stop.")
+                    run_report.count("deadline_stop")
+                    return
+                if gofile_checks >= MAX_GOFILE_CHECK:
+                    print(f"[info] reached MAX_GOFILE_CHECK={MAX_GOFILE_CHECK}; stop gofile checks.")
+                    return
+
+                norm = can_use_url(url)
+                if not norm or canonical_url_key(norm) in queued:
+                    continue
+                queued[canonical_url_key(norm)] = page
+
+                if not _liveness_cache().has(norm, strict=True):
+                    gofile_checks += 1
+                yield norm
+
+    def _strict_check(norm: str) -> bool:
+        return _is_gofile_alive(norm, timeout=10, deadline_ts=strict_deadline)
 
-        gofile_checks += 1
-        if _is_gofile_alive(norm, timeout=10, deadline_ts=deadline_ts):
-            seen_now.add(norm)
-            selected_gofile.append(norm)
+    try:
+        # 厳しめ判定のブラウザは最初の JS チェックで起動し、gofile 選別が終わったら閉じる
+        with run_report.span("crawl", pages=crawl_pages, explore=explore) as sp:
+            try:
+                if len(selected_gofile) < go_target:
+                    with closing(
+                        _verify_in_priority_order(_gofile_candidates(), _strict_check, strict_deadline)
+                    ) as verified:
+                        for norm, alive in verified:
+                            if alive:
+                                stats.add_live(queued.get(canonical_url_key(norm), 0))
+                            if alive and canonical_url_key(norm) not in seen_now:
+                                seen_now.add(canonical_url_key(norm))
+                                selected_gofile.append(norm)
+                                if len(selected_gofile) >= go_target:
+                                    break
+            finally:
+                _close_browser_pool()
+                save_liveness_cache()
+                sp.update(gofile_checks=gofile_checks, selected=len(selected_gofile) - len(sheet_alive))
+                budget.finish("crawl", "strict")
+
+        current_go = len(selected_gofile)
+        remaining  = max(0, want - current_go)
+
+        # ------- 3) twimg で埋める（足りなければ続きのページも読む） -------
+        #
+        # 動画ごとに好みの解像度から HEAD で生存確認し、生きていた 1 本を使う（並列・判定はキャッシュ）。
+
+        fill_deadline = budget.deadline("fill", cap=deadline_ts)
+        page_deadline["ts"] = fill_deadline
+        twimg_checks = 0
+
+        def _twimg_candidates():
+            nonlocal twimg_checks
+            tw_idx = 0
+            while True:
+                if tw_idx >= len(tw_keys):
+                    nxt = next(pages, None)
+                    if nxt is None:
+                        return
+                    _record_page(*nxt)
+                    _take_twimg(nxt[1])
+                    continue
+
+                if _deadline_passed(fill_deadline):
+                    print("[info] deadline reached during twimg selection; stop.")
+                    run_report.count("deadline_stop")
+                    return
+
+                key = tw_keys[tw_idx]
+                tw_idx += 1
+                variants = [u for u in _prefer_twimg_variants(tw_variants[key]) if can_use_url(u)]
+                if not variants:
+                    continue
+                if _twimg_check_needed(variants):
+                    if twimg_checks >= TWIMG_MAX_CHECK:
+                        print(f"[info] reached TWIMG_MAX_CHECK={TWIMG_MAX_CHECK}; stop twimg checks.")
+                        return
+                    twimg_checks += 1
+                yield variants
+
+        with run_report.span("fill") as sp:
+            if remaining > 0:
+                with closing(_verify_in_priority_order(
+                    _twimg_candidates(),
+                    lambda variants: _pick_live_twimg(variants, fill_deadline),
+                    fill_deadline,
+                    parallel=TWIMG_CHECK_PARALLEL,
+                )) as verified:
+                    for _, (live, _checked) in verified:
+                        if live and canonical_url_key(live) not in seen_now:
+                            seen_now.add(canonical_url_key(live))
+                            selected_twimg.append(live)
+                            if len(selected_twimg) >= remaining:
+                                break
+            sp.update(selected=len(selected_twimg), twimg_checks=twimg_checks)
+
+        # 探索 run は選び終わっても残りのページを読んで、深いページの収穫を記録しておく（fill の締切まで）
+        if explore:
+            with run_report.span("explore") as sp:
+                n_read = 0
+                for nxt in pages:
+                    _record_page(*nxt)
+                    n_read += 1
+                sp["pages"] = n_read
+    finally:
+        # 読まなかったページの先読みはここでキャンセル
+        pages.close()
+        stats.save(crawl_pages, explore)
+        save_liveness_cache()
+        budget.finish("fill")
 
-    # ------- 2) orevideo の gofile: それ以降のページ -------
+    results = selected_gofile + selected_twimg
 
-    if len(selected_gofile) < go_target:
-        for url in gf_late:
-            if len(selected_gofile) >= go_target:
-                break
-            if _deadline_passed(deadline_ts):
-                print("[info] deadline reached during gofile-late selection; stop.")
-                break
-            if gofile_checks >= MAX_GOFILE_CHECK:
-                print(f"[info] reached MAX_GOFILE_CHECK={MAX_GOFILE_CHECK}; stop gofile checks.")
-                break
+    print(
+        f"[info] orevideo+sheet selected: gofile={len(selected_gofile)}, "
+        f"twimg={len(selected_twimg)}, total={len(results)} (target={want})"
+    )
 
-            norm = can_use_url(url)
-            if not norm:
-                continue
+    # MIN_POST 未満なら「何も無かった扱い」
+    if len(results) < min_post:
+        print(f"[info] only {len(results)} urls collected (< MIN_POST={min_post}); return [].")
+        return []
 
-            gofile_checks += 1
-            if _is_gofile_alive(norm, timeout=10, deadline_ts=deadline_ts):
-                seen_now.add(norm)
-                selected_gofile.append(norm)
+    return results[:want]
 
-    current_go = len(selected_gofile)
-    remaining  = max(0, want - current_go)
 
-    # ------- 3) twimg で埋める -------
+# =========================
+#   投稿待ちキュー（prefetch_orevideo.py が前もって生存確認した候補）
+# =========================
 
-    for url in tw_all:
-        if len(selected_twimg) >= remaining:
-            break
-        if _deadline_passed(deadline_ts):
-            print("[info] deadline reached during twimg selection; stop.")
-            break
+# 保存先（空文字ならキューは使わない = 毎回 collect_fresh_gofile_urls で集める）
+READY_QUEUE_FILE = os.getenv("READY_QUEUE_FILE", "ready_queue.json")
+# prefetch でキューに貯めておく本数
+READY_GOFILE_TARGET = max(0, int(os.getenv("READY_GOFILE_TARGET", "15")))
+READY_TWIMG_TARGET = max(0, int(os.getenv("READY_TWIMG_TARGET", "30")))
+# 最後の生存確認からこの秒数以内の gofile はそのまま使う（古ければ使う直前に確認し直す）
+READY_FRESH_SEC = int(os.getenv("READY_FRESH_SEC", str(LIVENESS_TTL_ALIVE)))
+# prefetch はこの秒数より古くなった gofile を確認し直しておく（投稿 run で確認しなくて済むように）
+READY_REFRESH_SEC = int(os.getenv("READY_REFRESH_SEC", str(READY_FRESH_SEC // 2)))
+# これより古いエントリは捨てる（gofile は最後の確認から / twimg は見つけてから）
+READY_MAX_AGE_SEC = int(os.getenv("READY_MAX_AGE_SEC", str(12 * 3600)))
 
-        norm = can_use_url(url)
-        if not norm:
-            continue
+# 並び順（小さいほど先）: シートの gofile → orevideo 優先ページの gofile → それ以降の gofile → twimg
+_READY_GROUPS = {"sheet": 0, "early": 1, "late": 2, "twimg": 3}
 
-        seen_now.add(norm)
-        selected_twimg.append(norm)
+# take_ready_urls で使ったシート由来の URL の行（キー -> 行番号）。mark_sheet_posted が使う
+_READY_SHEET_ROWS: dict[str, int] = {}
 
-    results = selected_gofile + selected_twimg
 
+class _ReadyQueue:
+    """
+    投稿待ちの候補（gofile は生存確認済み）。
+    エントリ: {"url", "group": sheet/early/late/twimg, "row": シートの行 or null,
+              "added": 見つけた時刻, "verified": 最後に生きていると確認した時刻, "seq": 見つけた順}
+    並びは (group, 新しく見つけたものから, seq)。重複は canonical_url_key で弾く。
+    ファイル: {"seq": n, "entries": [...]}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.seq = 0
+        self._entries: dict[str, dict] = {}   # キー -> エントリ
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.seq = int(data.get("seq") or 0)
+            for ent in data.get("entries", []):
+                if ent.get("url") and ent.get("group") in _READY_GROUPS:
+                    self._entries[canonical_url_key(ent["url"])] = ent
+        except Exception as e:
+            print(f"[warn] failed to load ready queue ({self.path}): {e}")
+            self.seq, self._entries = 0, {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> Set[str]:
+        return set(self._entries)
+
+    def count(self, *groups: str) -> int:
+        return sum(1 for e in self._entries.values() if e["group"] in groups)
+
+    def entries(self, *groups: str) -> List[dict]:
+        ents = [e for e in self._entries.values() if not groups or e["group"] in groups]
+        return sorted(ents, key=lambda e: (_READY_GROUPS[e["group"]], -e["added"], e["seq"]))
+
+    def add(self, url: str, group: str, row: Optional[int] = None) -> bool:
+        key = canonical_url_key(url)
+        if key in self._entries:
+            return False
+        now = time.time()
+        self.seq += 1
+        self._entries[key] = {
+            "url": url, "group": group, "row": row, "added": now, "verified": now, "seq": self.seq,
+        }
+        return True
+
+    def drop(self, url: str) -> None:
+        self._entries.pop(canonical_url_key(url), None)
+
+    def prune(self, already_seen) -> int:
+        """投稿済み・古すぎるエントリを捨てて、捨てた件数を返す"""
+        now = time.time()
+        drop = [
+            key for key, e in self._entries.items()
+            if e["url"] in already_seen
+            or now - float(e["added"] if e["group"] == "twimg" else e["verified"]) > READY_MAX_AGE_SEC
+        ]
+        for key in drop:
+            del self._entries[key]
+        return len(drop)
+
+    def save(self) -> None:
+        if not self.path or _DRY_RUN:
+            return
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"seq": self.seq, "entries": self.entries()}, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[warn] failed to save ready queue ({self.path}): {e}")
+
+
+def _recheck_ready(ent: dict, deadline_ts: Optional[float]) -> Tuple[bool, bool]:
+    """
+    キューの候補を生存キャッシュを使わずに確認し直す
+    （シート由来の gofile はゆるめ、orevideo 由来は厳しめ、twimg は HEAD）。
+    生きていれば ent["verified"] を今にする。戻り値は (is_alive, definitely_dead)。
+    """
+    url = ent["url"]
+    twimg = ent["group"] == "twimg"
+    strict = ent["group"] != "sheet"
+    if twimg and not TWIMG_CHECK:
+        return True, False
+    if _deadline_passed(deadline_ts):
+        run_report.count("deadline_skip")
+        return False, False
+    with run_report.span("check.ready", url=url) as sp:
+        if twimg:
+            verdict = _check_twimg_status_uncached(url, deadline_ts=deadline_ts)
+        elif strict:
+            verdict = _check_gofile_status_strict(url, timeout=10, deadline_ts=deadline_ts)
+        else:
+            verdict = _check_gofile_status_basic_uncached(url, timeout=10, deadline_ts=deadline_ts)
+        sp["result"] = _verdict_label(verdict)
+    if verdict[0] or verdict[1]:
+        if twimg:
+            _twimg_cache().put(url, verdict, strict=False)
+        else:
+            _liveness_cache().put(url, verdict, strict=strict)
+    if verdict[0]:
+        ent["verified"] = time.time()
+    elif verdict[1]:
+        run_report.count("twimg.dead" if twimg else "gofile.dead")
+    return verdict
+
+
+def take_ready_urls(
+    already_seen,
+    want: int = 5,
+    deadline_ts: Optional[float] = None,
+) -> List[str]:
+    """
+    投稿待ちキューから want 本（gofile は GOFILE_TARGET 本まで → 残りを twimg）を選んで返す。
+      - 最後の確認から READY_FRESH_SEC 以内のもの（gofile / twimg）はそのまま使う（通信しない）
+      - それより古いものだけ使う前に確認し直す（リンク切れはキューから捨てる）
+      - want 本そろわなければ [] を返す（呼び出し側は collect_fresh_gofile_urls で集める）
+    使った URL はキューに残しておく（投稿済みになれば次に読んだときに捨てられる）。
+    """
+    if not READY_QUEUE_FILE:
+        return []
+    queue = _ReadyQueue(READY_QUEUE_FILE)
+    pruned = queue.prune(already_seen)
+    if not len(queue):
+        if pruned:
+            queue.save()
+        print("[info] ready queue: empty")
+        return []
+
+    go_target = min(GOFILE_TARGET, want)
+    now = time.time()
+
+    def _check(ent: dict) -> Tuple[bool, bool]:
+        if now - float(ent["verified"]) <= READY_FRESH_SEC:
+            run_report.count("ready_queue.fresh")
+            return True, False
+        return _recheck_ready(ent, deadline_ts)
+
+    gofile: List[dict] = []
+    if go_target > 0:
+        gofile_entries = queue.entries("sheet", "early", "late")
+        with closing(_verify_in_priority_order(gofile_entries, _check, deadline_ts)) as verified:
+            for ent, (alive, definitely_dead) in verified:
+                if alive:
+                    gofile.append(ent)
+                    if len(gofile) >= go_target:
+                        break
+                elif definitely_dead:
+                    queue.drop(ent["url"])
+        _close_browser_pool()
+
+    need_tw = max(0, want - len(gofile))
+    twimg: List[str] = []
+    if need_tw > 0:
+        with closing(
+            _verify_in_priority_order(queue.entries("twimg"), _check, deadline_ts, parallel=TWIMG_CHECK_PARALLEL)
+        ) as verified:
+            for ent, (alive, definitely_dead) in verified:
+                # twimg は判定できなかっただけなら使う（リンク切れと分かったものだけ捨てる）
+                if alive or not definitely_dead:
+                    twimg.append(ent["url"])
+                    if len(twimg) >= need_tw:
+                        break
+                elif definitely_dead:
+                    queue.drop(ent["url"])
+    save_liveness_cache()
+    queue.save()
+
+    urls = [e["url"] for e in gofile] + twimg
     print(
-        f"[info] orevideo+sheet selected: gofile={len(selected_gofile)}, "
-        f"twimg={len(selected_twimg)}, total={len(results)} (target={want})"
+        f"[info] ready queue: gofile={len(gofile)}, twimg={len(twimg)} "
+        f"(queued={len(queue)}, pruned={pruned}, want={want})"
     )
-
-    # MIN_POST 未満なら「何も無かった扱い」
-    if len(results) < min_post:
-        print(f"[info] only {len(results)} urls collected (< MIN_POST={min_post}); return [].")
+    if len(urls) < want:
         return []
 
-    return results[:want]
+    _READY_SHEET_ROWS.clear()
+    _READY_SHEET_ROWS.update(
+        {canonical_url_key(e["url"]): int(e["row"]) for e in gofile if e["group"] == "sheet" and e.get("row")}
+    )
+    return urls
+
+
+def refill_ready_queue(
+    already_seen,
+    num_pages: int = 50,
+    deadline_sec: Optional[int] = None,
+) -> dict:
+    """
+    prefetch_orevideo.py から呼ばれる。投稿待ちキューを
+      1. 投稿済み・古すぎるものを捨てる
+      2. READY_REFRESH_SEC より前に確認した gofile を確認し直す（リンク切れは捨てる）
+      3. gofile が READY_GOFILE_TARGET 本に足りなければ、スプシー → orevideo の順で足す
+         （スプシーは _load_alive_urls_from_sheet、orevideo は _collect_orevideo_links ＋ 厳しめ判定）
+      4. twimg を READY_TWIMG_TARGET 本まで足す（動画ごとに好みの解像度から HEAD で確認して、生きていた 1 本）
+    の順で整えて保存する。戻り値は件数のまとめ。
+    """
+    queue = _ReadyQueue(READY_QUEUE_FILE)
+    deadline_ts = (_now() + deadline_sec) if deadline_sec else None
+    summary = {"pruned": queue.prune(already_seen), "rechecked": 0, "dropped": 0, "added_gofile": 0, "added_twimg": 0}
+
+    try:
+        # 2) 古くなった gofile を確認し直す
+        now = time.time()
+        stale = [e for e in queue.entries("sheet", "early", "late") if now - float(e["verified"]) > READY_REFRESH_SEC]
+        with run_report.span("ready.refresh", stale=len(stale)):
+            with closing(
+                _verify_in_priority_order(stale, lambda e: _recheck_ready(e, deadline_ts), deadline_ts)
+            ) as verified:
+                for ent, (alive, definitely_dead) in verified:
+                    summary["rechecked"] += 1
+                    if definitely_dead:
+                        queue.drop(ent["url"])
+                        summary["dropped"] += 1
+
+        # 3) スプシーの gofile
+        need_gf = READY_GOFILE_TARGET - queue.count("sheet", "early", "late")
+        if need_gf > 0 and not _deadline_passed(deadline_ts):
+            with run_report.span("sheet"):
+                alive = _load_alive_urls_from_sheet(
+                    already_seen=already_seen,
+                    seen_now=queue.keys(),
+                    max_needed=need_gf,
+                    deadline_ts=deadline_ts,
+                )
+            session = _get_sheet_session()
+            url_row = session.url_row if session is not None else {}
+            for url in alive:
+                if queue.add(url, "sheet", row=url_row.get(canonical_url_key(url))):
+                    summary["added_gofile"] += 1
+
+        # 3') orevideo の gofile ＋ 4) twimg
+        need_gf = READY_GOFILE_TARGET - queue.count("sheet", "early", "late")
+        need_tw = READY_TWIMG_TARGET - queue.count("twimg")
+        if (need_gf > 0 or need_tw > 0) and not _deadline_passed(deadline_ts):
+            with run_report.span("crawl", pages=num_pages):
+                twimg_all, gofile_early, gofile_late = _collect_orevideo_links(num_pages, deadline_ts)
+
+            def _candidates():
+                known = queue.keys()
+                checks = 0
+                for group, urls in (("early", gofile_early), ("late", gofile_late)):
+                    for url in urls:
+                        norm = _normalize_url(url)
+                        key = canonical_url_key(norm)
+                        if key in known or norm in already_seen:
+                            continue
+                        known.add(key)
+                        # リンク切れと分かっているものは確認しない
+                        if _liveness_cache().get(norm, strict=True) == (False, True):
+                            continue
+                        if checks >= MAX_GOFILE_CHECK:
+                            print(f"[info] reached MAX_GOFILE_CHECK={MAX_GOFILE_CHECK}; stop gofile checks.")
+                            return
+                        checks += 1
+                        yield {"url": norm, "group": group}
+
+            if need_gf > 0:
+                with run_report.span("strict"), closing(
+                    _verify_in_priority_order(_candidates(), lambda e: _recheck_ready(e, deadline_ts), deadline_ts)
+                ) as verified:
+                    for ent, (alive, _) in verified:
+                        if alive and queue.add(ent["url"], ent["group"]):
+                            summary["added_gofile"] += 1
+                            need_gf -= 1
+                            if need_gf <= 0:
+                                break
+
+            def _twimg_candidates():
+                variants_by_key: dict[str, List[str]] = {}
+                for url in twimg_all:
+                    variants_by_key.setdefault(canonical_url_key(url), []).append(url)
+                known = queue.keys()
+                checks = 0
+                for key, urls in variants_by_key.items():
+                    variants = [u for u in _prefer_twimg_variants(urls) if u not in already_seen]
+                    if key in known or not variants:
+                        continue
+                    if _twimg_check_needed(variants):
+                        if checks >= TWIMG_MAX_CHECK:
+                            print(f"[info] reached TWIMG_MAX_CHECK={TWIMG_MAX_CHECK}; stop twimg checks.")
+                            return
+                        checks += 1
+                    yield variants
+
+            if need_tw > 0 and not _deadline_passed(deadline_ts):
+                with run_report.span("twimg"), closing(_verify_in_priority_order(
+                    _twimg_candidates(),
+                    lambda variants: _pick_live_twimg(variants, deadline_ts),
+                    deadline_ts,
+                    parallel=TWIMG_CHECK_PARALLEL,
+                )) as verified:
+                    for _, (live, checked) in verified:
+                        # 判定できなかったものは確認済みとしてキューに入れない（投稿時の収集に任せる）
+                        if live and checked and queue.add(live, "twimg"):
+                            summary["added_twimg"] += 1
+                            need_tw -= 1
+                            if need_tw <= 0:
+                                break
+    finally:
+        _close_browser_pool()
+        save_liveness_cache()
+        queue.save()
+
+    summary.update(gofile=queue.count("sheet", "early", "late"), twimg=queue.count("twimg"))
+    print("[info] ready queue refilled: " + ", ".join(f"{k}={v}" for k, v in summary.items()))
+    return summary
@@ -0,0 +1,203 @@
+# http_session.py — 外向き HTTP をまとめる共有セッション
+#
+# goxplorer2.py / bot_orevideo.py の requests.get / post は全部ここを通す。
+#   - requests.Session を 1 run で 1 つだけ作り、ホストごとのコネクションプールを使い回す
+#     （keep-alive で同じホストへの TCP+TLS ハンドシェイクを毎回やり直さない）
+#   - 429 / 5xx は urllib3 の Retry で自動リトライ（ジッター付きバックオフ・Retry-After 対応）
+#     ※ POST はリトライしない（ツイート投稿などを二重に送らないため）
+#   - タイムアウトはホストごとに環境変数で上書きできる
+#   - deadline_ts（time.monotonic() の時刻）を渡すと、タイムアウトを締切までの残りに縮める
+#   - REPLAY_MODE=record / replay のときは replay.py で記録 / 再生する
+#   - リトライ回数と 429 の回数は run_report のカウンタ（http.retry / http.429）に数える
+#   - requests / urllib3 は最初のセッションを作るときに import する（通信しない run の起動を軽くする）
+
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+from urllib.parse import urlsplit
+
+import replay
+import run_report
+
+if TYPE_CHECKING:
+    import requests
+    from urllib3.util.retry import Retry
+
+# リトライ回数（0 ならリトライしない）
+HTTP_RETRIES = max(0, int(os.getenv("HTTP_RETRIES", "2")))
+# バックオフ: backoff_factor * 2^(n-1) 秒 ＋ 0〜HTTP_BACKOFF_JITTER 秒のジッター
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+# Retry-After が長すぎるときはこの秒数までしか待たない（締切のある run なので）
+HTTP_RETRY_AFTER_MAX = float(os.getenv("HTTP_RETRY_AFTER_MAX", "10"))
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# ホストごとのコネクションプールの大きさ（並列で叩く数より小さいと接続を捨てて作り直す）
+HTTP_POOL_MAXSIZE = max(1, int(os.getenv("HTTP_POOL_MAXSIZE", "16")))
+
+# タイムアウト（秒）。呼び出し側が指定しなかったときの既定値
+HTTP_TIMEOUT_SEC = float(os.getenv("HTTP_TIMEOUT_SEC", "20"))
+# 締切が近くても、これより短いタイムアウトにはしない（秒）
+HTTP_MIN_TIMEOUT_SEC = float(os.getenv("HTTP_MIN_TIMEOUT_SEC", "2"))
+
+
+def _parse_host_timeouts(raw: str) -> Dict[str, float]:
+    """
+    HTTP_HOST_TIMEOUTS="orevideo.pythonanywhere.com=20,gofile.io=10,api.gofile.io=8"
+    の形式をパースする（壊れた項目は無視）。
+    """
+    out: Dict[str, float] = {}
+    for item in raw.split(","):
+        host, sep, sec = item.partition("=")
+        host = host.strip().lower()
+        if not (sep and host):
+            continue
+        try:
+            out[host] = float(sec)
+        except ValueError:
+            print(f"[warn] HTTP_HOST_TIMEOUTS: bad item ignored: {item.strip()}")
+    return out
+
+
+# ホスト別タイムアウト（指定されていれば呼び出し側の値より優先）
+HTTP_HOST_TIMEOUTS = _parse_host_timeouts(os.getenv("HTTP_HOST_TIMEOUTS", ""))
+
+
+def _make_retry() -> "Retry":
+    from urllib3.util.retry import Retry
+
+    class _CappedRetry(Retry):
+        """Retry-After を HTTP_RETRY_AFTER_MAX 秒で頭打ちにする Retry"""
+
+        def get_retry_after(self, response):
+            retry_after = super().get_retry_after(response)
+            if retry_after is None:
+                return None
+            return min(retry_after, HTTP_RETRY_AFTER_MAX)
+
+    kwargs = dict(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=0,  # 読み込み途中のタイムアウトはリトライしない（締切を食いつぶすので）
+        status=HTTP_RETRIES,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        respect_retry_after_header=True,
+        raise_on_status=False,  # リトライし切ったら最後のレスポンスをそのまま返す
+    )
+    try:
+        return _CappedRetry(
+            backoff_jitter=HTTP_BACKOFF_JITTER, backoff_max=HTTP_BACKOFF_MAX, **kwargs
+        )
+    except TypeError:
+        # urllib3 1.x には backoff_jitter / backoff_max 引数がない
+        return _CappedRetry(**kwargs)
+
+
+def _new_session() -> "requests.Session":
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    sess = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_MAXSIZE,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=_make_retry(),
+    )
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
+    return sess
+
+
+_SESSION: Optional["requests.Session"] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    """共有セッションを返す（最初の呼び出しでだけ作る）"""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = _new_session()
+        return _SESSION
+
+
+def close_session() -> None:
+    """共有セッションを閉じる（次の get_session() で作り直す）"""
+    global _SESSION
+    with _SESSION_LOCK:
+        sess, _SESSION = _SESSION, None
+    if sess is not None:
+        sess.close()
+
+
+def http_timeout(
+    url: str,
+    default: Optional[float] = None,
+    deadline_ts: Optional[float] = None,
+) -> float:
+    """
+    url のホストに対するタイムアウト（env の指定 > 呼び出し側の値 > HTTP_TIMEOUT_SEC）。
+    deadline_ts があれば、締切までの残り（最低 HTTP_MIN_TIMEOUT_SEC）に縮める。
+    """
+    host = (urlsplit(url).hostname or "").lower()
+    if host in HTTP_HOST_TIMEOUTS:
+        timeout = HTTP_HOST_TIMEOUTS[host]
+    else:
+        timeout = default if default is not None else HTTP_TIMEOUT_SEC
+    if deadline_ts is not None:
+        timeout = max(HTTP_MIN_TIMEOUT_SEC, min(timeout, deadline_ts - time.monotonic()))
+    return timeout
+
+
+def http_request(
+    method: str,
+    url: str,
+    timeout: Optional[float] = None,
+    deadline_ts: Optional[float] = None,
+    **kwargs,
+) -> "requests.Response":
+    """共有セッション経由のリクエスト。失敗時は requests と同じ例外を投げる"""
+    if replay.replaying():
+        return replay.replay_http(method, url, kwargs.get("params"), kwargs.get("headers"))
+    if replay.recording():
+        kwargs["headers"] = replay.strip_conditional(kwargs.get("headers"))
+
+    t0 = time.monotonic()
+    resp = get_session().request(
+        method, url, timeout=http_timeout(url, timeout, deadline_ts), **kwargs
+    )
+    if replay.recording():
+        replay.record_http(method, url, kwargs.get("params"), resp, time.monotonic() - t0)
+    retries = getattr(getattr(resp.raw, "retries", None), "history", ())
+    n429 = sum(1 for h in retries if h.status == 429) + (resp.status_code == 429)
+    if n429:
+        run_report.count("http.429", n429)
+    if retries:
+        run_report.count("http.retry", len(retries))
+        print(
+            f"[info] http {method} {url}: {len(retries)} retr{'y' if len(retries) == 1 else 'ies'} "
+            f"-> {resp.status_code} ({time.monotonic() - t0:.1f}s)"
+        )
+    return resp
+
+
+def http_get(
+    url: str,
+    timeout: Optional[float] = None,
+    deadline_ts: Optional[float] = None,
+    **kwargs,
+) -> "requests.Response":
+    return http_request("GET", url, timeout=timeout, deadline_ts=deadline_ts, **kwargs)
+
+
+def http_post(
+    url: str,
+    timeout: Optional[float] = None,
+    deadline_ts: Optional[float] = None,
+    **kwargs,
+) -> "requests.Response":
+    return http_request("POST", url, timeout=timeout, deadline_ts=deadline_ts, **kwargs)
@@ -0,0 +1,501 @@
+# posted_history.py — 投稿済み URL の履歴ストア
+#
+# state.json の posted_urls（リスト）の代わりに使う。
+#
+# ・posted_urls.log … 追記専用。1 行 1 件（URL そのものではなく key_func で作ったキー。
+#     例: gofile は "gf:<id>"。生 URL で書かれた古い log は起動時に 1 回だけ書き直す）。
+#     保存は「増えた分を末尾に足すだけ」なので、履歴が増えても保存コストは一定。
+#     git のコミットも追記分の差分だけになる。
+# ・posted_urls.idx … log の索引（バイナリ）。
+#     [ヘッダ 32byte] + [URL のハッシュ 8byte + log 内の位置 8byte] をハッシュ順に並べたもの。
+#     起動時は mmap するだけなので、読み込みコストも履歴の件数によらない。
+#     `in` は二分探索 → log の該当行を読んで文字列を突き合わせる（ハッシュ衝突でも誤判定しない）。
+# ・索引に入っていない末尾（前回の索引作成以降に追記された分）はメモリ上の set で持ち、
+#   REINDEX_EVERY 件たまったら索引を作り直す。
+#
+# ・posted_urls.bloom … Bloom filter（バイナリ, 1 URL あたり 10bit 前後）。
+#     `in` の最初に引き、「確実に無い」と分かればファイルを見ずに False を返す。
+#     「あるかも」のときだけ上の索引 / 末尾 set で正確に確かめる。
+#
+# read_only=True（DRY_RUN / 再生 / prefetch）のときはどのファイルも書かない。索引が使えなければ
+# log を全部メモリ上の set に読み、古い形式の log はメモリ上でだけキーに変換する。
+#
+# 索引・Bloom filter が無い / 壊れている / log と合わない ときは log から作り直すだけなので、
+# 消しても動く（log が正）。「log と合う」かは、作ったときの log の先頭部分（サイズと先頭・末尾
+# PREFIX_SAMPLE byte）の指紋で見る（rebase の解決や古いコミットからの復元で log ごと
+# 差し替わったときに、別の log 用の索引を使わないように）。
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Tuple
+
+IDX_MAGIC = b"PHIDX002"
+_IDX_HEADER = struct.Struct(">8sQQ8s")  # magic, 索引済みの log サイズ(byte), 件数, その範囲の指紋
+_IDX_RECORD = struct.Struct(">8sQ")    # ハッシュ, log 内の行頭オフセット
+
+# 索引に入っていない追記分がこの件数を超えたら索引を作り直す
+REINDEX_EVERY = int(os.getenv("HISTORY_REINDEX_EVERY", "1000"))
+
+# Bloom filter（0 で使わない）。容量が足りなくなったら倍の容量で作り直す
+USE_BLOOM = os.getenv("HISTORY_BLOOM", "1") != "0"
+BLOOM_FP_RATE = float(os.getenv("HISTORY_BLOOM_FP_RATE", "0.01"))
+BLOOM_MIN_CAPACITY = int(os.getenv("HISTORY_BLOOM_MIN_CAPACITY", "20000"))
+
+BLOOM_MAGIC = b"PHBLM002"
+# magic, ビット数, ハッシュ数, 容量, 件数, 反映済みの log サイズ, その範囲の指紋
+_BLOOM_HEADER = struct.Struct(">8sQIQQQ8s")
+
+
+# log の先頭部分の指紋に使う、先頭 / 末尾のバイト数
+PREFIX_SAMPLE = 4096
+
+
+def _hash_key(key: str) -> bytes:
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+
+
+def _prefix_fingerprint(path: str, size: int) -> bytes:
+    """log の先頭 size byte の指紋（サイズ＋先頭と末尾 PREFIX_SAMPLE byte のハッシュ）"""
+    h = hashlib.blake2b(size.to_bytes(8, "big"), digest_size=8)
+    if size <= 0:
+        return h.digest()
+    try:
+        with open(path, "rb") as f:
+            h.update(f.read(min(size, PREFIX_SAMPLE)))
+            if size > PREFIX_SAMPLE:
+                f.seek(max(PREFIX_SAMPLE, size - PREFIX_SAMPLE))
+                h.update(f.read(size - f.tell()))
+    except OSError:
+        return b""
+    return h.digest()
+
+
+class BloomFilter:
+    """
+    ビット配列 + k 個のハッシュ（blake2b 128bit を 2 つに割った double hashing）。
+    False なら確実に未登録、True は「たぶん登録済み」（誤検出率 ≒ fp_rate）。
+    """
+
+    def __init__(self, capacity: int, fp_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.nbits = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.nhash = max(1, round(self.nbits / capacity * math.log(2)))
+        self.bits = bytearray((self.nbits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterator[int]:
+        d = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "big")
+        h2 = int.from_bytes(d[8:], "big") | 1
+        for i in range(self.nhash):
+            yield (h1 + i * h2) % self.nbits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def full(self) -> bool:
+        return self.count > self.capacity
+
+    def save(self, path: str, covered_size: int, fingerprint: bytes = b"") -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_BLOOM_HEADER.pack(
+                BLOOM_MAGIC, self.nbits, self.nhash, self.capacity, self.count, covered_size, fingerprint
+            ))
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional[Tuple["BloomFilter", int, bytes]]:
+        """(filter, 反映済みの log サイズ, その範囲の指紋) を返す。読めなければ None"""
+        try:
+            with open(path, "rb") as f:
+                header = f.read(_BLOOM_HEADER.size)
+                magic, nbits, nhash, capacity, count, covered, fingerprint = _BLOOM_HEADER.unpack(header)
+                bits = f.read()
+        except (OSError, struct.error):
+            return None
+        if magic != BLOOM_MAGIC or len(bits) != (nbits + 7) // 8:
+            return None
+        bf = cls.__new__(cls)
+        bf.capacity, bf.nbits, bf.nhash, bf.count = capacity, nbits, nhash, count
+        bf.bits = bytearray(bits)
+        return bf, covered, fingerprint
+
+
+class PostedHistory:
+    """
+    投稿済み URL の集合（ファイル上）。
+    list 互換として `in` / append / len / イテレーションが使える。
+
+    key_func で正規化してから保存・検索する（呼び出し側で揃えなくてよい）。
+    read_only=True ならファイルは読むだけで、flush しても何も書かない。
+    """
+
+    def __init__(
+        self,
+        log_path: str,
+        idx_path: Optional[str] = None,
+        key_func: Optional[Callable[[str], str]] = None,
+        bloom_path: Optional[str] = None,
+        use_bloom: bool = USE_BLOOM,
+        read_only: bool = False,
+    ):
+        self.log_path = log_path
+        self.idx_path = idx_path or (os.path.splitext(log_path)[0] + ".idx")
+        self.bloom_path = bloom_path or (os.path.splitext(log_path)[0] + ".bloom")
+        self.key_func = key_func or (lambda u: u.strip())
+        self.use_bloom = use_bloom
+        self.read_only = read_only
+        self._raw_log = False              # read_only で古い形式の log を読むとき（読みながらキーに変換）
+        self._bloom: Optional[BloomFilter] = None
+        self._bloom_dirty = False
+
+        self._idx_file = None
+        self._idx_map: Optional[mmap.mmap] = None
+        self._log_reader = None
+        self._idx_count = 0
+        self._indexed_size = 0
+
+        self._tail: Set[str] = set()       # 索引に入っていない log 末尾の分
+        self._pending: List[str] = []      # まだ log に書いていない分
+
+        self._migrate_log_keys()
+        self._open_index()
+        if self.use_bloom:
+            self._open_bloom()
+
+    def _migrate_log_keys(self) -> None:
+        """
+        log が古い形式（key_func を通すと変わる行 = 生 URL のまま）なら、
+        全行を key_func で変換して重複を除いた log に書き直す（1 回だけ）。
+        先頭行だけ見て判定するので、通常の起動コストは増えない。
+        """
+        first = next(self._read_log_keys(0), None)
+        if first is None or self.key_func(first) == first:
+            return
+        if self.read_only:
+            # 書き直さない。索引・Bloom filter も古い形式のものなので使わずにメモリ上で作る
+            self._raw_log = True
+            print(f"[info] {self.log_path} is in the old format; converting in memory only (read only)")
+            return
+        keys: List[str] = []
+        seen: Set[str] = set()
+        for line in self._read_log_keys(0):
+            key = self.key_func(line)
+            if key and key not in seen:
+                seen.add(key)
+                keys.append(key)
+        tmp = self.log_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write("".join(k + "\n" for k in keys).encode("utf-8"))
+        os.replace(tmp, self.log_path)
+        # 索引・Bloom filter は作り直させる
+        for path in (self.idx_path, self.bloom_path):
+            if os.path.exists(path):
+                os.remove(path)
+        print(f"[info] converted {self.log_path} to canonical keys: {len(keys)} entries")
+
+    # ---------- Bloom filter ----------
+
+    def _open_bloom(self) -> None:
+        """
+        保存済みの filter を読み、log で増えた分だけ足す。使えなければ作り直す。
+        log が差し替わっていたら（反映済みの範囲の指紋が違えば）古い filter は使わない。
+        """
+        loaded = (
+            BloomFilter.load(self.bloom_path)
+            if os.path.exists(self.bloom_path) and not self._raw_log
+            else None
+        )
+        log_size = self._log_size()
+        if (
+            loaded is not None
+            and loaded[1] <= log_size
+            and not loaded[0].full
+            and loaded[2] == _prefix_fingerprint(self.log_path, loaded[1])
+        ):
+            self._bloom, covered, _ = loaded
+            if covered < log_size:
+                for key in self._read_log_keys(covered):
+                    self._bloom.add(key)
+                self._bloom_dirty = True
+        else:
+            self._rebuild_bloom()
+
+    def _rebuild_bloom(self) -> None:
+        keys = list(self._read_log_keys(0)) + self._pending
+        capacity = max(BLOOM_MIN_CAPACITY, len(keys) * 2)
+        self._bloom = BloomFilter(capacity, BLOOM_FP_RATE)
+        for key in keys:
+            self._bloom.add(key)
+        self._bloom_dirty = True
+
+    def _save_bloom(self) -> None:
+        if self._bloom is None or not self._bloom_dirty or self.read_only:
+            return
+        try:
+            size = self._log_size()
+            self._bloom.save(self.bloom_path, size, _prefix_fingerprint(self.log_path, size))
+            self._bloom_dirty = False
+        except OSError as e:
+            print(f"[warn] failed to write history bloom filter ({self.bloom_path}): {e}")
+
+    # ---------- 索引 ----------
+
+    def _log_size(self) -> int:
+        try:
+            return os.path.getsize(self.log_path)
+        except OSError:
+            return 0
+
+    def _close_index(self) -> None:
+        if self._idx_map is not None:
+            self._idx_map.close()
+            self._idx_map = None
+        if self._idx_file is not None:
+            self._idx_file.close()
+            self._idx_file = None
+        self._idx_count = 0
+        self._indexed_size = 0
+
+    def _open_index(self) -> None:
+        """
+        索引を開く。使えない索引なら log から作り直す（read_only なら作り直さずに全部 _tail に読む）。
+        末尾の未索引分は _tail に読む。
+        """
+        self._close_index()
+        log_size = self._log_size()
+
+        # 古い形式の log（read_only）は索引を使わない
+        if not self._raw_log and not self._try_map_index(log_size) and not self.read_only:
+            self._rebuild_index()
+            if not self._try_map_index(self._log_size()):
+                # 索引が作れない環境（読み取り専用など）でも、全部 _tail に読めば動く
+                self._close_index()
+
+        self._tail = set(self._read_log_keys(self._indexed_size))
+
+    def _try_map_index(self, log_size: int) -> bool:
+        if not os.path.exists(self.idx_path):
+            return False
+        try:
+            f = open(self.idx_path, "rb")
+        except OSError:
+            return False
+        try:
+            header = f.read(_IDX_HEADER.size)
+            if len(header) != _IDX_HEADER.size:
+                f.close()
+                return False
+            magic, indexed_size, count, fingerprint = _IDX_HEADER.unpack(header)
+            expect = _IDX_HEADER.size + count * _IDX_RECORD.size
+            if (
+                magic != IDX_MAGIC
+                or indexed_size > log_size
+                or os.path.getsize(self.idx_path) != expect
+                or fingerprint != _prefix_fingerprint(self.log_path, indexed_size)
+            ):
+                f.close()
+                return False
+            self._idx_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if count else None
+        except (OSError, ValueError, struct.error):
+            f.close()
+            return False
+        self._idx_file = f
+        self._idx_count = count
+        self._indexed_size = indexed_size
+        return True
+
+    def _rebuild_index(self) -> None:
+        records = []
+        offset = 0
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # 書きかけの最終行は索引に入れない
+                    key = line.decode("utf-8", "replace").strip()
+                    if key:
+                        records.append((_hash_key(key), offset))
+                    offset += len(line)
+        records.sort()
+
+        tmp = self.idx_path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_IDX_HEADER.pack(IDX_MAGIC, offset, len(records), _prefix_fingerprint(self.log_path, offset)))
+                f.write(b"".join(_IDX_RECORD.pack(h, o) for h, o in records))
+            os.replace(tmp, self.idx_path)
+        except OSError as e:
+            print(f"[warn] failed to write history index ({self.idx_path}): {e}")
+
+    def _read_log_keys(self, start: int) -> Iterator[str]:
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                key = line.decode("utf-8", "replace").strip()
+                if key and self._raw_log:
+                    key = self.key_func(key)
+                if key:
+                    yield key
+
+    def _key_at(self, offset: int) -> str:
+        if self._log_reader is None:
+            self._log_reader = open(self.log_path, "rb")
+        self._log_reader.seek(offset)
+        return self._log_reader.readline().decode("utf-8", "replace").strip()
+
+    def _indexed_contains(self, key: str) -> bool:
+        if not self._idx_count or self._idx_map is None:
+            return False
+        h = _hash_key(key)
+        m = self._idx_map
+        base = _IDX_HEADER.size
+        size = _IDX_RECORD.size
+
+        # h 以上になる最初のレコードを二分探索
+        lo, hi = 0, self._idx_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = base + mid * size
+            if m[pos:pos + 8] < h:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        # 同じハッシュのレコードは全部 log で突き合わせる
+        while lo < self._idx_count:
+            pos = base + lo * size
+            rec_hash, offset = _IDX_RECORD.unpack_from(m, pos)
+            if rec_hash != h:
+                return False
+            if self._key_at(offset) == key:
+                return True
+            lo += 1
+        return False
+
+    # ---------- 集合として ----------
+
+    def _contains_key(self, key: str) -> bool:
+        # Bloom filter で「確実に無い」ならファイルは見ない。「あるかも」なら正確に確認
+        if self._bloom is not None and key not in self._bloom:
+            return False
+        return key in self._tail or self._indexed_contains(key)
+
+    def __contains__(self, url) -> bool:
+        if not url:
+            return False
+        return self._contains_key(self.key_func(url))
+
+    def add(self, url: str) -> bool:
+        """未登録なら追加して True（log への書き込みは flush で）"""
+        if not url:
+            return False
+        key = self.key_func(url)
+        if not key or self._contains_key(key):
+            return False
+        self._tail.add(key)
+        self._pending.append(key)
+        if self._bloom is not None:
+            self._bloom.add(key)
+            self._bloom_dirty = True
+        return True
+
+    # list 互換（state["posted_urls"].append(u) のまま使えるように）
+    append = add
+
+    def extend(self, urls: Iterable[str]) -> int:
+        return sum(1 for u in urls if self.add(u))
+
+    def __len__(self) -> int:
+        return self._idx_count + len(self._tail)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._read_log_keys(0)
+        yield from self._pending
+
+    # ---------- 保存 ----------
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    def flush(self) -> None:
+        """追加分を log の末尾に書き足す。未索引分がたまっていたら索引を作り直す。"""
+        if self.read_only:
+            return
+        if self._pending:
+            d = os.path.dirname(self.log_path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            data = "".join(k + "\n" for k in self._pending).encode("utf-8")
+            with open(self.log_path, "ab+") as f:
+                # 前回が書きかけで終わっていたら改行を補ってから足す
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        data = b"\n" + data
+                f.write(data)
+            self._pending = []
+
+        if len(self._tail) >= REINDEX_EVERY:
+            self._close_index()
+            self._rebuild_index()
+            self._open_index()
+
+        if self._bloom is not None:
+            if self._bloom.full:
+                self._rebuild_bloom()
+            self._save_bloom()
+
+    def close(self) -> None:
+        self.flush()
+        self._close_index()
+        if self._log_reader is not None:
+            self._log_reader.close()
+            self._log_reader = None
+
+
+class SeenSet:
+    """
+    「既に使った URL」判定用のビュー。
+    履歴ストア（ファイル上）＋ メモリ上の追加分（直近 24h / TL から拾った分など）を
+    まとめて `in` で引けるようにしたもの。全件を set に展開しない。
+    """
+
+    def __init__(self, history, extra: Iterable[str] = (), key_func: Optional[Callable[[str], str]] = None):
+        self.history = history
+        self.key_func = key_func or (lambda u: u)
+        self.extra: Set[str] = {self.key_func(u) for u in extra if u}
+
+    def __contains__(self, url) -> bool:
+        if not url:
+            return False
+        key = self.key_func(url)
+        return key in self.extra or key in self.history
+
+    def add(self, url: str) -> None:
+        if url:
+            self.extra.add(self.key_func(url))
+
+    def __ior__(self, other: Iterable[str]) -> "SeenSet":
+        for u in other:
+            self.add(u)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.history) + len(self.extra)
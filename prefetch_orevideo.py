@@ -0,0 +1,59 @@
+# prefetch_orevideo.py — 投稿待ちキュー（ready_queue.json）を前もって埋めておく
+#
+# 投稿 run（bot_orevideo.py）の前に別の run で回す。
+#   - スプシー / orevideo を巡回して gofile / twimg の生存確認まで済ませ、確認時刻つきでキューに貯める
+#   - キューにある gofile のうち、確認から READY_REFRESH_SEC たったものは確認し直す
+#   - 投稿済み（posted_urls.log / state.json の直近分）はキューから捨てる
+# 投稿はしないし、state.json / posted_urls.* も書き換えない。
+# 投稿 run はキューから取って、確認が古いものだけ確認し直して投稿する（足りなければ従来どおり巡回）。
+
+import os
+import time
+from datetime import datetime, timezone
+
+import replay
+import run_report
+from bot_orevideo import DRY_RUN, build_seen_set_from_state, load_state, purge_recent_12h
+from goxplorer2 import refill_ready_queue, set_dry_run
+
+
+def _env_int(key, default):
+    try:
+        return int(os.getenv(key, str(default)))
+    except ValueError:
+        return default
+
+
+# キューを埋める run の締切（秒）
+PREFETCH_TIMEOUT_SEC = _env_int("PREFETCH_TIMEOUT_SEC", 420)
+
+
+def main():
+    # 記録 / 再生モードなら、状態ファイルを読む前に準備する
+    replay.setup()
+    set_dry_run(DRY_RUN)
+    run_report.note("entry", "prefetch")
+
+    # 履歴（posted_urls.*）は投稿 run のもの。prefetch は読むだけ
+    with run_report.span("state.load"):
+        state = load_state(read_only=True)
+    purge_recent_12h(state, datetime.now(timezone.utc))
+    already_seen = build_seen_set_from_state(state)
+
+    t0 = time.monotonic()
+    with run_report.span("prefetch"):
+        summary = refill_ready_queue(
+            already_seen,
+            num_pages=_env_int("NUM_PAGES", 50),
+            deadline_sec=PREFETCH_TIMEOUT_SEC,
+        )
+    for k, v in summary.items():
+        run_report.note(k, v)
+    print(f"[info] prefetch done in {time.monotonic() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        run_report.write_report()
@@ -0,0 +1,350 @@
+# replay.py — 記録 / 再生モード（オフラインでの計測用）
+#
+# REPLAY_MODE=record … ふつうに run しながら、外とのやりとりを REPLAY_DIR に保存する
+#   - HTTP（http_session 経由の全部。条件付き GET のヘッダは外して、本文ごと記録する）
+#   - スプシーの読み込み（ws.get の範囲と値）
+#   - 厳しめ判定の Playwright が返した HTML
+#   - run 開始時の状態ファイル（state.json / posted_urls.* / 各キャッシュ）
+# REPLAY_MODE=replay … 保存したものだけで run を再現する（ネットには出ない / 投稿しない）
+#   - 状態ファイルは毎回まっさらな作業ディレクトリにコピーしてから始める（何度でも同じ条件）
+#   - 各呼び出しは記録時にかかった時間 × REPLAY_LATENCY_SCALE だけ待ってから返す
+#     （REPLAY_LATENCY_MS を指定すればその固定値）
+#   - 同じリクエストが何度も来たら、記録した順に返す（使い切ったら最後のものを返し続ける）
+#   - 記録に無いリクエストは接続エラー扱い
+#
+# ※ gofile 生存キャッシュなどの TTL は実時間で判定するので、記録から時間がたつと
+#   キャッシュの当たり方が変わる。完全に同じにしたいときは TTL 系の env を大きくしておく。
+
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+REPLAY_MODE = os.getenv("REPLAY_MODE", "").strip().lower()   # "" / "record" / "replay"
+REPLAY_DIR = os.path.abspath(os.getenv("REPLAY_DIR", "fixtures/replay"))
+# 再生時の作業ディレクトリ（空なら一時ディレクトリ）
+REPLAY_WORKDIR = os.getenv("REPLAY_WORKDIR", "")
+# 再生時の待ち: 記録時の所要時間 × SCALE（REPLAY_LATENCY_MS >= 0 ならその固定値）
+REPLAY_LATENCY_SCALE = float(os.getenv("REPLAY_LATENCY_SCALE", "1.0"))
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", "-1"))
+REPLAY_SEED = int(os.getenv("REPLAY_SEED", "1"))
+# run をまたいで持ち越すファイル（workflow の STATE_FILES と同じもの）
+REPLAY_STATE_FILES = os.getenv(
+    "REPLAY_STATE_FILES",
+    "state.json posted_urls.log posted_urls.idx posted_urls.bloom gofile_liveness.json "
+    "sheet_index.json orevideo_pages.json crawl_stats.json ready_queue.json twimg_liveness.json",
+).split()
+# 記録しないホスト（投稿 API など）
+REPLAY_SKIP_HOSTS = set(os.getenv("REPLAY_SKIP_HOSTS", "api.twitter.com,api.x.com").split(","))
+
+# 記録時に外す / 再生時に見るヘッダ
+_CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+# 記録するレスポンスヘッダ
+_KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+
+def recording() -> bool:
+    return REPLAY_MODE == "record"
+
+
+def replaying() -> bool:
+    return REPLAY_MODE == "replay"
+
+
+def active() -> bool:
+    return recording() or replaying()
+
+
+# =========================
+#   fixture の読み書き
+# =========================
+
+class _Fixtures:
+    """
+    REPLAY_DIR の中身:
+      meta.json      … 記録日時・シートのキー
+      http.jsonl     … {"key", "status", "headers", "body", "elapsed"}
+      sheet.jsonl    … {"key", "values", "elapsed"}
+      render.jsonl   … {"key", "body", "elapsed"}（body が null なら描画失敗）
+      bodies/<sha1>  … 本文（同じ中身は 1 つだけ）
+      state/         … run 開始時の状態ファイル
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, List[dict]]] = {}
+        self._cursor: Dict[tuple, int] = {}
+
+    # ---- 記録 ----
+
+    def put_body(self, body: bytes) -> str:
+        digest = hashlib.sha1(body).hexdigest()
+        path = os.path.join(self.root, "bodies", digest)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(body)
+        return digest
+
+    def append(self, kind: str, entry: dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            with open(os.path.join(self.root, f"{kind}.jsonl"), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    # ---- 再生 ----
+
+    def _load(self, kind: str) -> Dict[str, List[dict]]:
+        if kind not in self._entries:
+            table: Dict[str, List[dict]] = {}
+            path = os.path.join(self.root, f"{kind}.jsonl")
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            ent = json.loads(line)
+                            table.setdefault(ent["key"], []).append(ent)
+            self._entries[kind] = table
+        return self._entries[kind]
+
+    def take(self, kind: str, key: str) -> Optional[dict]:
+        """key の記録を記録順に 1 つ返す（使い切ったら最後のもの）"""
+        with self._lock:
+            entries = self._load(kind).get(key)
+            if not entries:
+                return None
+            i = self._cursor.get((kind, key), 0)
+            self._cursor[(kind, key)] = i + 1
+            return entries[min(i, len(entries) - 1)]
+
+    def get_body(self, digest: Optional[str]) -> Optional[bytes]:
+        if digest is None:
+            return None
+        with open(os.path.join(self.root, "bodies", digest), "rb") as f:
+            return f.read()
+
+
+_FIXTURES: Optional[_Fixtures] = None
+
+
+def _fixtures() -> _Fixtures:
+    global _FIXTURES
+    if _FIXTURES is None:
+        _FIXTURES = _Fixtures(REPLAY_DIR)
+    return _FIXTURES
+
+
+def _sleep_like(elapsed: float) -> None:
+    delay = REPLAY_LATENCY_MS / 1000.0 if REPLAY_LATENCY_MS >= 0 else elapsed * REPLAY_LATENCY_SCALE
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _meta() -> dict:
+    path = os.path.join(REPLAY_DIR, "meta.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_meta(**kw) -> None:
+    meta = _meta()
+    meta.update(kw)
+    with open(os.path.join(REPLAY_DIR, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+# =========================
+#   run の開始
+# =========================
+
+def setup() -> None:
+    """
+    run の最初に 1 回だけ呼ぶ（状態ファイルを読む前に）。
+      - record: REPLAY_DIR を作り直し、今の状態ファイルを state/ に控える
+      - replay: state/ を作業ディレクトリにコピーして、そこへ移動する
+    """
+    if recording():
+        if os.path.isdir(REPLAY_DIR):
+            shutil.rmtree(REPLAY_DIR)
+        os.makedirs(os.path.join(REPLAY_DIR, "bodies"))
+        os.makedirs(os.path.join(REPLAY_DIR, "state"))
+        for name in REPLAY_STATE_FILES:
+            if os.path.isfile(name):
+                shutil.copy2(name, os.path.join(REPLAY_DIR, "state", name))
+        _write_meta(recorded_at=time.strftime("%Y-%m-%dT%H:%M:%S%z"))
+        print(f"[info] replay: recording to {REPLAY_DIR}")
+    elif replaying():
+        if not os.path.isdir(REPLAY_DIR):
+            raise RuntimeError(f"replay: fixture dir not found: {REPLAY_DIR}")
+        workdir = REPLAY_WORKDIR or tempfile.mkdtemp(prefix="replay_")
+        os.makedirs(workdir, exist_ok=True)
+        state_dir = os.path.join(REPLAY_DIR, "state")
+        for name in os.listdir(state_dir) if os.path.isdir(state_dir) else []:
+            shutil.copy2(os.path.join(state_dir, name), os.path.join(workdir, name))
+        os.chdir(workdir)
+        random.seed(REPLAY_SEED)
+        print(f"[info] replay: fixtures={REPLAY_DIR} workdir={workdir}")
+
+
+# =========================
+#   HTTP
+# =========================
+
+def http_key(method: str, url: str, params=None) -> str:
+    if params:
+        import requests
+
+        url = requests.Request(method, url, params=params).prepare().url
+    return f"{method.upper()} {url}"
+
+
+def strip_conditional(headers: Optional[dict]) -> Optional[dict]:
+    """記録時は条件付き GET をやめて、本文を必ずもらう"""
+    if not headers or not any(h in headers for h in _CONDITIONAL_HEADERS):
+        return headers
+    return {k: v for k, v in headers.items() if k not in _CONDITIONAL_HEADERS}
+
+
+def record_http(method: str, url: str, params, resp, elapsed: float) -> None:
+    if (urlsplit(url).hostname or "") in REPLAY_SKIP_HOSTS:
+        return
+    fx = _fixtures()
+    fx.append("http", {
+        "key": http_key(method, url, params),
+        "status": resp.status_code,
+        "headers": {h: resp.headers[h] for h in _KEEP_HEADERS if h in resp.headers},
+        "body": fx.put_body(resp.content or b""),
+        "elapsed": round(elapsed, 4),
+    })
+
+
+def replay_http(method: str, url: str, params=None, headers: Optional[dict] = None):
+    """記録したレスポンスを requests.Response にして返す（無ければ ConnectionError）"""
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+
+    key = http_key(method, url, params)
+    ent = _fixtures().take("http", key)
+    if ent is None:
+        _sleep_like(0.0)
+        raise requests.ConnectionError(f"replay: no fixture for {key}")
+    _sleep_like(ent.get("elapsed", 0.0))
+
+    resp = requests.Response()
+    resp.url = url
+    resp.headers = CaseInsensitiveDict(ent.get("headers") or {})
+    resp.status_code = int(ent["status"])
+    resp._content = _fixtures().get_body(ent.get("body")) or b""
+    resp._content_consumed = True  # stream=True の iter_content も記録した本文から読む
+    resp.encoding = get_encoding_from_headers(resp.headers)
+
+    # 条件付き GET は記録した ETag / Last-Modified で 304 を返す
+    headers = headers or {}
+    etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    if resp.status_code == 200 and (
+        (etag and headers.get("If-None-Match") == etag)
+        or (last_modified and headers.get("If-Modified-Since") == last_modified)
+    ):
+        resp.status_code = 304
+        resp._content = b""
+    return resp
+
+
+# =========================
+#   スプシー
+# =========================
+
+class RecordingWorksheet:
+    """本物のワークシートを包んで、get の結果を記録する（書き込みはそのまま通す）"""
+
+    def __init__(self, ws, sheet_key: str):
+        self._ws = ws
+        _write_meta(sheet_key=sheet_key)
+
+    def get(self, rng: str):
+        t0 = time.monotonic()
+        values = self._ws.get(rng)
+        _fixtures().append("sheet", {
+            "key": rng,
+            "values": [list(r) for r in values],
+            "elapsed": round(time.monotonic() - t0, 4),
+        })
+        return values
+
+    def batch_update(self, data, **kwargs):
+        return self._ws.batch_update(data, **kwargs)
+
+
+class ReplayWorksheet:
+    """記録した get を返すワークシート（書き込みは捨てる）"""
+
+    def get(self, rng: str):
+        ent = _fixtures().take("sheet", rng)
+        if ent is None:
+            raise RuntimeError(f"replay: no sheet fixture for {rng}")
+        _sleep_like(ent.get("elapsed", 0.0))
+        return ent["values"]
+
+    def batch_update(self, data, **kwargs):
+        print(f"[info] replay: sheet batch_update skipped ({len(data)} cell(s))")
+        return {}
+
+
+def replay_sheet_key() -> Optional[str]:
+    return _meta().get("sheet_key")
+
+
+def has_sheet() -> bool:
+    return os.path.exists(os.path.join(REPLAY_DIR, "sheet.jsonl"))
+
+
+# =========================
+#   Playwright（厳しめ判定の HTML）
+# =========================
+
+def watch_render(url: str, fut: "Future[Optional[str]]") -> None:
+    """ブラウザの描画結果が出たら記録する"""
+    t0 = time.monotonic()
+
+    def _done(f: Future) -> None:
+        try:
+            html = f.result()
+        except Exception:
+            html = None
+        fx = _fixtures()
+        fx.append("render", {
+            "key": url,
+            "body": None if html is None else fx.put_body(html.encode("utf-8")),
+            "elapsed": round(time.monotonic() - t0, 4),
+        })
+
+    fut.add_done_callback(_done)
+
+
+class ReplayBrowserPool:
+    """_GofileBrowserPool の代わり（記録した HTML を返すだけ）"""
+
+    def render(self, url: str, timeout: int = 15, deadline_ts: Optional[float] = None) -> "Future[Optional[str]]":
+        fut: "Future[Optional[str]]" = Future()
+        ent = _fixtures().take("render", url)
+        if ent is None:
+            print(f"[warn] replay: no render fixture for {url}")
+            fut.set_result(None)
+            return fut
+        _sleep_like(ent.get("elapsed", 0.0))
+        body = _fixtures().get_body(ent.get("body"))
+        fut.set_result(None if body is None else body.decode("utf-8", "replace"))
+        return fut
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,209 @@
+# run_report.py — run の計測（ステージ / 1 件ごとの所要時間とカウンタ）
+#
+# goxplorer2.py / bot_orevideo.py / http_session.py から:
+#   - with span("page", page=3): ...   … 区間の所要時間（入れ子なら親の名前も残す）
+#   - count("http.429")                  … カウンタ（キャッシュヒット・429・リンク切れ・締切スキップなど）
+#   - note("outcome", "posted")          … run 全体の属性
+# を記録しておき、run の最後に write_report() で書き出す。
+#   - RUN_REPORT_FILE  … この run の明細（JSON Lines。毎回上書き）
+#       1 行目 {"type": "run", ...} / {"type": "span", ...} × N / {"type": "summary", ...}
+#   - RUN_HISTORY_FILE … run ごとの要約を 1 行ずつ追記（直近 RUN_HISTORY_KEEP 行だけ残す）
+#       → run をまたいでステージごとの時間を並べ、遅くなったところを探す用
+#   - $GITHUB_STEP_SUMMARY があれば、要約を Markdown の表で追記する
+#
+# ※ 並行して走る区間（先読みの生存確認など）は、合計時間が wall の時間より長くなることがある。
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+RUN_REPORT_FILE = os.getenv("RUN_REPORT_FILE", "run_report.jsonl")
+RUN_HISTORY_FILE = os.getenv("RUN_HISTORY_FILE", "run_history.jsonl")
+RUN_HISTORY_KEEP = max(1, int(os.getenv("RUN_HISTORY_KEEP", "500")))
+# 1 run で残す区間の最大数（超えた分は要約にだけ数える）
+RUN_REPORT_MAX_SPANS = max(0, int(os.getenv("RUN_REPORT_MAX_SPANS", "5000")))
+# 0 なら $GITHUB_STEP_SUMMARY には書かない
+RUN_REPORT_STEP_SUMMARY = os.getenv("RUN_REPORT_STEP_SUMMARY", "1") == "1"
+
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+
+class _Run:
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.spans: List[dict] = []
+        self.dropped = 0
+        # 区間名 -> [回数, 合計秒, 最大秒, 所要時間の一覧]
+        self.totals: Dict[str, list] = {}
+        self.counters: Counter = Counter()
+        self.notes: Dict[str, object] = {}
+
+
+_RUN = _Run()
+
+
+def reset() -> None:
+    """計測をまっさらにする（1 プロセスで何 run も回すとき用）"""
+    global _RUN
+    with _LOCK:
+        _RUN = _Run()
+
+
+def _stack() -> List[str]:
+    st = getattr(_LOCAL, "stack", None)
+    if st is None:
+        st = _LOCAL.stack = []
+    return st
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[dict]:
+    """
+    区間の所要時間を記録する。yield した dict に書き足した値も属性として残る
+    （例: with span("check.strict", url=u) as sp: ...; sp["result"] = "alive"）。
+    """
+    run = _RUN
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    t0 = time.monotonic()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        dur = time.monotonic() - t0
+        stack.pop()
+        rec = {"name": name, "start": round(t0 - run.t0, 3), "dur": round(dur, 4)}
+        if parent:
+            rec["parent"] = parent
+        if attrs:
+            rec["attrs"] = attrs
+        with _LOCK:
+            tot = run.totals.setdefault(name, [0, 0.0, 0.0, []])
+            tot[0] += 1
+            tot[1] += dur
+            tot[2] = max(tot[2], dur)
+            tot[3].append(dur)
+            if len(run.spans) < RUN_REPORT_MAX_SPANS:
+                run.spans.append(rec)
+            else:
+                run.dropped += 1
+
+
+def count(name: str, n: int = 1) -> None:
+    with _LOCK:
+        _RUN.counters[name] += n
+
+
+def note(key: str, value) -> None:
+    with _LOCK:
+        _RUN.notes[key] = value
+
+
+def _pct(values: List[float], q: float) -> float:
+    vs = sorted(values)
+    return vs[min(len(vs) - 1, int(q * len(vs)))] if vs else 0.0
+
+
+def summary() -> dict:
+    """区間名ごとの回数・合計・最大・p50・p95 とカウンタ"""
+    with _LOCK:
+        run = _RUN
+        spans = {
+            name: {
+                "n": n,
+                "total": round(total, 3),
+                "max": round(mx, 3),
+                "p50": round(_pct(durs, 0.5), 3),
+                "p95": round(_pct(durs, 0.95), 3),
+            }
+            for name, (n, total, mx, durs) in run.totals.items()
+        }
+        return {
+            "started": run.started,
+            "wall": round(time.monotonic() - run.t0, 3),
+            "spans": spans,
+            "counters": dict(run.counters),
+            "notes": dict(run.notes),
+        }
+
+
+def _meta() -> dict:
+    keys = ("GITHUB_RUN_ID", "GITHUB_RUN_ATTEMPT", "GITHUB_SHA", "GITHUB_REF_NAME")
+    return {k.lower(): os.environ[k] for k in keys if os.getenv(k)}
+
+
+def _append_history(line: str) -> None:
+    lines: List[str] = []
+    try:
+        with open(RUN_HISTORY_FILE, "r", encoding="utf-8") as f:
+            lines = [ln for ln in f.read().splitlines() if ln.strip()]
+    except FileNotFoundError:
+        pass
+    lines = (lines + [line])[-RUN_HISTORY_KEEP:]
+    tmp = RUN_HISTORY_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, RUN_HISTORY_FILE)
+
+
+def _step_summary_markdown(s: dict) -> str:
+    out = [f"### run report ({s['started']}, wall {s['wall']:.1f}s)", ""]
+    if s["notes"]:
+        out.append(" / ".join(f"{k}: `{v}`" for k, v in s["notes"].items()))
+        out.append("")
+    out += ["| span | n | total s | p50 s | p95 s | max s |", "|---|---:|---:|---:|---:|---:|"]
+    for name, v in sorted(s["spans"].items(), key=lambda kv: -kv[1]["total"]):
+        out.append(f"| {name} | {v['n']} | {v['total']:.2f} | {v['p50']:.2f} | {v['p95']:.2f} | {v['max']:.2f} |")
+    if s["counters"]:
+        out += ["", "| counter | value |", "|---|---:|"]
+        out += [f"| {k} | {v} |" for k, v in sorted(s["counters"].items())]
+    return "\n".join(out) + "\n"
+
+
+def write_report() -> Optional[dict]:
+    """明細・履歴・Step Summary を書き出す（失敗しても run は止めない）"""
+    s = summary()
+    meta = dict({"type": "run", "started": s["started"]}, **_meta())
+    with _LOCK:
+        spans = list(_RUN.spans)
+        dropped = _RUN.dropped
+
+    if RUN_REPORT_FILE:
+        try:
+            with open(RUN_REPORT_FILE, "w", encoding="utf-8") as f:
+                f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+                for rec in spans:
+                    f.write(json.dumps(dict(type="span", **rec), ensure_ascii=False) + "\n")
+                f.write(json.dumps(dict(type="summary", dropped_spans=dropped, **s), ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"[warn] failed to write run report ({RUN_REPORT_FILE}): {e}")
+
+    if RUN_HISTORY_FILE:
+        try:
+            _append_history(json.dumps(dict(meta, **s), ensure_ascii=False, separators=(",", ":")))
+        except Exception as e:
+            print(f"[warn] failed to append run history ({RUN_HISTORY_FILE}): {e}")
+
+    step_summary = os.getenv("GITHUB_STEP_SUMMARY")
+    if RUN_REPORT_STEP_SUMMARY and step_summary:
+        try:
+            with open(step_summary, "a", encoding="utf-8") as f:
+                f.write(_step_summary_markdown(s))
+        except Exception as e:
+            print(f"[warn] failed to write step summary: {e}")
+
+    print(
+        f"[info] run report: wall={s['wall']:.1f}s "
+        + ", ".join(f"{k}={v['total']:.1f}s" for k, v in s["spans"].items() if "." not in k)
+    )
+    return s